@@ -1,28 +1,182 @@
 
 import csv
+import secrets
+from django import forms
 from django.contrib import admin, messages
+from django.contrib.admin.widgets import AdminFileWidget
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.urls import path
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.html import format_html
 from django.utils.timezone import localdate
 
+from . import dedup
+from .catalog_import import CATALOGS, CatalogFileError, import_catalog
+from .exports import csv_chunks
+from .item_stats import roll_up_daily_quiz_attempts
+from .admin_scale import ScaleAdminMixin
 from .models import (
     Syllabus, MockTest, Question, TestAttempt, UserAnswer,
     PreviousPaper, Result, Keyword, DailyQuiz,
-    InterviewQuestion, Formula, DailyQuizAttempt
+    InterviewQuestion, Formula, DailyQuizAttempt, ChunkedUpload
 )
+from .uploads import store_uploaded_file, target_field
 
 User = get_user_model()
 
 
+class ChunkedUploadRef(str):
+    """The id of a ChunkedUpload posted in place of a file."""
+
+
+class ChunkedFileInput(AdminFileWidget):
+    """
+    The admin file input, plus static/core/chunked_upload.js sending the picked file to
+    /api/uploads/ in resumable chunks. The finished upload's id is posted in the hidden
+    `<name>_upload` input instead of the file; without JavaScript the file is posted as usual.
+    """
+
+    class Media:
+        js = ['core/chunked_upload.js']
+
+    def __init__(self, target, attrs=None):
+        super().__init__(attrs)
+        self.target = target
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return format_html(
+            '<span class="chunked-upload" data-target="{}" data-url="{}">{}'
+            '<input type="hidden" name="{}_upload" value=""> <span class="chunked-upload-status"></span></span>',
+            self.target, reverse('chunked-uploads'), super().render(name, value, attrs, renderer), name,
+        )
+
+    def value_from_datadict(self, data, files, name):
+        upload_id = data.get(f'{name}_upload')
+        if upload_id:
+            return ChunkedUploadRef(upload_id)
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return not data.get(f'{name}_upload') and super().value_omitted_from_data(data, files, name)
+
+
+class ChunkedFileField(forms.FileField):
+    """
+    Resolves a finished chunked upload, or a file posted the ordinary way, to its
+    content-addressed storage name (core/uploads.py).
+    """
+
+    def __init__(self, *, target, **kwargs):
+        kwargs['widget'] = ChunkedFileInput(target)
+        super().__init__(**kwargs)
+        self.target = target
+
+    def clean(self, data, initial=None):
+        if isinstance(data, ChunkedUploadRef):
+            try:
+                upload = ChunkedUpload.objects.get(pk=data, target=self.target, status='complete')
+            except (ChunkedUpload.DoesNotExist, ValidationError):
+                raise ValidationError("The upload was not found or has not finished, please upload the file again.")
+            return upload.name
+        value = super().clean(data, initial)
+        if isinstance(value, UploadedFile):
+            return store_uploaded_file(target_field(self.target), value)
+        return value
+
+
+class ChunkedUploadAdminMixin:
+    """
+    Uploads the file fields named in `chunked_upload_fields` ({field name: upload
+    target}) in resumable chunks.
+    """
+    chunked_upload_fields = {}
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        target = self.chunked_upload_fields.get(db_field.name)
+        if target is None:
+            return super().formfield_for_dbfield(db_field, request, **kwargs)
+        return db_field.formfield(form_class=ChunkedFileField, target=target)
+
+
+class CatalogImportMixin:
+    """
+    An Import page on the changelist that upserts a CSV or JSON Lines file through
+    core.catalog_import, and an action exporting the selected rows in the same columns,
+    so a sheet can be exported, edited and loaded back.
+    """
+    catalog = None  # Name in core.catalog_import.CATALOGS
+    change_list_template = 'admin/catalog_change_list.html'
+    actions = ['export_catalog']
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='%s_%s_import' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        catalog = CATALOGS[self.catalog]
+        if request.method == "POST":
+            upload = request.FILES.get('catalog_file')
+            if not upload:
+                self.message_user(request, "No file uploaded.", level=messages.ERROR)
+                return redirect(request.path)
+            file_format = 'jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+            dry_run = bool(request.POST.get('dry_run'))
+            try:
+                result = import_catalog(catalog, upload, file_format, dry_run=dry_run)
+            except CatalogFileError as e:
+                self.message_user(request, str(e), level=messages.ERROR)
+                return redirect(request.path)
+
+            prefix = "Dry run, nothing saved: " if dry_run else ""
+            self.message_user(request, f"{prefix}{result.summary()}.")
+            if result.errors:
+                shown = '; '.join(f"line {line}: {message}" for line, message in result.errors[:10])
+                more = f" (and {result.skipped - 10} more)" if result.skipped > 10 else ""
+                self.message_user(request, f"Skipped rows: {shown}{more}", level=messages.WARNING)
+            if dry_run:
+                return redirect(request.path)
+            return redirect(reverse('admin:%s_%s_changelist' % (self.model._meta.app_label, self.model._meta.model_name)))
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=f"Import {self.model._meta.verbose_name_plural}",
+            opts=self.model._meta,
+            catalog=catalog,
+        )
+        return render(request, "admin/catalog_import.html", context)
+
+    @admin.action(description="Export selected for editing and re-import (CSV)")
+    def export_catalog(self, request, queryset):
+        catalog = CATALOGS[self.catalog]
+        response = StreamingHttpResponse(
+            csv_chunks(catalog.columns, catalog.export_rows(queryset)), content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{catalog.name}.csv"'
+        return response
+
+
 @admin.register(PreviousPaper)
-class PreviousPaperAdmin(admin.ModelAdmin):
+class PreviousPaperAdmin(ChunkedUploadAdminMixin, admin.ModelAdmin):
+    chunked_upload_fields = {'file': 'paper'}
     list_display = ('title', 'year', 'exam_type')
     list_filter = ('year', 'exam_type')
 
 
 @admin.register(Keyword)
-class KeywordAdmin(admin.ModelAdmin):
+class KeywordAdmin(CatalogImportMixin, admin.ModelAdmin):
+    catalog = 'keywords'
     list_display = ('subject', 'title', 'word', 'short_meaning')
     list_filter = ('subject', 'title')
     search_fields = ('word', 'title')
@@ -33,7 +187,8 @@ class KeywordAdmin(admin.ModelAdmin):
 
 
 @admin.register(InterviewQuestion)
-class InterviewQuestionAdmin(admin.ModelAdmin):
+class InterviewQuestionAdmin(CatalogImportMixin, admin.ModelAdmin):
+    catalog = 'interview-questions'
     list_display = ('department', 'short_question', 'short_answer')
     list_filter = ('department',)
     search_fields = ('question', 'answer')
@@ -47,13 +202,153 @@ class InterviewQuestionAdmin(admin.ModelAdmin):
     short_answer.short_description = "Answer"
 
 
-class QuestionInline(admin.TabularInline):
+class ItemStatisticsMixin:
+    """
+    Read-only item analysis columns for models with a `stats` ItemStatistics relation.
+    """
+
+    def _stats(self, obj):
+        try:
+            return obj.stats
+        except ObjectDoesNotExist:
+            return None
+
+    def item_attempts(self, obj):
+        stats = self._stats(obj)
+        return stats.attempts if stats else 0
+    item_attempts.short_description = 'Attempts'
+
+    def item_difficulty(self, obj):
+        stats = self._stats(obj)
+        value = stats.difficulty if stats else None
+        return f"{value:.0%} correct" if value is not None else '-'
+    item_difficulty.short_description = 'Difficulty'
+
+    def item_discrimination(self, obj):
+        stats = self._stats(obj)
+        value = stats.discrimination if stats else None
+        return f"{value:.2f}" if value is not None else '-'
+    item_discrimination.short_description = 'Discrimination'
+
+    def item_options(self, obj):
+        stats = self._stats(obj)
+        if not stats:
+            return '-'
+        return ' / '.join(f"{option}: {count}" for option, count in stats.option_distribution.items())
+    item_options.short_description = 'Answers'
+
+
+class QuestionInline(ItemStatisticsMixin, admin.TabularInline):
     model = Question
     extra = 1
+    readonly_fields = ('item_attempts', 'item_difficulty', 'item_discrimination', 'item_options')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('stats')
+
+
+def read_question_csv(csv_file):
+    """
+    Validated rows of an uploaded question CSV (question, option1-4 and answer columns),
+    plus an error for each row that was left out.
+    """
+    decoded_file = csv_file.read().decode('utf-8').splitlines()
+    reader = csv.DictReader(decoded_file)
+    rows = []
+    errors = []
+
+    for i, row in enumerate(reader, start=1):
+        question_text = row.get("question")
+        option_a = row.get("option1")
+        option_b = row.get("option2")
+        option_c = row.get("option3")
+        option_d = row.get("option4")
+        answer = row.get("answer")
+
+        if answer:
+            answer = answer.strip().upper()
+
+        if not all([question_text, option_a, option_b, option_c, option_d, answer]):
+            errors.append(f"Row {i}: Missing fields.")
+            continue
+
+        option_map = {'A': option_a, 'B': option_b, 'C': option_c, 'D': option_d}
+        if answer not in option_map:
+            errors.append(f"Row {i}: Answer must be one of A, B, C, D.")
+            continue
+
+        rows.append({
+            'row': i,
+            'question': question_text,
+            'option_a': option_a,
+            'option_b': option_b,
+            'option_c': option_c,
+            'option_d': option_d,
+            'correct_option': answer,
+        })
+    return rows, errors
+
+
+class DuplicateReportMixin:
+    """
+    Checks uploaded questions against the question bank (core.dedup) before anything is
+    created. If some look like near-duplicates the admin gets a report and decides what
+    to import, while the parsed upload waits in the session.
+    """
+    PENDING_IMPORT_KEY = 'pending_question_import'
+
+    def check_duplicates(self, request, rows, errors, exclude=(), **extra):
+        """
+        A report response if `rows` contains likely duplicates, otherwise None.
+        """
+        matches = dedup.find_duplicates(
+            [(row['question'], (row['option_a'], row['option_b'], row['option_c'], row['option_d'])) for row in rows],
+            exclude=exclude,
+        )
+        if not any(matches):
+            return None
+
+        limit = settings.QUESTION_DEDUP['MAX_MATCHES']
+        report = []
+        for row, row_matches in zip(rows, matches):
+            row['duplicate'] = bool(row_matches)
+            if row_matches:
+                report.append({'row': row, 'matches': row_matches[:limit]})
+        dedup.describe_matches([match for entry in report for match in entry['matches']], rows)
+        for entry in report:
+            for match in entry['matches']:
+                match['percent'] = round(match['similarity'] * 100)
+
+        token = secrets.token_urlsafe(16)
+        request.session[self.PENDING_IMPORT_KEY] = {'token': token, 'rows': rows, 'errors': errors, **extra}
+        context = dict(
+            self.admin_site.each_context(request),
+            title="Possible duplicate questions",
+            opts=self.model._meta,
+            report=report,
+            total=len(rows),
+            token=token,
+            cancel_url=request.path,
+        )
+        return render(request, "admin/duplicate_report.html", context)
+
+    def pending_import(self, request):
+        """
+        The upload held back by check_duplicates, without its duplicate rows unless the
+        admin chose to import everything. None if it is no longer in the session.
+        """
+        upload = request.session.pop(self.PENDING_IMPORT_KEY, None)
+        if upload is None or upload['token'] != request.POST.get('import_token'):
+            return None
+        if request.POST.get('decision') != 'all':
+            kept = [row for row in upload['rows'] if not row.get('duplicate')]
+            upload['skipped'] = len(upload['rows']) - len(kept)
+            upload['rows'] = kept
+        return upload
 
 
 @admin.register(MockTest)
-class MockTestAdmin(admin.ModelAdmin):
+class MockTestAdmin(DuplicateReportMixin, admin.ModelAdmin):
     list_display = ('subject', 'date')
     inlines = [QuestionInline]
     search_fields = ('subject',)
@@ -69,53 +364,44 @@ class MockTestAdmin(admin.ModelAdmin):
     def upload_csv(self, request, mocktest_id):
         mock_test = MockTest.objects.get(pk=mocktest_id)
         if request.method == "POST":
-            csv_file = request.FILES.get('csv_file')
-            if not csv_file:
-                self.message_user(request, "No file uploaded.", level=messages.ERROR)
-                return redirect(request.path)
-
-            if not csv_file.name.endswith('.csv'):
-                self.message_user(request, "Uploaded file is not CSV.", level=messages.ERROR)
-                return redirect(request.path)
-
-            decoded_file = csv_file.read().decode('utf-8').splitlines()
-            reader = csv.DictReader(decoded_file)
-            success_count = 0
-            errors = []
-
-            for i, row in enumerate(reader, start=1):
-                question_text = row.get("question")
-                option_a = row.get("option1")
-                option_b = row.get("option2")
-                option_c = row.get("option3")
-                option_d = row.get("option4")
-                answer = row.get("answer")
-
-                if answer:
-                    answer = answer.strip().upper()
-
-                if not all([question_text, option_a, option_b, option_c, option_d, answer]):
-                    errors.append(f"Row {i}: Missing fields.")
-                    continue
-
-                option_map = {'A': option_a, 'B': option_b, 'C': option_c, 'D': option_d}
-                if answer not in option_map:
-                    errors.append(f"Row {i}: Answer must be one of A, B, C, D.")
-                    continue
-
+            if 'import_token' in request.POST:
+                upload = self.pending_import(request)
+                if upload is None:
+                    self.message_user(request, "This upload has expired, please upload the file again.", level=messages.ERROR)
+                    return redirect(request.path)
+                rows, errors = upload['rows'], upload['errors']
+            else:
+                csv_file = request.FILES.get('csv_file')
+                if not csv_file:
+                    self.message_user(request, "No file uploaded.", level=messages.ERROR)
+                    return redirect(request.path)
+
+                if not csv_file.name.endswith('.csv'):
+                    self.message_user(request, "Uploaded file is not CSV.", level=messages.ERROR)
+                    return redirect(request.path)
+
+                rows, errors = read_question_csv(csv_file)
+                report = self.check_duplicates(request, rows, errors)
+                if report:
+                    return report
+                upload = {}
+
+            for row in rows:
                 Question.objects.create(
                     mock_test=mock_test,
-                    question_text=question_text,
-                    option_a=option_a,
-                    option_b=option_b,
-                    option_c=option_c,
-                    option_d=option_d,
-                    correct_option=answer,
+                    question_text=row['question'],
+                    option_a=row['option_a'],
+                    option_b=row['option_b'],
+                    option_c=row['option_c'],
+                    option_d=row['option_d'],
+                    correct_option=row['correct_option'],
                 )
-                success_count += 1
+            success_count = len(rows)
 
             if success_count:
                 self.message_user(request, f"{success_count} questions uploaded successfully.")
+            if upload.get('skipped'):
+                self.message_user(request, f"{upload['skipped']} likely duplicate questions were skipped.", level=messages.WARNING)
             if errors:
                 self.message_user(request, f"Errors: {'; '.join(errors)}", level=messages.ERROR)
 
@@ -131,18 +417,54 @@ class MockTestAdmin(admin.ModelAdmin):
 class UserAnswerInline(admin.TabularInline):
     model = UserAnswer
     extra = 0
+    fields = ('question', 'selected_option')
     readonly_fields = ('question', 'selected_option')
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('question')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(TestAttempt)
-class TestAttemptAdmin(admin.ModelAdmin):
+class TestAttemptAdmin(ScaleAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'mock_test', 'score', 'taken_on')
     list_filter = ('taken_on', 'mock_test')
+    list_select_related = ('user', 'mock_test')
     search_fields = ('user__username', 'mock_test__subject')
-    readonly_fields = ('user', 'mock_test', 'score', 'taken_on')
+    readonly_fields = ('user', 'mock_test', 'score', 'taken_on', 'answers_link')
     inlines = [UserAnswerInline]
 
+    def get_inlines(self, request, obj):
+        # Very long attempts link to their answers rather than rendering every row inline
+        if obj is None or obj.answers.count() > settings.ADMIN_SCALE['INLINE_ROWS_LIMIT']:
+            return []
+        return self.inlines
+
+    def answers_link(self, obj):
+        url = reverse('admin:core_useranswer_changelist') + f'?attempt__id__exact={obj.pk}'
+        return format_html('<a href="{}">View answers</a>', url)
+    answers_link.short_description = 'Answers'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UserAnswer)
+class UserAnswerAdmin(ScaleAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'attempt_id', 'question_id', 'selected_option')
+    list_filter = ('selected_option',)
+    raw_id_fields = ('attempt', 'question')
+    readonly_fields = ('attempt', 'question', 'selected_option')
+
     def has_add_permission(self, request):
         return False
 
@@ -151,13 +473,14 @@ class TestAttemptAdmin(admin.ModelAdmin):
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScaleAdminMixin, admin.ModelAdmin):
     pass
 
 
 @admin.register(Syllabus)
-class SyllabusAdmin(admin.ModelAdmin):
-    pass
+class SyllabusAdmin(CatalogImportMixin, ChunkedUploadAdminMixin, admin.ModelAdmin):
+    catalog = 'syllabus'
+    chunked_upload_fields = {'pdf': 'syllabus'}
 
 
 @admin.register(Result)
@@ -166,13 +489,26 @@ class ResultAdmin(admin.ModelAdmin):
 
 
 @admin.register(DailyQuiz)
-class DailyQuizAdmin(admin.ModelAdmin):
-    list_display = ('short_question', 'quiz_date', 'correct_option', 'is_today')
+class DailyQuizAdmin(DuplicateReportMixin, ItemStatisticsMixin, admin.ModelAdmin):
+    list_display = (
+        'short_question', 'quiz_date', 'correct_option', 'is_today',
+        'item_attempts', 'item_difficulty', 'item_discrimination',
+    )
+    list_select_related = ('stats',)
+    readonly_fields = ('item_attempts', 'item_difficulty', 'item_discrimination', 'item_options')
     list_filter = ('quiz_date',)
     search_fields = ('question',)
     ordering = ('-quiz_date',)
     date_hierarchy = 'quiz_date'
 
+    def changelist_view(self, request, extra_context=None):
+        roll_up_daily_quiz_attempts()  # Attempts submitted since the last roll-up
+        return super().changelist_view(request, extra_context)
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        roll_up_daily_quiz_attempts()
+        return super().change_view(request, object_id, form_url, extra_context)
+
     def short_question(self, obj):
         return (obj.question[:50] + '...') if len(obj.question) > 50 else obj.question
     short_question.short_description = 'Question'
@@ -191,62 +527,57 @@ class DailyQuizAdmin(admin.ModelAdmin):
 
     def upload_daily_quiz(self, request):
         if request.method == "POST":
-            csv_file = request.FILES.get('csv_file')
-            quiz_date = request.POST.get('quiz_date')
-
-            if not csv_file:
-                self.message_user(request, "No file uploaded.", level=messages.ERROR)
-                return redirect(request.path)
-
-            if not quiz_date:
-                self.message_user(request, "Please select a quiz date.", level=messages.ERROR)
-                return redirect(request.path)
-
-            if not csv_file.name.endswith('.csv'):
-                self.message_user(request, "Uploaded file is not CSV.", level=messages.ERROR)
-                return redirect(request.path)
+            if 'import_token' in request.POST:
+                upload = self.pending_import(request)
+                if upload is None:
+                    self.message_user(request, "This upload has expired, please upload the file again.", level=messages.ERROR)
+                    return redirect(request.path)
+                rows, errors, quiz_date = upload['rows'], upload['errors'], upload['quiz_date']
+            else:
+                csv_file = request.FILES.get('csv_file')
+                quiz_date = request.POST.get('quiz_date')
+
+                if not csv_file:
+                    self.message_user(request, "No file uploaded.", level=messages.ERROR)
+                    return redirect(request.path)
+
+                if not quiz_date:
+                    self.message_user(request, "Please select a quiz date.", level=messages.ERROR)
+                    return redirect(request.path)
+
+                if not csv_file.name.endswith('.csv'):
+                    self.message_user(request, "Uploaded file is not CSV.", level=messages.ERROR)
+                    return redirect(request.path)
+
+                rows, errors = read_question_csv(csv_file)
+                # The date's current questions are replaced, so they don't count as duplicates
+                replaced = DailyQuiz.objects.filter(quiz_date=quiz_date).values_list('pk', flat=True)
+                report = self.check_duplicates(
+                    request, rows, errors, exclude={('daily_quiz', pk) for pk in replaced}, quiz_date=quiz_date,
+                )
+                if report:
+                    return report
+                upload = {}
 
             # Clear existing questions for this date
             DailyQuiz.objects.filter(quiz_date=quiz_date).delete()
 
-            decoded_file = csv_file.read().decode('utf-8').splitlines()
-            reader = csv.DictReader(decoded_file)
-            success_count = 0
-            errors = []
-
-            for i, row in enumerate(reader, start=1):
-                question_text = row.get("question")
-                option_a = row.get("option1")
-                option_b = row.get("option2")
-                option_c = row.get("option3")
-                option_d = row.get("option4")
-                answer = row.get("answer")
-
-                if answer:
-                    answer = answer.strip().upper()
-
-                if not all([question_text, option_a, option_b, option_c, option_d, answer]):
-                    errors.append(f"Row {i}: Missing fields.")
-                    continue
-
-                option_map = {'A': option_a, 'B': option_b, 'C': option_c, 'D': option_d}
-                if answer not in option_map:
-                    errors.append(f"Row {i}: Answer must be one of A, B, C, D.")
-                    continue
-
+            for row in rows:
                 DailyQuiz.objects.create(
-                    question=question_text,
-                    option_a=option_a,
-                    option_b=option_b,
-                    option_c=option_c,
-                    option_d=option_d,
-                    correct_option=answer,
+                    question=row['question'],
+                    option_a=row['option_a'],
+                    option_b=row['option_b'],
+                    option_c=row['option_c'],
+                    option_d=row['option_d'],
+                    correct_option=row['correct_option'],
                     quiz_date=quiz_date,
                 )
-                success_count += 1
+            success_count = len(rows)
 
             if success_count:
                 self.message_user(request, f"{success_count} daily quiz questions uploaded for {quiz_date}.")
+            if upload.get('skipped'):
+                self.message_user(request, f"{upload['skipped']} likely duplicate questions were skipped.", level=messages.WARNING)
             if errors:
                 self.message_user(request, f"Errors: {'; '.join(errors)}", level=messages.ERROR)
 
@@ -260,7 +591,8 @@ class DailyQuizAdmin(admin.ModelAdmin):
 
 
 @admin.register(Formula)
-class FormulaAdmin(admin.ModelAdmin):
+class FormulaAdmin(CatalogImportMixin, admin.ModelAdmin):
+    catalog = 'formulas'
     list_display = ('subject', 'heading', 'short_formula')
     search_fields = ('subject', 'heading', 'formula')
     list_filter = ('subject',)
@@ -271,13 +603,22 @@ class FormulaAdmin(admin.ModelAdmin):
 
 
 @admin.register(DailyQuizAttempt)
-class DailyQuizAttemptAdmin(admin.ModelAdmin):
+class DailyQuizAttemptAdmin(ScaleAdminMixin, admin.ModelAdmin):
     ordering = ['quiz_date']
     readonly_fields = ['score', 'percent', 'quiz_date', 'total_questions']
     list_display = ['user', 'score', 'percent', 'quiz_date', 'total_questions']
     list_filter = ['quiz_date']
+    list_select_related = ('user',)
     search_fields = ('user__username',)
 
+    def get_queryset(self, request):
+        # One correlated count in the page query instead of a COUNT per row
+        quiz_count = DailyQuiz.objects.filter(quiz_date=OuterRef('quiz_date')).order_by().values(
+            'quiz_date').annotate(count=Count('id')).values('count')
+        return super().get_queryset(request).annotate(
+            total_question_count=Coalesce(Subquery(quiz_count, output_field=IntegerField()), 0)
+        )
+
     def total_questions(self, obj):
-        return DailyQuiz.objects.filter(quiz_date=obj.quiz_date).count()
+        return obj.total_question_count
     total_questions.short_description = 'Total Questions'
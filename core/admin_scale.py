@@ -0,0 +1,185 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# "Scale mode" for changelists over very large tables: no exact COUNT(*) over the whole
+# table, no OFFSET paging, and the page itself fetched through the primary key index.
+
+CURSOR_VAR = 'cursor'
+
+
+def estimated_row_count(model):
+    """
+    The planner's row estimate for `model`'s table, or None where the backend has none.
+    """
+    connection = connections[model.objects.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts exactly up to ADMIN_SCALE['EXACT_COUNT_LIMIT'] rows. Past that an unfiltered
+    table reports the planner's estimate and a filtered one reports the limit; either
+    way `is_estimate` is set so the changelist can show the number as approximate.
+    """
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_SCALE['EXACT_COUNT_LIMIT']
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > limit:
+                self.is_estimate = True
+                return estimate
+        count = queryset.order_by().values('pk')[:limit + 1].count()
+        if count > limit:
+            self.is_estimate = True
+            return limit
+        return count
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds, which would repeat rows across pages
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, cls=_CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Pages with ?cursor= (the sort key of the last row shown) instead of ?p=N, so every page
+    costs an index range scan however deep it is. Used whenever the ordering is made of
+    plain local columns; sorting by anything else falls back to regular page numbers.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        if self.cursor is not None:
+            # The cursor must not reach the admin's filter lookups
+            request.GET = request.GET.copy()
+            del request.GET[CURSOR_VAR]
+        self.keyset = False
+        self.next_page_url = None
+        self.first_page_url = None
+        self.count_is_estimate = False
+        super().__init__(request, *args, **kwargs)
+
+    def keyset_fields(self):
+        """
+        [(field, descending)] for the current ordering, or None if it can't be keyset-paged.
+        """
+        fields = []
+        seen = set()
+        for item in self.queryset.query.order_by:
+            if not isinstance(item, str):
+                return None
+            name = item.lstrip('-')
+            try:
+                field = self.opts.pk if name == 'pk' else self.opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or (field.is_relation and not field.primary_key):
+                return None
+            if field in seen:
+                continue  # A repeated column adds nothing to the sort order
+            seen.add(field)
+            fields.append((field, item.startswith('-')))
+        if not fields or not fields[-1][0].primary_key:
+            return None
+        return fields
+
+    def get_results(self, request):
+        fields = self.keyset_fields()
+        if fields is None or self.show_all:
+            super().get_results(request)
+            self.count_is_estimate = getattr(self.paginator, 'is_estimate', False)
+            return
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                values = [field.to_python(value) for (field, _), value in zip(fields, _decode_cursor(self.cursor))]
+            except (ValueError, TypeError, ValidationError):
+                raise IncorrectLookupParameters
+            queryset = queryset.filter(self.after(fields, values))
+
+        # Page through the primary key first, then load just those rows with their relations
+        names = [field.attname for field, _ in fields]
+        keys = list(queryset.values_list(*names)[:self.list_per_page + 1])
+        has_next = len(keys) > self.list_per_page
+        keys = keys[:self.list_per_page]
+
+        self.keyset = True
+        self.result_list = self.queryset.filter(pk__in=[key[-1] for key in keys])
+        self.paginator = paginator
+        self.result_count = paginator.count
+        self.count_is_estimate = getattr(paginator, 'is_estimate', False)
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = has_next or bool(self.cursor)
+        if has_next:
+            self.next_page_url = self.get_query_string({CURSOR_VAR: _encode_cursor(list(keys[-1]))})
+        if self.cursor:
+            self.first_page_url = self.get_query_string()
+
+    @staticmethod
+    def after(fields, values):
+        """
+        Rows that sort after `values`: (a > x) OR (a = x AND b > y) OR ..., per field direction.
+        """
+        condition = Q()
+        for i, (field, descending) in enumerate(fields):
+            term = Q(**{f"{field.attname}__{'lt' if descending else 'gt'}": values[i]})
+            for j in range(i):
+                term &= Q(**{fields[j][0].attname: values[j]})
+            condition |= term
+        return condition
+
+
+class ScaleAdminMixin:
+    """
+    ModelAdmin mixin for tables with millions of rows.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from .compression import ENCODING_SUFFIXES, negotiate_encoding, write_precompressed
+
+
+MANIFEST_NAME = 'manifest.json'
+
+# Only attribute-less blocks are extracted; <script src>/<script type=...> stay untouched
+STYLE_RE = re.compile(r'<style>(.*?)</style>', re.S)
+SCRIPT_RE = re.compile(r'<script>(.*?)</script>', re.S)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def bundle_dir():
+    return settings.ASSET_PIPELINE['DIR']
+
+
+def block_key(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def is_extractable(content):
+    # Blocks containing template syntax must keep being rendered per request
+    return content.strip() and '{%' not in content and '{{' not in content
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    # Spaces before ':' are significant in selectors (`a :hover`), so only trim after it
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def _js_lines(js):
+    """
+    Yields (line, starts_in_literal, ends_in_literal) for each line of `js`, tracking
+    template literals (with nested ${...} expressions), strings and comments.
+    """
+    stack = []  # Open template literals: None in their text, else the brace depth in ${...}
+    comment = False
+    for line in js.splitlines():
+        starts = bool(stack) and stack[-1] is None
+        quote = None
+        i = 0
+        while i < len(line):
+            c = line[i]
+            if comment:
+                if line.startswith('*/', i):
+                    comment = False
+                    i += 1
+            elif stack and stack[-1] is None:
+                if c == '\\':
+                    i += 1
+                elif c == '`':
+                    stack.pop()
+                elif line.startswith('${', i):
+                    stack[-1] = 0
+                    i += 1
+            elif quote:
+                if c == '\\':
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c in '\'"':
+                quote = c
+            elif c == '`':
+                stack.append(None)
+            elif line.startswith('//', i):
+                break
+            elif line.startswith('/*', i):
+                comment = True
+                i += 1
+            elif stack and c == '{':
+                stack[-1] += 1
+            elif stack and c == '}':
+                stack[-1] = None if stack[-1] == 0 else stack[-1] - 1
+            i += 1
+        yield line, starts, bool(stack) and stack[-1] is None
+
+
+def minify_js(js):
+    # Line-preserving so automatic semicolon insertion behaves exactly as before. Lines
+    # inside template literals are part of a string and are kept byte for byte.
+    lines = []
+    for line, starts_in_literal, ends_in_literal in _js_lines(js):
+        if starts_in_literal:
+            lines.append(line if ends_in_literal else line.rstrip())
+            continue
+        line = line.lstrip() if ends_in_literal else line.strip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def extract_blocks(template_path):
+    source = template_path.read_text(encoding='utf-8')
+    blocks = [('css', content) for content in STYLE_RE.findall(source)]
+    blocks += [('js', content) for content in SCRIPT_RE.findall(source)]
+    return [(kind, content) for kind, content in blocks if is_extractable(content)]
+
+
+def build_assets(template_dirs=None):
+    """
+    Extracts inline <style>/<script> blocks from the project templates into minified,
+    content-hashed bundles with precompressed variants. Blocks shared by several pages
+    map to a single bundle. Returns the manifest.
+    """
+    directory = bundle_dir()
+    manifest = {'blocks': {}, 'files': []}
+    written = {}
+
+    for template_dir in template_dirs or settings.TEMPLATES[0]['DIRS']:
+        for template_path in sorted(template_dir.glob('*.html')):
+            for kind, content in extract_blocks(template_path):
+                minified = minify_css(content) if kind == 'css' else minify_js(content)
+                data = minified.encode('utf-8')
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                if digest not in written:
+                    filename = f"{kind}/{template_path.stem}.{digest}.{kind}"
+                    write_precompressed(directory / filename, data)
+                    written[digest] = filename
+                    manifest['files'].append(filename)
+                manifest['blocks'][block_key(content)] = written[digest]
+
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def empty_manifest():
+    return {'blocks': {}, 'files': []}
+
+
+_manifest_cache = {'mtime': None, 'data': empty_manifest(), 'files': frozenset()}
+
+
+def load_manifest():
+    manifest_path = bundle_dir() / MANIFEST_NAME
+    try:
+        mtime = manifest_path.stat().st_mtime
+        if _manifest_cache['mtime'] != mtime:
+            data = json.loads(manifest_path.read_text())
+            _manifest_cache.update(mtime=mtime, data=data, files=frozenset(data['files']))
+    except (OSError, ValueError):
+        _manifest_cache.update(mtime=None, data=empty_manifest(), files=frozenset())
+    return _manifest_cache['data']
+
+
+def bundle_files():
+    load_manifest()
+    return _manifest_cache['files']
+
+
+def link_assets(source, manifest):
+    """
+    Replaces every inline block that has a built bundle with a reference to it.
+    """
+    blocks = manifest['blocks']
+    url = settings.ASSET_PIPELINE['URL']
+
+    def replace_style(match):
+        filename = blocks.get(block_key(match.group(1)))
+        if filename is None:
+            return match.group(0)
+        return f'<link rel="stylesheet" href="{url}{filename}" />'
+
+    def replace_script(match):
+        filename = blocks.get(block_key(match.group(1)))
+        if filename is None:
+            return match.group(0)
+        return f'<script src="{url}{filename}"></script>'
+
+    source = STYLE_RE.sub(replace_style, source)
+    return SCRIPT_RE.sub(replace_script, source)
+
+
+class InlineAssetLoader(FilesystemLoader):
+    """
+    Filesystem loader that swaps inline CSS/JS for their bundles once `build_assets` has run.
+    Wrapped in the cached loader, so the rewrite happens once per template per process.
+    """
+
+    def get_contents(self, origin):
+        source = super().get_contents(origin)
+        manifest = load_manifest()
+        if not manifest['blocks']:
+            return source
+        return link_assets(source, manifest)
+
+
+def serve_bundle(request, path):
+    """
+    Serves a built bundle with far-future immutable caching and a precompressed body.
+    """
+    if path not in bundle_files():
+        raise Http404("Unknown asset")
+
+    encoding = negotiate_encoding(request)
+    filename = path + ENCODING_SUFFIXES[encoding] if encoding else path
+    try:
+        with open(safe_join(bundle_dir(), filename), 'rb') as fh:
+            content = fh.read()
+    except OSError:
+        raise Http404("Asset not built")
+
+    content_type, _ = mimetypes.guess_type(path)
+    response = HttpResponse(content, content_type=f"{content_type}; charset=utf-8")
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
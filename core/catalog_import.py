@@ -0,0 +1,213 @@
+import codecs
+import csv
+import hashlib
+import json
+
+from django.db import transaction
+
+from .exports import keyset_rows
+from .formulas import bump_all_versions
+from .models import Formula, InterviewQuestion, Keyword, Syllabus
+
+
+# Bulk loading of the catalogs kept in spreadsheets. Rows are matched to existing ones on
+# a natural key instead of ids, so a team can export, edit and re-import the same sheet.
+# The existing table is read once into {key digest: (pk, row digest)}; input rows are
+# then streamed in batches and only new or changed rows are written, with bulk_create
+# and bulk_update. Keys match case-insensitively and ignore extra whitespace; the row
+# digest covers the exact text, so a change of case alone still counts as an update.
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 100  # Row errors kept for the report; later ones are only counted
+
+FORMATS = ('csv', 'jsonl')
+
+
+class CatalogFileError(Exception):
+    """The file as a whole can't be read (bad header, encoding, JSON)."""
+
+
+class Catalog:
+    """
+    One importable model: its natural `key` fields and the other `fields` a row sets.
+    Columns are named after the model fields; choice fields take the stored value or
+    its label. `on_change` is called after an import that wrote rows has committed, as
+    bulk writes send no model signals.
+    """
+
+    def __init__(self, name, model, key, fields, on_change=None):
+        self.name = name
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.on_change = on_change
+        self.columns = key + fields
+        self.model_fields = {name: model._meta.get_field(name) for name in self.columns}
+        self.choices = {}
+        for name, field in self.model_fields.items():
+            if field.choices:
+                mapping = {}
+                for value, label in field.choices:
+                    mapping[str(value).casefold()] = value
+                    mapping[str(label).casefold()] = value
+                self.choices[name] = mapping
+
+    def clean(self, raw):
+        """
+        The row's values by column, or raises ValueError naming what is wrong.
+        """
+        values = {}
+        for name in self.columns:
+            field = self.model_fields[name]
+            value = raw.get(name)
+            value = '' if value is None else str(value).strip()
+            if not value:
+                if name in self.key or not field.blank:
+                    raise ValueError(f"{name} is required.")
+                values[name] = None if field.null else ''
+                continue
+            if name in self.choices:
+                if value.casefold() not in self.choices[name]:
+                    raise ValueError(f"{name} {value!r} is not one of the choices.")
+                value = self.choices[name][value.casefold()]
+            elif field.get_internal_type() == 'IntegerField':
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"{name} must be a whole number.")
+            if field.max_length and len(str(value)) > field.max_length:
+                raise ValueError(f"{name} is longer than {field.max_length} characters.")
+            values[name] = value
+        return values
+
+    def key_digest(self, values):
+        parts = (' '.join(str(values[name]).split()).casefold() for name in self.key)
+        return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).digest()
+
+    def row_digest(self, values):
+        parts = ('' if values[name] is None else str(values[name]).strip() for name in self.columns)
+        return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).digest()
+
+    def index(self):
+        """
+        {key digest: (pk, row digest)} of the rows already stored. Where the table has
+        several rows with one key, the oldest is the one kept up to date.
+        """
+        index = {}
+        queryset = self.model.objects.values_list('pk', 'pk', *self.columns)
+        for row in keyset_rows(queryset):
+            values = dict(zip(self.columns, row[1:]))
+            index.setdefault(self.key_digest(values), (row[0], self.row_digest(values)))
+        return index
+
+    def export_rows(self, queryset):
+        return keyset_rows(queryset.values_list('pk', *self.columns))
+
+
+CATALOGS = {
+    catalog.name: catalog for catalog in [
+        Catalog('keywords', Keyword, ('subject', 'word'), ('title', 'meaning')),
+        Catalog('interview-questions', InterviewQuestion, ('department', 'question'), ('answer',)),
+        Catalog('formulas', Formula, ('subject', 'heading'), ('formula',), on_change=bump_all_versions),
+        Catalog('syllabus', Syllabus, ('board', 'class_level', 'subject'), ('content',)),
+    ]
+}
+
+
+def read_rows(fileobj, file_format, required=()):
+    """
+    Yields (line number, {column: value}) from a binary file of CSV with a header row, or
+    of JSON Lines with one object per line. A CSV header must name the `required` columns.
+    """
+    text = codecs.getreader('utf-8-sig')(fileobj)
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(text)
+            missing = [name for name in required if name not in (reader.fieldnames or ())]
+            if missing:
+                raise CatalogFileError(f"The header has no {', '.join(missing)} column.")
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise CatalogFileError(f"Line {number} is not valid JSON.")
+            if not isinstance(row, dict):
+                raise CatalogFileError(f"Line {number} is not a JSON object.")
+            yield number, row
+    except UnicodeDecodeError:
+        raise CatalogFileError("The file is not UTF-8 text.")
+    except csv.Error as e:
+        raise CatalogFileError(f"The CSV can't be read: {e}.")
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.errors = []  # (line, message), at most MAX_ERRORS
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def summary(self):
+        return (f"{self.created} created, {self.updated} updated, {self.unchanged} unchanged, "
+                f"{self.skipped} skipped")
+
+
+def import_catalog(catalog, fileobj, file_format, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Upserts the rows of `fileobj` into `catalog` in one transaction, rolled back when
+    `dry_run` is set. Rows with errors are skipped and reported; a key repeated in the
+    file is an error after its first row. Returns an ImportResult.
+    """
+    result = ImportResult()
+    model = catalog.model
+    with transaction.atomic():
+        index = catalog.index()
+        seen = {}  # key digest: line of the row that set it
+        creates, updates = [], []
+
+        def flush():
+            model.objects.bulk_create(creates, batch_size=batch_size)
+            model.objects.bulk_update(updates, catalog.columns, batch_size=batch_size)
+            creates.clear()
+            updates.clear()
+
+        for line, raw in read_rows(fileobj, file_format, catalog.key):
+            try:
+                values = catalog.clean(raw)
+            except ValueError as e:
+                result.error(line, str(e))
+                continue
+            key = catalog.key_digest(values)
+            if key in seen:
+                result.error(line, f"Same {' + '.join(catalog.key)} as line {seen[key]}.")
+                continue
+            seen[key] = line
+
+            existing = index.get(key)
+            if existing is None:
+                creates.append(model(**values))
+                result.created += 1
+            elif existing[1] == catalog.row_digest(values):
+                result.unchanged += 1
+            else:
+                updates.append(model(pk=existing[0], **values))
+                result.updated += 1
+            if len(creates) + len(updates) >= batch_size:
+                flush()
+        flush()
+        if dry_run:
+            transaction.set_rollback(True)
+        elif catalog.on_change and (result.created or result.updated):
+            transaction.on_commit(catalog.on_change)
+    return result
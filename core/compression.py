@@ -0,0 +1,258 @@
+import gzip
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+# Levels for build-time (precompressed) output, where CPU cost is paid once
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# File suffix used for each precompressed variant on disk
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output byte-identical between builds
+        return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def process(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding, level):
+    """
+    Returns an incremental compressor exposing process(bytes) and finish().
+    """
+    if encoding == 'br':
+        return _BrotliStream(level)
+    if encoding == 'gzip':
+        return _GzipStream(level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_variants(data):
+    """
+    Returns a dict of {encoding: compressed bytes} for every encoding supported here.
+    """
+    return {encoding: compress(data, encoding) for encoding in available_encodings()}
+
+
+def write_precompressed(path, data):
+    """
+    Writes `data` to `path` plus a `.br`/`.gz` sibling for each available encoding.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    for encoding, compressed in compress_variants(data).items():
+        path.with_name(path.name + ENCODING_SUFFIXES[encoding]).write_bytes(compressed)
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def negotiate_encoding(request, available=None):
+    """
+    Picks the best content-coding from `available` (in preference order) that the client
+    accepts, or None when the identity encoding should be used.
+    """
+    if available is None:
+        available = available_encodings()
+    accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class CompressedBodyCache:
+    """
+    Per-process LRU of compressed bodies keyed by (content version, encoding),
+    bounded by the total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CompressionStats:
+    """
+    Per-process counters of compression work, grouped by (mode, encoding, level).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record(self, mode, encoding, level, bytes_in, bytes_out, cpu_seconds):
+        key = (mode, encoding, level)
+        with self._lock:
+            counter = self._counters.setdefault(key, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0,
+            })
+            counter['responses'] += 1
+            counter['bytes_in'] += bytes_in
+            counter['bytes_out'] += bytes_out
+            counter['cpu_seconds'] += cpu_seconds
+
+    def record_cache(self, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            rows = []
+            for (mode, encoding, level), counter in sorted(self._counters.items()):
+                bytes_in = counter['bytes_in']
+                rows.append({
+                    'mode': mode,
+                    'encoding': encoding,
+                    'level': level,
+                    **counter,
+                    'ratio': round(counter['bytes_out'] / bytes_in, 4) if bytes_in else None,
+                    'cpu_ms_per_mb': round(counter['cpu_seconds'] * 1000 / (bytes_in / 1e6), 3) if bytes_in else None,
+                })
+            return {
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'compressors': rows,
+            }
+
+
+stats = CompressionStats()
+
+
+def timed_compress(data, encoding, level, mode):
+    started = time.thread_time()
+    body = compress(data, encoding, level)
+    stats.record(mode, encoding, level, len(data), len(body), time.thread_time() - started)
+    return body
+
+
+def stream_compress(chunks, encoding, level):
+    """
+    Compresses an iterable of byte chunks incrementally, recording the CPU spent.
+    """
+    stream = compressor(encoding, level)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    for chunk in chunks:
+        started = time.thread_time()
+        out = stream.process(chunk)
+        cpu_seconds += time.thread_time() - started
+        bytes_in += len(chunk)
+        if out:
+            bytes_out += len(out)
+            yield out
+    started = time.thread_time()
+    tail = stream.finish()
+    cpu_seconds += time.thread_time() - started
+    bytes_out += len(tail)
+    stats.record('stream', encoding, level, bytes_in, bytes_out, cpu_seconds)
+    yield tail
+
+
+async def astream_compress(chunks, encoding, level):
+    """
+    Async counterpart of stream_compress for async streaming responses under ASGI.
+    """
+    stream = compressor(encoding, level)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    async for chunk in chunks:
+        started = time.thread_time()
+        out = stream.process(chunk)
+        cpu_seconds += time.thread_time() - started
+        bytes_in += len(chunk)
+        if out:
+            bytes_out += len(out)
+            yield out
+    started = time.thread_time()
+    tail = stream.finish()
+    cpu_seconds += time.thread_time() - started
+    bytes_out += len(tail)
+    stats.record('stream', encoding, level, bytes_in, bytes_out, cpu_seconds)
+    yield tail
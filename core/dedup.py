@@ -0,0 +1,209 @@
+import hashlib
+import re
+import struct
+import unicodedata
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from .models import DailyQuiz, NearDuplicateBucket, NearDuplicateSignature, Question
+
+
+# Near-duplicate detection for the question bank. Each item is reduced to a set of
+# shingles (character 5-grams of its normalized text plus its options as whole tokens),
+# summarized by a MinHash signature whose matching positions estimate the Jaccard
+# similarity of two sets. Signatures are split into LSH bands and every band is stored as
+# an indexed key, so looking up an import batch touches only the items sharing a band
+# with it instead of comparing against the whole bank.
+#
+# Changing any of these invalidates the stored index: run `build_duplicate_index` after.
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16   # 16 bands of 4 rows: pairs above ~0.5 similarity usually share a band
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutation(i):
+    digest = hashlib.sha256(f'minhash-{i}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % (_PRIME - 1) + 1, int.from_bytes(digest[8:16], 'big') % _PRIME
+
+
+PERMUTATIONS = [_permutation(i) for i in range(NUM_PERM)]
+
+# Indexed kinds: model and the field holding the question text
+KINDS = {
+    'question': (Question, 'question_text'),
+    'daily_quiz': (DailyQuiz, 'question'),
+}
+MODEL_KINDS = {model: kind for kind, (model, _) in KINDS.items()}
+
+QUERY_CHUNK = 500
+
+
+def _chunks(items, size=QUERY_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def shingles(question, options):
+    text = normalize(question)
+    if len(text) > SHINGLE_SIZE:
+        grams = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    else:
+        grams = {text} if text else set()
+    # Options are whole tokens, so reordering them changes nothing
+    grams.update('\x1f' + option for option in map(normalize, options) if option)
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+def signature(question, options):
+    """
+    The MinHash signature (NUM_PERM 32-bit values) of a question, or None if it has no text.
+    """
+    hashes = shingles(question, options)
+    if not hashes:
+        return None
+    return tuple(min((a * x + b) % _PRIME for x in hashes) & _MAX_HASH for a, b in PERMUTATIONS)
+
+
+def band_keys(sig):
+    keys = []
+    for band in range(BANDS):
+        packed = struct.pack(f'>H{ROWS}I', band, *sig[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'big', signed=True))
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def pack(sig):
+    return struct.pack(f'>{NUM_PERM}I', *sig)
+
+
+def unpack(data):
+    return struct.unpack(f'>{NUM_PERM}I', bytes(data))
+
+
+def item_text(kind, obj):
+    _, text_field = KINDS[kind]
+    return getattr(obj, text_field), (obj.option_a, obj.option_b, obj.option_c, obj.option_d)
+
+
+def remove_items(kind, item_ids):
+    NearDuplicateSignature.objects.filter(kind=kind, item_id__in=item_ids).delete()
+    NearDuplicateBucket.objects.filter(kind=kind, item_id__in=item_ids).delete()
+
+
+def index_items(kind, items):
+    """
+    Adds or refreshes the signatures and band keys of Question/DailyQuiz instances.
+    """
+    signatures = {obj.pk: signature(*item_text(kind, obj)) for obj in items}
+    with transaction.atomic():
+        remove_items(kind, list(signatures))
+        NearDuplicateSignature.objects.bulk_create([
+            NearDuplicateSignature(kind=kind, item_id=item_id, signature=pack(sig))
+            for item_id, sig in signatures.items() if sig
+        ])
+        NearDuplicateBucket.objects.bulk_create([
+            NearDuplicateBucket(kind=kind, item_id=item_id, key=key)
+            for item_id, sig in signatures.items() if sig
+            for key in band_keys(sig)
+        ], batch_size=2000)
+
+
+def find_duplicates(entries, exclude=(), threshold=None):
+    """
+    Checks `entries`, a list of (question, options) about to be imported, against the
+    indexed bank and against each other. Returns one list of matches per entry, most
+    similar first: {'kind', 'item_id', 'similarity'}, where kind 'row' means an earlier
+    entry of the same batch (item_id is its index). Bank items in `exclude`, a set of
+    (kind, item_id), are ignored.
+    """
+    threshold = settings.QUESTION_DEDUP['THRESHOLD'] if threshold is None else threshold
+    signatures = [signature(question, options) for question, options in entries]
+    keys = [band_keys(sig) if sig else [] for sig in signatures]
+
+    holders = defaultdict(set)
+    for chunk in _chunks({key for entry_keys in keys for key in entry_keys}):
+        for kind, item_id, key in NearDuplicateBucket.objects.filter(key__in=chunk).values_list(
+            'kind', 'item_id', 'key'
+        ):
+            if (kind, item_id) not in exclude:
+                holders[key].add((kind, item_id))
+
+    candidates = defaultdict(set)
+    for items in holders.values():
+        for kind, item_id in items:
+            candidates[kind].add(item_id)
+    stored = {}
+    for kind, item_ids in candidates.items():
+        for chunk in _chunks(item_ids):
+            for item_id, data in NearDuplicateSignature.objects.filter(
+                kind=kind, item_id__in=chunk
+            ).values_list('item_id', 'signature'):
+                stored[(kind, item_id)] = unpack(data)
+    for index, sig in enumerate(signatures):
+        if sig:
+            stored[('row', index)] = sig
+
+    results = []
+    batch_holders = defaultdict(set)
+    for index, (sig, entry_keys) in enumerate(zip(signatures, keys)):
+        matches = []
+        seen = {('row', index)}
+        for key in entry_keys:
+            for item in holders.get(key, set()) | batch_holders[key]:
+                if item in seen or item not in stored:
+                    continue
+                seen.add(item)
+                score = similarity(sig, stored[item])
+                if score >= threshold:
+                    matches.append({'kind': item[0], 'item_id': item[1], 'similarity': score})
+            batch_holders[key].add(('row', index))
+        matches.sort(key=lambda match: -match['similarity'])
+        results.append(matches)
+    return results
+
+
+def describe_matches(matches, rows=None):
+    """
+    Adds 'text', 'where' and (for bank items) an admin 'url' to matches from
+    find_duplicates, in place. `rows` are the batch's rows, for matches of kind 'row'.
+    """
+    ids = defaultdict(set)
+    for match in matches:
+        ids[match['kind']].add(match['item_id'])
+    questions = Question.objects.select_related('mock_test').in_bulk(ids['question'])
+    quizzes = DailyQuiz.objects.in_bulk(ids['daily_quiz'])
+
+    for match in matches:
+        if match['kind'] == 'row':
+            row = rows[match['item_id']]
+            match['text'], match['where'] = row['question'], f"Row {row['row']} of this file"
+        elif match['kind'] == 'question' and match['item_id'] in questions:
+            question = questions[match['item_id']]
+            match['text'], match['where'] = question.question_text, f"Mock test: {question.mock_test}"
+            match['url'] = reverse('admin:core_mocktest_change', args=[question.mock_test_id])
+        elif match['kind'] == 'daily_quiz' and match['item_id'] in quizzes:
+            quiz = quizzes[match['item_id']]
+            match['text'], match['where'] = quiz.question, f"Daily quiz {quiz.quiz_date}"
+            match['url'] = reverse('admin:core_dailyquiz_change', args=[quiz.pk])
+        else:
+            match['text'], match['where'] = '(deleted)', ''
+    return matches
@@ -0,0 +1,319 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import shuffle
+from .invalidation import ProcessCache
+from .item_stats import record_test_attempt
+from .models import ExamSession, Question, TestAttempt, UserAnswer
+
+
+# Server-timed mock test sessions. Starting a test creates an ExamSession with its
+# deadline, and the page autosaves the student's whole answer set as they go. Autosaves
+# only touch the cache (EXAM_SESSIONS['CACHE']), whose entry for the session holds what
+# checking them needs (owner, deadline, question ids) plus the answers last written to
+# the database. `run_exam_sessions` writes changed answers back to the database in
+# batches and grades sessions left open past their deadline, so a crashed browser loses
+# neither the attempt nor more than a few seconds of answers.
+#
+# Each autosave is its own immutable key, exam:<session>:<seq>, written with add(), and
+# exam:<session>:head remembers the highest seq saved. Racing autosaves can leave the
+# head a save or two behind but never overwrite each other, so readers also look a few
+# seqs past the head for newer answers. The page numbers its saves 1, 2, 3...
+
+OPTIONS = frozenset('ABCD')
+PROBE = 8  # Seqs read from the head on, in one get_many
+
+
+class SessionClosed(Exception):
+    """The session was submitted or has run out of time."""
+
+
+def answer_cache():
+    return caches[settings.EXAM_SESSIONS['CACHE']]
+
+
+def cache_key(session_id):
+    return f'exam:{session_id}'
+
+
+def head_key(session_id):
+    return f'exam:{session_id}:head'
+
+
+def version_key(session_id, seq):
+    return f'exam:{session_id}:{seq}'
+
+
+def grace():
+    return timedelta(seconds=settings.EXAM_SESSIONS['GRACE_SECONDS'])
+
+
+# Answer keys, [(question id, correct option)], by mock test id. Every submission of a
+# test reads the same key; edits reach all processes through the invalidation bus.
+answer_keys = ProcessCache('mock-test')
+
+
+def answer_key(mock_test_id):
+    return answer_keys.get(mock_test_id, lambda: list(
+        Question.objects.filter(mock_test_id=mock_test_id).order_by('id').values_list('id', 'correct_option')
+    ))
+
+
+def grade_attempt(user, mock_test, answers):
+    """
+    Creates the graded TestAttempt for `answers`, {str(question id): option}, given in
+    the letters the student was shown.
+    """
+    questions = answer_key(mock_test.pk)
+    if shuffle.enabled():
+        seed = shuffle.student_seed(user.pk, f'mock_test:{mock_test.pk}')
+        answers = shuffle.unshuffle_answers(answers, seed, [question_id for question_id, _ in questions])
+    selected_by_question = {}
+    correct_count = 0
+    for question_id, correct_option in questions:
+        selected_option = answers.get(str(question_id))
+        if selected_option:
+            selected_by_question[question_id] = selected_option
+            if selected_option.upper() == correct_option.upper():
+                correct_count += 1
+    score = int((correct_count / len(questions)) * 100) if questions else 0
+
+    with transaction.atomic():
+        # Statistics first: backfill_item_stats relies on it (see item_stats.lock_all)
+        record_test_attempt(score, questions, selected_by_question)
+        attempt = TestAttempt.objects.create(user=user, mock_test=mock_test, score=score)
+        UserAnswer.objects.bulk_create([
+            UserAnswer(attempt=attempt, question_id=question_id, selected_option=selected_option)
+            for question_id, selected_option in selected_by_question.items()
+        ])
+    return attempt
+
+
+def _entry(session, question_ids):
+    return {
+        'user': session.user_id,
+        'deadline': session.deadline,
+        'questions': question_ids,
+        'answers': session.answers,
+        'seq': session.seq,
+    }
+
+
+def _timeout(entry, now):
+    # Kept past the deadline so the sweep can still collect the last answers
+    timeout = (entry['deadline'] - now).total_seconds() + settings.EXAM_SESSIONS['KEEP_SECONDS']
+    return max(int(timeout), 1)
+
+
+def _store(session_id, entry, now):
+    answer_cache().set(cache_key(session_id), entry, timeout=_timeout(entry, now))
+
+
+def _probe_keys(session_id, start):
+    return [version_key(session_id, seq) for seq in range(start, start + PROBE)]
+
+
+def _newest(entry, found):
+    """
+    `entry` with the newest of the saved versions in `found` (a get_many result), if
+    any is newer than the entry's own answers.
+    """
+    newest = max(found.values(), key=lambda version: version['seq'], default=None)
+    if newest is None or newest['seq'] <= entry['seq']:
+        return entry
+    return {**entry, 'answers': newest['answers'], 'seq': newest['seq']}
+
+
+def latest(session_id, entry):
+    """
+    `entry` with the newest autosaved answers.
+    """
+    cache = answer_cache()
+    start = max(entry['seq'], cache.get(head_key(session_id), 0))
+    return _newest(entry, cache.get_many(_probe_keys(session_id, start)))
+
+
+def load_entry(session_id, now=None):
+    """
+    The cached state of an active session with its newest answers, reloaded from the
+    database on a cache miss. None if the session does not exist or is closed.
+    """
+    entry = answer_cache().get(cache_key(session_id))
+    if entry is not None:
+        return latest(session_id, entry)
+    session = ExamSession.objects.filter(pk=session_id, status='active').first()
+    if session is None:
+        return None
+    question_ids = list(Question.objects.filter(mock_test_id=session.mock_test_id).values_list('id', flat=True))
+    entry = _entry(session, question_ids)
+    _store(session_id, entry, now or timezone.now())
+    return latest(session_id, entry)
+
+
+def payload(session, entry, now):
+    data = {
+        'session': session.pk,
+        'mock_test': session.mock_test_id,
+        'status': session.status,
+        'started_at': session.started_at,
+        'deadline': session.deadline,
+        'remaining_seconds': max(0, int((session.deadline - now).total_seconds())),
+        'answers': entry['answers'] if entry else session.answers,
+        'seq': entry['seq'] if entry else session.seq,
+    }
+    if session.attempt_id:
+        data['attempt'] = session.attempt_id
+    return data
+
+
+def active_session(user, mock_test):
+    return ExamSession.objects.filter(user=user, mock_test=mock_test, status='active').first()
+
+
+def start_session(user, mock_test, now=None):
+    """
+    Resumes the user's open session on `mock_test`, or starts one. A session whose time
+    has run out is graded first. Returns (session, entry).
+    """
+    now = now or timezone.now()
+    session = active_session(user, mock_test)
+    if session is not None and now > session.deadline + grace():
+        close_session(session.pk, 'expired', now=now)
+        session = None
+    if session is not None:
+        return session, load_entry(session.pk, now)
+
+    try:
+        with transaction.atomic():
+            session = ExamSession.objects.create(
+                user=user,
+                mock_test=mock_test,
+                started_at=now,
+                deadline=now + timedelta(seconds=settings.EXAM_SESSIONS['DURATION_SECONDS']),
+            )
+    except IntegrityError:
+        # Another request started it first (core_examsession_active_uniq, over active_key)
+        session = ExamSession.objects.get(user=user, mock_test=mock_test, status='active')
+        return session, load_entry(session.pk, now)
+    entry = _entry(session, list(mock_test.questions.values_list('id', flat=True)))
+    _store(session.pk, entry, now)
+    return session, entry
+
+
+def clean_answers(entry, answers):
+    """
+    Keeps the answers to this session's questions; raises ValueError for anything that
+    isn't {question id: 'A'-'D'}.
+    """
+    if not isinstance(answers, dict):
+        raise ValueError("answers must map question ids to options.")
+    question_ids = set(map(str, entry['questions']))
+    cleaned = {}
+    for question_id, option in answers.items():
+        if not isinstance(option, str) or option.upper() not in OPTIONS:
+            raise ValueError("Options must be one of A, B, C, D.")
+        if str(question_id) in question_ids:
+            cleaned[str(question_id)] = option.upper()
+    return cleaned
+
+
+def autosave(user, session_id, answers, seq, now=None):
+    """
+    Replaces the session's answers with `answers` unless a later set (higher `seq`)
+    was already saved. Returns the entry; raises SessionClosed once time is up.
+    """
+    now = now or timezone.now()
+    entry = load_entry(session_id, now)
+    if entry is None or entry['user'] != user.pk:
+        return None
+    if now > entry['deadline'] + grace():
+        raise SessionClosed
+    if seq <= entry['seq']:
+        return entry
+    answers = clean_answers(entry, answers)
+    cache = answer_cache()
+    timeout = _timeout(entry, now)
+    if not cache.add(version_key(session_id, seq), {'answers': answers, 'seq': seq}, timeout=timeout):
+        return latest(session_id, entry)  # A retry of a save already made
+    cache.set(head_key(session_id), seq, timeout=timeout)
+    cache.delete(version_key(session_id, entry['seq']))
+    return {**entry, 'answers': answers, 'seq': seq}
+
+
+def close_session(session_id, status, answers=None, seq=0, now=None):
+    """
+    Grades the session with its latest answers (or `answers`, when newer than the
+    saved ones) and closes it as 'submitted' or 'expired'. Closing a closed session
+    changes nothing. Returns the session.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        session = ExamSession.objects.select_for_update().select_related('mock_test', 'user').get(pk=session_id)
+        if session.status != 'active':
+            return session
+        entry = latest(session_id, answer_cache().get(cache_key(session_id)) or _entry(session, None))
+        final, final_seq = entry['answers'], entry['seq']
+        if answers is not None and seq >= final_seq and now <= session.deadline + grace():
+            if entry['questions'] is None:
+                entry['questions'] = list(session.mock_test.questions.values_list('id', flat=True))
+            final, final_seq = clean_answers(entry, answers), seq
+
+        session.attempt = grade_attempt(session.user, session.mock_test, final)
+        session.answers, session.seq, session.saved_at = final, final_seq, now
+        session.status, session.active_key = status, None
+        session.save(update_fields=['attempt', 'answers', 'seq', 'saved_at', 'status', 'active_key'])
+    answer_cache().delete_many([cache_key(session_id), head_key(session_id), version_key(session_id, final_seq)])
+    return session
+
+
+def flush_answers(now=None):
+    """
+    Writes the cached answers of active sessions that changed since their last write
+    back to the database, in batches. Returns the number of sessions written.
+    """
+    now = now or timezone.now()
+    batch_size = settings.EXAM_SESSIONS['BATCH_SIZE']
+    cache = answer_cache()
+    written = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            ExamSession.objects.filter(status='active', pk__gt=last_pk).order_by('pk').values_list('pk', 'seq')[:batch_size]
+        )
+        if not rows:
+            return written
+        last_pk = rows[-1][0]
+        found = cache.get_many([cache_key(pk) for pk, _ in rows] + [head_key(pk) for pk, _ in rows])
+        starts = {
+            pk: max(found[cache_key(pk)]['seq'], found.get(head_key(pk), 0))
+            for pk, _ in rows if cache_key(pk) in found
+        }
+        versions = cache.get_many([key for pk, start in starts.items() for key in _probe_keys(pk, start)])
+        changed = []
+        for pk, seq in rows:
+            if pk not in starts:
+                continue
+            probed = {key: versions[key] for key in _probe_keys(pk, starts[pk]) if key in versions}
+            entry = _newest(found[cache_key(pk)], probed)
+            if entry['seq'] > seq:
+                changed.append(ExamSession(pk=pk, answers=entry['answers'], seq=entry['seq'], saved_at=now))
+        # A session closed since it was read keeps its final answers
+        ExamSession.objects.filter(status='active').bulk_update(changed, ['answers', 'seq', 'saved_at'])
+        written += len(changed)
+
+
+def expire_sessions(now=None):
+    """
+    Grades and closes the sessions still open past their deadline. Returns how many.
+    """
+    now = now or timezone.now()
+    session_ids = list(
+        ExamSession.objects.filter(status='active', deadline__lt=now - grace()).values_list('pk', flat=True)
+    )
+    for session_id in session_ids:
+        close_session(session_id, 'expired', now=now)
+    return len(session_ids)
@@ -0,0 +1,329 @@
+import csv
+import itertools
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import DailyQuizAttempt, TestAttempt, UserAnswer
+
+
+# Rows are read in primary-key order, BATCH_SIZE at a time (keyset pagination), and
+# written out as they arrive. Unlike QuerySet.iterator() this also keeps memory flat on
+# MySQL, whose driver otherwise buffers the whole result set client-side.
+BATCH_SIZE = 2000
+
+# Output is flushed in chunks of about this size rather than per row
+CHUNK_BYTES = 64 * 1024
+
+XLSX_MAX_ROWS = 1048576  # Excel's sheet limit; longer exports continue on a new sheet
+
+
+def day_start(day):
+    """
+    The aware datetime at which `day` starts in the current time zone. Datetime columns
+    are filtered on these bounds rather than __date lookups, which MySQL can't answer
+    from an index (and needs its time zone tables for).
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_from(value):
+    return day_start(date.fromisoformat(value))
+
+
+def parse_to(value):
+    # Filtered with __lt: the whole of the `to` day is included
+    return day_start(date.fromisoformat(value) + timedelta(days=1))
+
+
+class Export:
+    """
+    One exportable table: column headers, the .values_list() fields behind them, and the
+    query-string filters it understands, mapped to ORM lookups.
+    """
+
+    def __init__(self, name, model, columns, filters):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.filters = filters
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def queryset(self, params):
+        lookups = {}
+        for param, (lookup, parse) in self.filters.items():
+            if params.get(param):
+                lookups[lookup] = parse(params[param])
+        return self.model.objects.filter(**lookups).values_list('pk', *[field for _, field in self.columns])
+
+    def rows(self, params):
+        # Parse (and reject bad) filters before the response starts streaming
+        queryset = self.queryset(params)
+        return keyset_rows(queryset)
+
+
+def keyset_rows(queryset, batch_size=BATCH_SIZE):
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        for row in batch:
+            yield row[1:]
+        if len(batch) < batch_size:
+            return
+        last_pk = batch[-1][0]
+
+
+EXPORTS = {
+    export.name: export for export in [
+        Export(
+            'attempts', TestAttempt,
+            [
+                ('attempt_id', 'id'), ('username', 'user__username'), ('email', 'user__email'),
+                ('mock_test_id', 'mock_test_id'), ('subject', 'mock_test__subject'),
+                ('class_level', 'mock_test__class_level'), ('score', 'score'), ('taken_on', 'taken_on'),
+            ],
+            {
+                'mock_test': ('mock_test_id', int),
+                'class_level': ('mock_test__class_level', int),
+                'from': ('taken_on__gte', parse_from),
+                'to': ('taken_on__lt', parse_to),
+            },
+        ),
+        Export(
+            'answers', UserAnswer,
+            [
+                ('attempt_id', 'attempt_id'), ('username', 'attempt__user__username'),
+                ('mock_test_id', 'attempt__mock_test_id'), ('subject', 'attempt__mock_test__subject'),
+                ('question_id', 'question_id'), ('selected_option', 'selected_option'),
+                ('correct_option', 'question__correct_option'), ('taken_on', 'attempt__taken_on'),
+            ],
+            {
+                'mock_test': ('attempt__mock_test_id', int),
+                'class_level': ('attempt__mock_test__class_level', int),
+                'from': ('attempt__taken_on__gte', parse_from),
+                'to': ('attempt__taken_on__lt', parse_to),
+            },
+        ),
+        Export(
+            'daily-quiz', DailyQuizAttempt,
+            [
+                ('attempt_id', 'id'), ('username', 'user__username'), ('email', 'user__email'),
+                ('quiz_date', 'quiz_date'), ('score', 'score'), ('percent', 'percent'),
+                ('attempted_at', 'attempted_at'),
+            ],
+            {
+                'from': ('quiz_date__gte', date.fromisoformat),
+                'to': ('quiz_date__lte', date.fromisoformat),
+            },
+        ),
+    ]
+}
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+class _ChunkBuffer:
+    """
+    Write-only file object collecting bytes until they are taken with `drain()`. It can
+    tell() but not seek(), which makes zipfile stream entries with data descriptors.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.offset = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.size += len(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+class _TextWriter:
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, text):
+        return self.buffer.write(text.encode('utf-8'))
+
+
+def csv_chunks(headers, rows):
+    buffer = _ChunkBuffer()
+    writer = csv.writer(_TextWriter(buffer))
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_cell_text(value) for value in row])
+        if buffer.size >= CHUNK_BYTES:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}</Relationships>'
+)
+_SHEET_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, bool):
+            cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c><v>{value}</v></c>')
+        elif value is None:
+            cells.append('<c/>')
+        else:
+            text = escape(_XML_ILLEGAL.sub('', _cell_text(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def xlsx_chunks(headers, rows, sheet_title='Export'):
+    """
+    Writes a minimal XLSX workbook (inline strings, no styles) row by row into a zip that
+    is never seeked, yielding compressed bytes as they are produced.
+    """
+    buffer = _ChunkBuffer()
+    workbook = zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED)
+    sheet_count = 0
+    rows = iter(rows)
+    exhausted = False
+
+    while not exhausted:
+        sheet_count += 1
+        with workbook.open(f'xl/worksheets/sheet{sheet_count}.xml', 'w') as sheet:
+            sheet.write(_SHEET_START.encode('utf-8'))
+            sheet.write(_xlsx_row(headers).encode('utf-8'))
+            written = 1
+            exhausted = True
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                written += 1
+                if buffer.size >= CHUNK_BYTES:
+                    yield buffer.drain()
+                if written == XLSX_MAX_ROWS:
+                    # Only start another sheet if there is a row left for it
+                    following = next(rows, None)
+                    if following is not None:
+                        rows = itertools.chain([following], rows)
+                        exhausted = False
+                    break
+            sheet.write(_SHEET_END.encode('utf-8'))
+        yield buffer.drain()
+
+    numbers = range(1, sheet_count + 1)
+    names = [sheet_title if n == 1 else f'{sheet_title} {n}' for n in numbers]
+    workbook.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+        sheets=''.join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)))
+    workbook.writestr('_rels/.rels', _ROOT_RELS)
+    workbook.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=''.join(
+        f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>' for n, name in zip(numbers, names))))
+    workbook.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(
+        sheets=''.join(_SHEET_REL.format(n=n) for n in numbers)))
+    workbook.close()
+    yield buffer.drain()
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', csv_chunks),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_chunks),
+}
+
+
+async def _aiter_chunks(chunks):
+    # Each next() runs in the request's DB thread; chunks are large, so the hops are few
+    next_chunk = sync_to_async(next)
+    done = object()
+    while (chunk := await next_chunk(chunks, done)) is not done:
+        yield chunk
+
+
+def export_response(request, export, file_format, params):
+    """
+    StreamingHttpResponse for `export` in `file_format`. Under ASGI the content is an async
+    iterator, because Django would buffer a sync iterator into a list before sending it.
+    """
+    content_type, writer = FORMATS[file_format]
+    chunks = writer(export.headers, export.rows(params))
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{export.name}-{stamp}.{file_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,82 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+
+from .models import Formula
+
+
+# The formula page is split into one section per subject, each paginated by id
+# (FORMULA_PAGES['PAGE_SIZE'] formulas, then "Load more"). A page of a section is rendered
+# once and kept in the cache under the subject's content version, a random token replaced
+# whenever a formula of that subject is saved, deleted or imported, so stale fragments
+# are never read and need no deleting. The page itself embeds only the first page of one
+# subject; the others are fetched when the student switches to them.
+
+# Tab order on the page; subjects added to Formula.SUBJECT_CHOICES later go at the end
+PAGE_ORDER = [
+    "Tamil", "English", "Maths", "Physics", "Chemistry", "Biology", "Biology(Botany)",
+    "Biology(Zoology)", "Science", "History", "Geography", "Economics", "Political science",
+]
+SUBJECTS = PAGE_ORDER + [value for value, _ in Formula.SUBJECT_CHOICES if value not in PAGE_ORDER]
+
+
+def fragment_cache():
+    return caches[settings.FORMULA_PAGES['CACHE']]
+
+
+def version_key(subject):
+    return f'formula-version:{slugify(subject)}'
+
+
+def section_version(subject):
+    cache = fragment_cache()
+    version = cache.get(version_key(subject))
+    if version is None:
+        # First use, or evicted: whatever was cached under the old token is orphaned
+        cache.add(version_key(subject), uuid.uuid4().hex[:12], timeout=None)
+        version = cache.get(version_key(subject))
+    return version
+
+
+def bump_versions(subjects):
+    fragment_cache().set_many({version_key(subject): uuid.uuid4().hex[:12] for subject in subjects}, timeout=None)
+
+
+def bump_all_versions():
+    bump_versions(SUBJECTS)
+
+
+def render_section_page(subject, after=0):
+    """
+    The HTML of the formulas of `subject` with ids above `after`, one page of them, and
+    a "Load more" button when there are more.
+    """
+    page_size = settings.FORMULA_PAGES['PAGE_SIZE']
+    formulas = list(
+        Formula.objects.filter(subject=subject, id__gt=after).order_by('id').only('id', 'heading', 'formula')[:page_size + 1]
+    )
+    more = len(formulas) > page_size
+    formulas = formulas[:page_size]
+    return render_to_string('formula_section.html', {
+        'subject': subject,
+        'formulas': formulas,
+        'first_page': after == 0,
+        'next_after': formulas[-1].id if more else None,
+    })
+
+
+def section_page(subject, after=0):
+    """
+    (html, version) of one page of a subject's section, rendered on a cache miss.
+    """
+    version = section_version(subject)
+    key = f'formula-section:{slugify(subject)}:{version}:{after}'
+    cache = fragment_cache()
+    html = cache.get(key)
+    if html is None:
+        html = render_section_page(subject, after)
+        cache.set(key, html, timeout=settings.FORMULA_PAGES['CACHE_SECONDS'])
+    return html, version
@@ -1,7 +1,7 @@
 
 import os
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,16 +10,19 @@ api_key = os.environ.get("GROQ_API_KEY")
 if not api_key:
     raise ValueError("GROQ_API_KEY not found in environment variables. Please set it in your .env file.")
 
-client = Groq(api_key=api_key)
+async_client = AsyncGroq(api_key=api_key)
 
-def query_groq_api(messages):
+MODEL_NAME = "llama-3.3-70b-versatile"
+
+async def aquery_groq_api(messages):
     """
     Sends the list of messages to Groq chat completion API and returns the assistant's reply.
+    Awaited, so a worker isn't held while the model responds.
     :param messages: list of dicts with keys 'role' and 'content' (both strings)
     :return: response string from Groq assistant
     """
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",  # Your model name here
+    response = await async_client.chat.completions.create(
+        model=MODEL_NAME,
         messages=messages,
     )
     return response.choices[0].message.content.strip()
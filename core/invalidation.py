@@ -0,0 +1,331 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import InvalidationEvent
+
+try:
+    import redis
+except ImportError:  # Only the redis transport needs redis-py
+    redis = None
+
+
+# Invalidation bus for data cached in process memory. Code that keeps a per-process copy
+# of something registers a handler for a topic ("daily-quiz", "mock-test", ...); model
+# signals publish (topic, key) after commit. The publishing process applies the event at
+# once, and every other process, on any node, picks it up from the transport within
+# INVALIDATION['POLL_SECONDS']: core.middleware.InvalidationMiddleware polls at the start
+# of a request when that much time has passed, so the check costs one small query per
+# interval and idle processes cost nothing. Background workers (run_exam_sessions,
+# render_reports) poll once per pass of their loop.
+#
+# Events are versioned by the transport's id (an auto-increment row id, or a Redis
+# stream id) and each process remembers the last one it applied. A process that has not
+# polled for longer than events are kept may have missed some, and drops everything.
+
+ALL = None  # Key passed to handlers when everything under the topic must go
+
+_handlers = {}  # topic: [handler(key)]
+
+
+def register(topic, handler):
+    """
+    Calls `handler(key)` for each event published on `topic`, in this process and all
+    others; `key` is a string, or ALL.
+    """
+    _handlers.setdefault(topic, []).append(handler)
+
+
+def apply(topic, key):
+    for handler in _handlers.get(topic, ()):
+        handler(key)
+
+
+def apply_all():
+    for topic in list(_handlers):
+        apply(topic, ALL)
+
+
+class Event:
+    __slots__ = ('id', 'topic', 'key', 'origin', 'created')
+
+    def __init__(self, id, topic, key, origin, created):
+        self.id = id
+        self.topic = topic
+        self.key = key or ALL
+        self.origin = origin
+        self.created = created  # Unix time
+
+
+class DatabaseTransport:
+    """
+    Events are InvalidationEvent rows; needs nothing beyond the database. Auto-increment
+    ids can commit out of order, so each poll also rereads the last SETTLE_SECONDS of
+    events and skips those already seen.
+    """
+
+    def latest_id(self):
+        return InvalidationEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def publish(self, topic, key, origin, created):
+        InvalidationEvent.objects.create(
+            topic=topic, key=key or '', origin=origin, created_at=datetime.fromtimestamp(created, dt_timezone.utc),
+        )
+
+    def fetch(self, after, since):
+        # New events and the settle window are read separately: rereading the window
+        # must not use up the MAX_EVENTS meant for events not seen yet
+        limit = settings.INVALIDATION['MAX_EVENTS']
+        fields = ('id', 'topic', 'key', 'origin', 'created_at')
+        new = InvalidationEvent.objects.filter(id__gt=after).order_by('id').values_list(*fields)[:limit]
+        settling = InvalidationEvent.objects.filter(
+            id__lte=after, created_at__gte=datetime.fromtimestamp(since, dt_timezone.utc),
+        ).order_by('-id').values_list(*fields)[:limit]
+        return sorted(
+            (Event(pk, topic, key, origin, created_at.timestamp())
+             for pk, topic, key, origin, created_at in [*settling, *new]),
+            key=lambda event: event.id,
+        )
+
+    def prune(self, before):
+        InvalidationEvent.objects.filter(created_at__lt=datetime.fromtimestamp(before, dt_timezone.utc)).delete()
+
+
+class RedisTransport:
+    """
+    Events go to a Redis stream (INVALIDATION['REDIS_URL'], 'STREAM'), whose ids are
+    assigned in order by the server.
+    """
+
+    def __init__(self):
+        if redis is None:
+            raise RuntimeError("INVALIDATION['TRANSPORT'] = 'redis' needs the redis package.")
+        self.client = redis.Redis.from_url(settings.INVALIDATION['REDIS_URL'])
+        self.stream = settings.INVALIDATION['STREAM']
+
+    @staticmethod
+    def _id(entry_id):
+        # '1700000000000-3' -> (1700000000000, 3), which orders like the stream
+        ms, seq = entry_id.decode().split('-')
+        return int(ms), int(seq)
+
+    def latest_id(self):
+        entries = self.client.xrevrange(self.stream, count=1)
+        return self._id(entries[0][0]) if entries else (0, 0)
+
+    def publish(self, topic, key, origin, created):
+        self.client.xadd(self.stream, {'topic': topic, 'key': key or '', 'origin': origin, 'created': repr(created)})
+
+    def fetch(self, after, since):
+        events = []
+        entries = self.client.xrange(self.stream, min=f'({after[0]}-{after[1]}', count=settings.INVALIDATION['MAX_EVENTS'])
+        for entry_id, fields in entries:
+            fields = {k.decode(): v.decode() for k, v in fields.items()}
+            events.append(Event(self._id(entry_id), fields['topic'], fields['key'], fields['origin'], float(fields['created'])))
+        return events
+
+    def prune(self, before):
+        self.client.xtrim(self.stream, minid=int(before * 1000))
+
+
+TRANSPORTS = {
+    'db': DatabaseTransport,
+    'redis': RedisTransport,
+}
+
+
+class InvalidationStats:
+    """
+    Per-process counts of published and applied events, and the propagation delay of
+    events from other processes (publish time to applied here; across nodes this
+    includes their clock difference).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.published = 0
+        self.applied = 0
+        self.polls = 0
+        self.full_flushes = 0
+        self._delays = deque(maxlen=1000)
+
+    def record_publish(self):
+        with self._lock:
+            self.published += 1
+
+    def record_poll(self, delays):
+        with self._lock:
+            self.polls += 1
+            self.applied += len(delays)
+            self._delays.extend(delays)
+
+    def record_full_flush(self):
+        with self._lock:
+            self.full_flushes += 1
+
+    def snapshot(self):
+        with self._lock:
+            delays = sorted(self._delays)
+            data = {
+                'transport': settings.INVALIDATION['TRANSPORT'],
+                'published': self.published,
+                'applied': self.applied,
+                'polls': self.polls,
+                'full_flushes': self.full_flushes,
+                'last_id': bus.last_id,
+            }
+        if delays:
+            def percentile(q):
+                return round(delays[min(len(delays) - 1, int(len(delays) * q))] * 1000, 1)
+            data['delay_ms'] = {
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(delays[-1] * 1000, 1),
+                'samples': len(delays),
+            }
+        return data
+
+
+stats = InvalidationStats()
+
+
+class Bus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._transport = None
+        self._pid = None
+        self._origin = None
+        self.last_id = None
+        self.baseline = None  # Events up to this id predate this process's caches
+        self.last_poll = 0.0
+        self.last_prune = 0.0
+        self._seen = {}  # event id: created, for events inside the settle window
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = TRANSPORTS[settings.INVALIDATION['TRANSPORT']]()
+        return self._transport
+
+    @property
+    def origin(self):
+        # Per process; a forked worker gets its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._origin = f'{socket.gethostname()[:40]}:{self._pid}:{os.urandom(3).hex()}'
+        return self._origin
+
+    def publish(self, topic, key=ALL):
+        key = None if key is ALL else str(key)
+        apply(topic, key)
+        self.transport.publish(topic, key, self.origin, time.time())
+        stats.record_publish()
+
+    def due(self, now=None):
+        return (now or time.monotonic()) - self.last_poll >= settings.INVALIDATION['POLL_SECONDS']
+
+    def poll(self):
+        """
+        Applies the events other processes published since the last poll. Only one
+        thread polls at a time; the others carry on with what they have.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._poll()
+        finally:
+            self._lock.release()
+
+    def _poll(self):
+        config = settings.INVALIDATION
+        monotonic, now = time.monotonic(), time.time()
+        if self.last_id is None or monotonic - self.last_poll > config['KEEP_SECONDS']:
+            # Nothing to catch up on at startup; after a long gap, events may be gone
+            if self.last_id is not None:
+                apply_all()
+                stats.record_full_flush()
+            self.last_id = self.baseline = self.transport.latest_id()
+            self.last_poll = monotonic
+            return
+        self.last_poll = monotonic
+
+        after = self.last_id
+        events = self.transport.fetch(after, now - config['SETTLE_SECONDS'])
+        delays = []
+        origin = self.origin
+        for event in events:
+            if event.id <= self.baseline or event.id in self._seen:
+                continue
+            self._seen[event.id] = event.created
+            if event.origin != origin:
+                apply(event.topic, event.key)
+                delays.append(max(0.0, now - event.created))
+        if events:
+            self.last_id = max(self.last_id, events[-1].id)
+            if sum(event.id > after for event in events) >= config['MAX_EVENTS']:
+                # More than one poll can take: start over rather than fall behind
+                apply_all()
+                stats.record_full_flush()
+                self.last_id = self.baseline = self.transport.latest_id()
+        cutoff = now - 2 * config['SETTLE_SECONDS']
+        self._seen = {event_id: created for event_id, created in self._seen.items() if created >= cutoff}
+        stats.record_poll(delays)
+
+        if monotonic - self.last_prune > config['KEEP_SECONDS'] / 10:
+            self.last_prune = monotonic
+            self.transport.prune(now - config['KEEP_SECONDS'])
+
+
+bus = Bus()
+
+
+def publish_on_commit(topic, key=ALL):
+    """
+    Publishes once the current transaction commits, so no process reloads the old rows.
+    """
+    transaction.on_commit(lambda: bus.publish(topic, key), robust=True)
+
+
+class ProcessCache:
+    """
+    A per-process dict of hot, rarely changing data (today's quiz, answer keys), emptied
+    through the bus. A value built while an event for its key arrived is not kept, and
+    none is kept longer than INVALIDATION['MAX_AGE_SECONDS'], should an event be missed.
+    """
+
+    def __init__(self, topic, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = {}  # key: (value, expiry on the monotonic clock)
+        self._generation = 0
+        self._lock = threading.Lock()
+        register(topic, self.invalidate)
+
+    def get(self, key, build):
+        key = str(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        generation = self._generation
+        value = build()
+        expires = time.monotonic() + settings.INVALIDATION['MAX_AGE_SECONDS']
+        with self._lock:
+            if generation == self._generation:
+                self._entries.pop(key, None)
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = (value, expires)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            if key is ALL:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
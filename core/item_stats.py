@@ -0,0 +1,194 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyQuiz, DailyQuizAttempt, DailyQuizStatistics, QuestionStatistics
+
+
+OPTION_FIELDS = {
+    'A': 'option_a_count',
+    'B': 'option_b_count',
+    'C': 'option_c_count',
+    'D': 'option_d_count',
+}
+
+STAT_FIELDS = (
+    'attempts', 'correct_count', 'option_a_count', 'option_b_count', 'option_c_count',
+    'option_d_count', 'skipped_count', 'score_sum', 'score_sq_sum', 'correct_score_sum',
+)
+
+
+class ItemCounters:
+    """
+    Accumulates per-item increments in memory before they are applied with `apply`.
+    """
+
+    def __init__(self):
+        self.items = defaultdict(lambda: defaultdict(int))
+
+    def add(self, item_id, selected, correct_option, score):
+        selected = (selected or '').upper()
+        counters = self.items[item_id]
+        counters['attempts'] += 1
+        counters[OPTION_FIELDS.get(selected, 'skipped_count')] += 1
+        counters['score_sum'] += score
+        counters['score_sq_sum'] += score * score
+        if selected and selected == (correct_option or '').upper():
+            counters['correct_count'] += 1
+            counters['correct_score_sum'] += score
+
+    def __len__(self):
+        return len(self.items)
+
+
+def lock(model, item_ids):
+    """
+    Creates the missing rows of `item_ids` and locks them in pk order. Every writer takes
+    its row locks this way, so two graders never wait on each other in opposite orders.
+    Must run inside a transaction.
+    """
+    item_ids = sorted(item_ids)
+    model.objects.bulk_create([model(pk=item_id) for item_id in item_ids], ignore_conflicts=True)
+    list(model.objects.select_for_update().filter(pk__in=item_ids).order_by('pk').values_list('pk'))
+
+
+def lock_all(model, item_model, batch_size=1000):
+    """
+    Creates a row for every item and locks the whole table, in pk order. Graders record
+    statistics before inserting their attempt, so once this returns every attempt row
+    already inserted belongs to a committed transaction.
+    """
+    item_ids = item_model.objects.order_by('pk').values_list('pk', flat=True)
+    for start in range(0, item_ids.count(), batch_size):
+        model.objects.bulk_create(
+            [model(pk=item_id) for item_id in item_ids[start:start + batch_size]], ignore_conflicts=True
+        )
+    list(model.objects.select_for_update().order_by('pk').values_list('pk'))
+
+
+def apply(model, counters):
+    """
+    Adds the accumulated increments to `model` rows with UPDATE ... SET col = col + n, so
+    concurrent graders never lose counts. Items with identical increments share one
+    statement: grading an attempt costs a handful of queries however many items it has.
+    """
+    if not counters.items:
+        return
+    with transaction.atomic():
+        lock(model, counters.items)
+        groups = defaultdict(list)
+        for item_id, increments in counters.items.items():
+            groups[tuple(sorted(increments.items()))].append(item_id)
+        now = timezone.now()
+        for increments, item_ids in groups.items():
+            model.objects.filter(pk__in=item_ids).update(
+                updated_at=now, **{field: F(field) + amount for field, amount in increments}
+            )
+
+
+def replace_all(model, counters, batch_size=1000):
+    """
+    Sets every (locked) `model` row to the totals in `counters`; rows without any are zeroed.
+    """
+    now = timezone.now()
+    rows = []
+    for item_id in model.objects.order_by('pk').values_list('pk', flat=True):
+        totals = counters.items.get(item_id, {})
+        rows.append(model(pk=item_id, updated_at=now, **{field: totals.get(field, 0) for field in STAT_FIELDS}))
+    model.objects.bulk_update(rows, [*STAT_FIELDS, 'updated_at'], batch_size=batch_size)
+
+
+def test_responses(questions, selected_by_question):
+    """
+    Yields (question_id, selected option or None, correct option) for every question of a test.
+    `questions` is an iterable of (id, correct_option).
+    """
+    for question_id, correct_option in questions:
+        yield question_id, selected_by_question.get(question_id), correct_option
+
+
+def daily_quiz_responses(quizzes, answers):
+    """
+    Daily quiz answers are a list in quiz id order; pairs them with `quizzes` (id, correct_option).
+    """
+    for idx, (quiz_id, correct_option) in enumerate(quizzes):
+        yield quiz_id, answers[idx] if idx < len(answers) else None, correct_option
+
+
+def record_attempt(model, score, responses):
+    counters = ItemCounters()
+    for item_id, selected, correct_option in responses:
+        counters.add(item_id, selected, correct_option, score)
+    apply(model, counters)
+
+
+def record_test_attempt(score, questions, selected_by_question):
+    record_attempt(QuestionStatistics, score, test_responses(questions, selected_by_question))
+
+
+def roll_up_daily_quiz_attempts(batch_size=1000):
+    """
+    Counts the daily quiz attempts not yet in DailyQuizStatistics into it, a batch per
+    transaction, and returns how many. Everyone takes the same ten questions each day,
+    so submissions only insert their attempt and the day's rows are updated here, once
+    per batch, instead of once per submission.
+    """
+    total = 0
+    while True:
+        pending = list(
+            DailyQuizAttempt.objects.filter(stats_recorded=False).order_by('pk').values_list('pk', 'quiz_date')[:batch_size]
+        )
+        if not pending:
+            return total
+        quizzes_by_date = defaultdict(list)
+        for quiz_id, quiz_date, correct_option in DailyQuiz.objects.filter(
+            quiz_date__in={quiz_date for _, quiz_date in pending}
+        ).order_by('id').values_list('id', 'quiz_date', 'correct_option'):
+            quizzes_by_date[quiz_date].append((quiz_id, correct_option))
+
+        with transaction.atomic():
+            # Statistics rows first, like every writer (see lock); a concurrent roll-up
+            # waits here and then finds the attempts counted
+            lock(DailyQuizStatistics, [quiz_id for quizzes in quizzes_by_date.values() for quiz_id, _ in quizzes])
+            attempts = list(
+                DailyQuizAttempt.objects.select_for_update().filter(
+                    pk__in=[pk for pk, _ in pending], stats_recorded=False,
+                ).values_list('pk', 'quiz_date', 'percent', 'answers')
+            )
+            counters = ItemCounters()
+            for _, quiz_date, percent, answers in attempts:
+                for item_id, selected, correct_option in daily_quiz_responses(quizzes_by_date[quiz_date], answers or []):
+                    counters.add(item_id, selected, correct_option, percent)
+            apply(DailyQuizStatistics, counters)
+            DailyQuizAttempt.objects.filter(pk__in=[pk for pk, _, _, _ in attempts]).update(stats_recorded=True)
+        total += len(attempts)
+        if len(pending) < batch_size:
+            return total
+
+
+def summarize(stats):
+    """
+    API/admin representation of an ItemStatistics instance (or None for an unseen item).
+    """
+    if stats is None or not stats.attempts:
+        return {'attempts': 0, 'correct_count': 0, 'difficulty': None, 'discrimination': None, 'options': None}
+    difficulty, discrimination = stats.difficulty, stats.discrimination
+    return {
+        'attempts': stats.attempts,
+        'correct_count': stats.correct_count,
+        'difficulty': round(difficulty, 4) if difficulty is not None else None,
+        'discrimination': round(discrimination, 4) if discrimination is not None else None,
+        'options': stats.option_distribution,
+    }
+
+
+def stats_from_values(model, row, prefix='stats__'):
+    """
+    Builds an unsaved `model` from the stats__* columns of a .values() row joined through
+    the item's `stats` relation, so a listing stays a single query.
+    """
+    if row.get(prefix + 'attempts') is None:
+        return None
+    return model(**{field: row[prefix + field] for field in STAT_FIELDS})
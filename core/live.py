@@ -0,0 +1,672 @@
+import asyncio
+import json
+import re
+import secrets
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.http.request import split_domain_port, validate_host
+from django.utils.module_loading import import_string
+
+from .item_stats import ItemCounters, apply as apply_item_stats
+from .models import (
+    LiveAnswer, LiveParticipant, LiveSession, MockTest, Question, QuestionStatistics, TestAttempt, UserAnswer,
+)
+
+
+# Live classroom mode for a MockTest over WebSockets.
+#
+#   Teacher (staff):  ws /ws/live/host/<mock_test_id>/   -> {"type": "session", "code": ...}
+#                     {"action": "next"} | {"action": "reveal"} | {"action": "end"}
+#   Student:          ws /ws/live/<code>/
+#                     {"action": "answer", "question_id": 12, "option": "B"}
+#
+# A session's state is a LiveSession row and its answers are LiveAnswer rows, so the
+# teacher's and the students' sockets may land on any web process. Each process keeps a
+# Room per session it has sockets for and, every LIVE_QUIZ['POLL_SECONDS'], writes the
+# answers it received in one insert, applies state changes made elsewhere and sends its
+# teacher the tally of the open question. While a poll finds nothing new the interval
+# doubles up to LIVE_QUIZ['IDLE_POLL_SECONDS']; answers received meanwhile are written at
+# the next POLL_SECONDS tick. The teacher's actions reach the sockets in the teacher's
+# process at once. Ending waits for the other processes' last answers, then writes one
+# TestAttempt per student and their UserAnswer rows in a single transaction.
+
+HOST_PATH = re.compile(r'^/ws/live/host/(?P<mock_test_id>\d+)/$')
+STUDENT_PATH = re.compile(r'^/ws/live/(?P<code>[A-Z0-9]{6})/$')
+CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+OPTIONS = ('A', 'B', 'C', 'D')
+STATE_FIELDS = ('id', 'current', 'revealed', 'status', 'version')
+
+
+def live_settings():
+    return settings.LIVE_QUIZ
+
+
+class Connection:
+    """
+    One WebSocket. Outgoing messages go through a bounded queue drained by a writer task,
+    so a slow client can never hold up a broadcast; it is dropped when its queue fills.
+    """
+
+    def __init__(self, send, user):
+        self.send = send
+        self.user = user
+        self.queue = asyncio.Queue(maxsize=live_settings()['SEND_QUEUE_SIZE'])
+        self.closed = False
+        self.writer = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                if text is None:
+                    await self.send({'type': 'websocket.close', 'code': self.close_code})
+                    break
+                await self.send({'type': 'websocket.send', 'text': text})
+        except (OSError, RuntimeError):
+            self.closed = True
+
+    def push(self, text):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.close(code=1013)  # Try again later
+
+    def push_json(self, message):
+        self.push(json.dumps(message))
+
+    def close(self, code=1000):
+        """
+        Closes after the queued messages are delivered; a backed-up client is closed right away.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.close_code = code
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def wait_closed(self):
+        # The ASGI app must not return before the writer has sent the close frame
+        await self.writer
+
+
+class Room:
+    """
+    This process's sockets of one LiveSession, and the session state it last applied.
+    """
+
+    def __init__(self, session, questions):
+        self.session_id = session.id
+        self.code = session.code
+        self.mock_test_id = session.mock_test_id
+        self.subject = session.mock_test.subject
+        self.questions = questions
+        self.host = None
+        self.students = {}
+        self.answered = {}  # user id: question ids answered through this process
+        self.pending = []   # LiveAnswer rows for the next poll to write
+        self.current = session.current
+        self.revealed = session.revealed
+        self.status = session.status
+        self.version = session.version
+        self.last_tally = None
+
+    @property
+    def current_question_id(self):
+        return self.questions[self.current]['id'] if self.current >= 0 else None
+
+    @property
+    def empty(self):
+        return self.host is None and not self.students and not self.pending
+
+    def public_question(self, index):
+        question = self.questions[index]
+        return {
+            'type': 'question',
+            'index': index,
+            'total': len(self.questions),
+            'question': {
+                'id': question['id'],
+                'question_text': question['question_text'],
+                'options': question['options'],
+            },
+        }
+
+    def broadcast(self, message):
+        text = json.dumps(message)  # Serialized once for the whole room
+        for student in self.students.values():
+            student.push(text)
+
+    def join(self, connection):
+        previous = self.students.get(connection.user.id)
+        if previous is not None:
+            previous.close(code=4000)  # Replaced by a reconnect
+        self.students[connection.user.id] = connection
+        connection.push_json({'type': 'joined', 'code': self.code, 'mock_test': self.subject})
+        if self.current >= 0:
+            connection.push_json(self.public_question(self.current))
+
+    def leave(self, connection):
+        """
+        Returns True when this was the student's socket (and not one a reconnect replaced).
+        """
+        if self.students.get(connection.user.id) is connection:
+            del self.students[connection.user.id]
+            return True
+        return False
+
+    def answer(self, user_id, question_id, option):
+        """
+        Queues a student's first answer to the open question. Returns an error string or None.
+        """
+        if self.status != 'active' or self.current < 0 or self.revealed:
+            return 'No open question.'
+        if question_id != self.questions[self.current]['id']:
+            return 'Question is not open.'
+        if option not in OPTIONS:
+            return 'Option must be one of A, B, C, D.'
+        answered = self.answered.setdefault(user_id, set())
+        if question_id in answered:
+            return 'Already answered.'
+        answered.add(question_id)
+        self.pending.append(LiveAnswer(session_id=self.session_id, user_id=user_id, question_id=question_id, option=option))
+        return None
+
+    def take_pending(self):
+        pending, self.pending = self.pending, []
+        return pending
+
+    def counts(self, counts_by_question):
+        counts = dict.fromkeys(OPTIONS, 0)
+        if self.current >= 0:
+            counts.update(counts_by_question.get(self.questions[self.current]['id'], {}))
+        return counts
+
+    def apply(self, state, counts_by_question=None, scores=None):
+        """
+        Moves to `state` (STATE_FIELDS of the LiveSession) if it is newer, and tells the
+        sockets what changed: the next question, the answer, or the end with each score.
+        """
+        if state['version'] <= self.version:
+            return
+        moved = state['current'] != self.current
+        revealing = state['revealed'] and (moved or not self.revealed)
+        self.current, self.revealed = state['current'], state['revealed']
+        self.status, self.version = state['status'], state['version']
+
+        if moved and self.current >= 0:
+            message = self.public_question(self.current)
+            self.broadcast(message)
+            if self.host is not None:
+                self.host.push_json(message)
+        if revealing:
+            self.broadcast({
+                'type': 'reveal',
+                'index': self.current,
+                'correct_option': self.questions[self.current]['correct_option'],
+                'counts': self.counts(counts_by_question or {}),
+            })
+        if self.status == 'ended':
+            self.broadcast({'type': 'ended'})
+            for user_id, student in list(self.students.items()):
+                student.push_json({'type': 'score', 'score': (scores or {}).get(user_id) or 0})
+                student.close()
+
+    def send_tally(self, counts_by_question, students):
+        """
+        Sends the teacher the tally if it changed since the last one. Returns True when sent.
+        """
+        counts = self.counts(counts_by_question)
+        tally = {
+            'type': 'tally',
+            'index': self.current,
+            'counts': counts,
+            'answered': sum(counts.values()),
+            'students': students,
+        }
+        if tally != self.last_tally:
+            self.last_tally = tally
+            self.host.push_json(tally)
+            return True
+        return False
+
+
+@sync_to_async
+def load_questions(mock_test_id):
+    mock_test = MockTest.objects.filter(pk=mock_test_id).first()
+    if mock_test is None:
+        return None, []
+    questions = [
+        {
+            'id': q['id'],
+            'question_text': q['question_text'],
+            'options': {'A': q['option_a'], 'B': q['option_b'], 'C': q['option_c'], 'D': q['option_d']},
+            'correct_option': (q['correct_option'] or '').upper(),
+        }
+        for q in Question.objects.filter(mock_test_id=mock_test_id).order_by('id').values(
+            'id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option',
+        )
+    ]
+    return mock_test, questions
+
+
+@sync_to_async
+def create_session(mock_test, host):
+    while True:
+        code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(6))
+        try:
+            with transaction.atomic():
+                return LiveSession.objects.create(code=code, mock_test=mock_test, host=host)
+        except IntegrityError:
+            continue  # Code taken
+
+
+@sync_to_async
+def load_session(code):
+    return LiveSession.objects.select_related('mock_test').filter(code=code, status='active').first()
+
+
+@sync_to_async
+def register_student(session_id, user_id, max_students):
+    """
+    Marks the student connected, adding them if the session has room. False when it is full.
+    """
+    participants = LiveParticipant.objects.filter(session_id=session_id)
+    if participants.filter(user_id=user_id).update(connected=True):
+        return True
+    if participants.count() >= max_students:
+        return False
+    try:
+        with transaction.atomic():
+            LiveParticipant.objects.create(session_id=session_id, user_id=user_id)
+    except IntegrityError:
+        participants.filter(user_id=user_id).update(connected=True)  # Joined from another process meanwhile
+    return True
+
+
+@sync_to_async
+def disconnect_student(session_id, user_id):
+    LiveParticipant.objects.filter(session_id=session_id, user_id=user_id).update(connected=False)
+
+
+def _answer_counts(session_ids=(), questions=None):
+    """
+    Answer counts of every question of `session_ids`, and of the one question of each
+    session in `questions` ({session id: question id}).
+    """
+    condition = Q(session_id__in=session_ids)
+    for session_id, question_id in (questions or {}).items():
+        condition |= Q(session_id=session_id, question_id=question_id)
+    counts = {}  # session id: {question id: {option: count}}
+    rows = (
+        LiveAnswer.objects.filter(condition)
+        .values('session_id', 'question_id', 'option').annotate(count=Count('id')).order_by()
+    )
+    for row in rows:
+        counts.setdefault(row['session_id'], {}).setdefault(row['question_id'], {})[row['option']] = row['count']
+    return counts
+
+
+@sync_to_async
+def change_state(session_id, pending, from_status='active', **changes):
+    """
+    Writes `pending` answers, then applies `changes` to the session if it is still in
+    `from_status`. Returns (state, answer counts), or (None, None) when it was not.
+    """
+    if pending:
+        LiveAnswer.objects.bulk_create(pending, ignore_conflicts=True)
+    sessions = LiveSession.objects.filter(pk=session_id)
+    if not sessions.filter(status=from_status).update(version=F('version') + 1, **changes):
+        return None, None
+    state = sessions.values(*STATE_FIELDS).get()
+    return state, _answer_counts([session_id]).get(session_id, {})
+
+
+@sync_to_async
+def sync_rooms(pending, versions, hosted):
+    """
+    One poll: writes `pending` answers, then returns the states of the sessions in
+    `versions` ({session id: version applied}) that moved on, the answer counts a reveal
+    or the tally of a `hosted` session ({session id: open question id}) needs, connected
+    students of `hosted` sessions, and the scores of sessions that ended.
+    """
+    if pending:
+        LiveAnswer.objects.bulk_create(pending, ignore_conflicts=True)
+    states = {
+        state['id']: state
+        for state in LiveSession.objects.filter(pk__in=versions).values(*STATE_FIELDS)
+        if state['version'] > versions[state['id']]
+    }
+    revealed = [session_id for session_id, state in states.items() if state['revealed']]
+    tallied = {session_id: question_id for session_id, question_id in hosted.items() if question_id is not None}
+    counts = _answer_counts(revealed, tallied) if revealed or tallied else {}
+    students = dict(
+        LiveParticipant.objects.filter(session_id__in=hosted, connected=True)
+        .values_list('session_id').annotate(count=Count('id')).order_by()
+    ) if hosted else {}
+    ended = [session_id for session_id, state in states.items() if state['status'] == 'ended']
+    scores = {}
+    for session_id, user_id, score in LiveParticipant.objects.filter(session_id__in=ended).values_list(
+        'session_id', 'user_id', 'score'
+    ):
+        scores.setdefault(session_id, {})[user_id] = score
+    return states, counts, students, scores
+
+
+@sync_to_async
+def grade_session(session_id, mock_test_id, correct_options):
+    """
+    Writes one TestAttempt per student, all their UserAnswer rows, the item statistics
+    and the students' scores in a single transaction, and marks the session ended.
+    Returns (attempts written, state, {user id: score}).
+    """
+    with transaction.atomic():
+        session = LiveSession.objects.select_for_update().get(pk=session_id)
+        if session.status == 'ended':
+            return 0, None, {}
+        answers = {}  # user id: {question id: option}
+        participants = list(LiveParticipant.objects.filter(session_id=session_id))
+        for participant in participants:
+            answers[participant.user_id] = {}
+        for user_id, question_id, option in LiveAnswer.objects.filter(session_id=session_id).values_list(
+            'user_id', 'question_id', 'option'
+        ):
+            answers.setdefault(user_id, {})[question_id] = option
+
+        correct = dict(correct_options)
+        total = len(correct_options)
+        scores = {
+            user_id: int(sum(1 for qid, option in user_answers.items() if correct.get(qid) == option) / total * 100)
+            if total else 0
+            for user_id, user_answers in answers.items()
+        }
+        counters = ItemCounters()
+        for user_id, user_answers in answers.items():
+            for question_id, correct_option in correct_options:
+                counters.add(question_id, user_answers.get(question_id), correct_option, scores[user_id])
+        # Statistics first: backfill_item_stats relies on it (see item_stats.lock_all)
+        apply_item_stats(QuestionStatistics, counters)
+        attempts = [TestAttempt(user_id=uid, mock_test_id=mock_test_id, score=scores[uid]) for uid in answers]
+        if connection.features.can_return_rows_from_bulk_insert:
+            TestAttempt.objects.bulk_create(attempts)
+        else:
+            # MySQL can't return bulk-inserted keys, which the answers need
+            for attempt in attempts:
+                attempt.save()
+        UserAnswer.objects.bulk_create(
+            [
+                UserAnswer(attempt=attempt, question_id=qid, selected_option=option)
+                for attempt in attempts
+                for qid, option in answers[attempt.user_id].items()
+            ],
+            batch_size=1000,
+        )
+        for participant in participants:
+            participant.score = scores[participant.user_id]
+        LiveParticipant.objects.bulk_update(participants, ['score'], batch_size=1000)
+
+        session.status = 'ended'
+        session.version += 1
+        session.save(update_fields=['status', 'version'])
+    return len(attempts), {field: getattr(session, field) for field in STATE_FIELDS}, scores
+
+
+class LiveHub:
+    """
+    The Rooms of this process and the task that keeps them in step with the database.
+    """
+
+    def __init__(self):
+        self.rooms = {}    # code: Room
+        self.loading = {}  # code: task loading its Room, shared by students joining at once
+        self.poller = None
+        self.interval = None  # Current poll interval, backed off while nothing changes
+
+    def hurry(self):
+        """
+        Polls every POLL_SECONDS again, e.g. once a question opens and answers are expected.
+        """
+        self.interval = live_settings()['POLL_SECONDS']
+
+    def add(self, room):
+        self.rooms[room.code] = room
+        self.hurry()
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.create_task(self.poll())
+
+    async def open(self, code):
+        """
+        This process's Room of the active session `code`, or None.
+        """
+        room = self.rooms.get(code)
+        if room is not None:
+            return room
+        task = self.loading.get(code)
+        if task is None:
+            task = self.loading[code] = asyncio.create_task(self._load(code))
+            task.add_done_callback(lambda _: self.loading.pop(code, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, code):
+        session = await load_session(code)
+        if session is None:
+            return None
+        _, questions = await load_questions(session.mock_test_id)
+        room = Room(session, questions)
+        self.add(room)
+        return room
+
+    async def poll(self):
+        waited = 0
+        while self.rooms:
+            tick = live_settings()['POLL_SECONDS']
+            await asyncio.sleep(tick)
+            waited += tick
+            rooms = list(self.rooms.values())
+            if waited < self.interval and not any(room.pending for room in rooms):
+                continue
+            waited = 0
+            pending = {room.code: room.take_pending() for room in rooms}
+            answers = [answer for answers in pending.values() for answer in answers]
+            versions = {room.session_id: room.version for room in rooms}
+            hosted = {
+                room.session_id: room.current_question_id
+                for room in rooms if room.host is not None and room.status == 'active'
+            }
+            try:
+                states, counts, students, scores = await sync_rooms(answers, versions, hosted)
+            except DatabaseError:
+                for room in rooms:
+                    room.pending[:0] = pending[room.code]  # Retried on the next poll
+                continue
+            changed = bool(answers or states)
+            for room in rooms:
+                state = states.get(room.session_id)
+                if state is not None:
+                    room.apply(state, counts.get(room.session_id), scores.get(room.session_id))
+                if room.session_id in hosted and room.status == 'active':
+                    changed |= room.send_tally(counts.get(room.session_id, {}), students.get(room.session_id, 0))
+                if room.empty:
+                    self.rooms.pop(room.code, None)
+            if changed:
+                self.hurry()
+            else:
+                self.interval = min(2 * self.interval, live_settings()['IDLE_POLL_SECONDS'])
+
+
+hub = LiveHub()
+
+
+@sync_to_async
+def _user_from_cookies(headers):
+    cookie = SimpleCookie()
+    for name, value in headers:
+        if name == b'cookie':
+            cookie.load(value.decode('latin-1'))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_string(f"{settings.SESSION_ENGINE}.SessionStore")
+    user = get_user(SimpleNamespace(session=engine(morsel.value)))
+    return user if user.is_authenticated else None
+
+
+def _origin_allowed(headers):
+    # Browsers always send Origin on WebSocket handshakes; require it to be one of our hosts
+    origin = dict(headers).get(b'origin')
+    if origin is None:
+        return False
+    host = origin.decode('latin-1').split('://', 1)[-1]
+    domain, port = split_domain_port(host)
+    return validate_host(domain, settings.ALLOWED_HOSTS)
+
+
+async def _receive_json(receive):
+    """
+    Returns the next JSON message, or None once the client has disconnected.
+    """
+    while True:
+        event = await receive()
+        if event['type'] == 'websocket.disconnect':
+            return None
+        if event['type'] != 'websocket.receive':
+            continue
+        try:
+            message = json.loads(event.get('text') or event.get('bytes') or b'')
+        except ValueError:
+            continue
+        if isinstance(message, dict):
+            return message
+
+
+async def live_quiz_app(scope, receive, send):
+    """
+    ASGI application for /ws/live/ WebSocket connections.
+    """
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    path = scope.get('path', '')
+    host_match = HOST_PATH.match(path)
+    student_match = STUDENT_PATH.match(path)
+    headers = scope.get('headers', [])
+    # A pre-authenticated scope['user'] (from an auth middleware or the load test) is honoured
+    user = scope.get('user') or await _user_from_cookies(headers)
+
+    if not (host_match or student_match) or user is None or not _origin_allowed(headers):
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+
+    if host_match:
+        if not user.is_staff:
+            await send({'type': 'websocket.close', 'code': 4403})
+            return
+        mock_test, questions = await load_questions(int(host_match['mock_test_id']))
+        if mock_test is None or not questions:
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        await send({'type': 'websocket.accept'})
+        await run_host(mock_test, questions, user, send, receive)
+    else:
+        room = await hub.open(student_match['code'])
+        if room is None or room.status != 'active':
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        if not await register_student(room.session_id, user.id, live_settings()['MAX_STUDENTS']):
+            await send({'type': 'websocket.close', 'code': 4429})
+            return
+        await send({'type': 'websocket.accept'})
+        await run_student(room, user, send, receive)
+
+
+async def end_session(room):
+    """
+    Stops answers, waits for the other processes to write theirs, then grades.
+    """
+    state, _ = await change_state(room.session_id, room.take_pending(), status='ending')
+    if state is None:
+        return
+    room.apply(state)
+    # A backed-off process takes answers until its next poll, and writes them a tick later
+    await asyncio.sleep(live_settings()['IDLE_POLL_SECONDS'] + 2 * live_settings()['POLL_SECONDS'])
+    attempts, state, scores = await grade_session(
+        room.session_id, room.mock_test_id, [(q['id'], q['correct_option']) for q in room.questions]
+    )
+    if state is not None:
+        room.apply(state, scores=scores)
+    room.host.push_json({'type': 'ended', 'attempts': attempts})
+
+
+async def run_host(mock_test, questions, user, send, receive):
+    host = Connection(send, user)
+    session = await create_session(mock_test, user)
+    room = Room(session, questions)
+    room.host = host
+    live_hub = hub  # The hub this socket started on
+    live_hub.add(room)
+    host.push_json({'type': 'session', 'code': room.code, 'questions': len(questions)})
+    try:
+        while room.status == 'active':
+            message = await _receive_json(receive)
+            if message is None:
+                break
+            action = message.get('action')
+            if action == 'next':
+                if room.current + 1 >= len(questions):
+                    host.push_json({'type': 'error', 'error': 'No more questions.'})
+                    continue
+                state, counts = await change_state(
+                    room.session_id, room.take_pending(), current=room.current + 1, revealed=False
+                )
+                if state is not None:
+                    room.apply(state, counts)
+                    live_hub.hurry()  # Answers and a changing tally are expected
+            elif action == 'reveal':
+                if room.current < 0 or room.revealed:
+                    continue
+                state, counts = await change_state(room.session_id, room.take_pending(), revealed=True)
+                if state is not None:
+                    room.apply(state, counts)
+                    room.send_tally(counts, len(room.students))
+            elif action == 'end':
+                await end_session(room)
+    finally:
+        if room.status == 'active':
+            # Teacher disconnected mid-session: keep what was answered
+            await end_session(room)
+        room.host = None
+        host.close()
+        await host.wait_closed()
+
+
+async def run_student(room, user, send, receive):
+    student = Connection(send, user)
+    room.join(student)
+    try:
+        while not student.closed:
+            message = await _receive_json(receive)
+            if message is None:
+                break
+            if message.get('action') == 'answer':
+                try:
+                    question_id = int(message.get('question_id'))
+                except (TypeError, ValueError):
+                    question_id = None
+                error = room.answer(user.id, question_id, str(message.get('option', '')).upper())
+                student.push_json({'type': 'error', 'error': error} if error else {'type': 'ack', 'question_id': question_id})
+    finally:
+        if room.leave(student) and room.status == 'active':
+            await disconnect_student(room.session_id, user.id)
+        student.close()
+        await student.wait_closed()
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.retention import POLICIES, run_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive chat history, mock test answers and daily quiz attempts older than "
+        "RETENTION_SETTINGS['KEEP_DAYS'] into date-partitioned JSONL.gz files. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies', nargs='*', help=f"Policies to apply (default: all of {', '.join(POLICIES)}).")
+        parser.add_argument('--batch-size', type=int, help="Rows per archive/delete batch.")
+        parser.add_argument('--pause', type=float, help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows past policy.")
+
+    def handle(self, *args, **options):
+        names = options['policies']
+        unknown = [name for name in names if name not in POLICIES]
+        if unknown:
+            raise CommandError(f"Unknown policy: {', '.join(unknown)}")
+
+        results = run_retention(
+            names or None,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        verb = "would archive" if options['dry_run'] else "archived"
+        for name, count in results.items():
+            self.stdout.write(f"  {name}: {verb} {count} row(s) older than {POLICIES[name].keep_days} days")
+        if not options['dry_run']:
+            config = settings.RETENTION_SETTINGS
+            self.stdout.write(self.style.SUCCESS(f"Archive written to {config['STORAGE']}:{config['PREFIX']}/"))
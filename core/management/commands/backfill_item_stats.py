@@ -0,0 +1,124 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from core.item_stats import (
+    ItemCounters, daily_quiz_responses, lock_all, replace_all, roll_up_daily_quiz_attempts, test_responses,
+)
+from core.models import (
+    DailyQuiz, DailyQuizAttempt, DailyQuizStatistics, Question, QuestionStatistics,
+    TestAttempt, UserAnswer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild per-question item statistics from existing test and daily quiz attempts. "
+        "Test attempts are counted without locks, then the counters are replaced in one short "
+        "transaction that also counts the attempts graded meanwhile; daily quiz attempts are "
+        "recounted under the roll-up's locks, which submissions never wait on. Safe to run "
+        "against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['questions', 'daily-quiz'], help="Rebuild only one kind of item.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Attempts read per query.")
+
+    def handle(self, *args, **options):
+        if options['only'] in (None, 'questions'):
+            attempts, items = self.backfill_questions(options['batch_size'])
+            self.stdout.write(f"Questions: {attempts} attempts counted into {items} items")
+        if options['only'] in (None, 'daily-quiz'):
+            attempts, items = self.backfill_daily_quiz(options['batch_size'])
+            self.stdout.write(f"Daily quiz: {attempts} attempts counted into {items} items")
+
+    def rebuild(self, stats_model, item_model, attempt_model, count, batch_size):
+        """
+        Counts every attempt with `count(counters, attempts, after, last_pk)` and replaces the
+        counters. Attempts newer than the first pass are counted again under the table lock,
+        where graders wait for it and count their own attempts once it commits.
+        """
+        with transaction.atomic():
+            lock_all(stats_model, item_model)
+            last_pk = attempt_model.objects.aggregate(last=Max('pk'))['last'] or 0
+        counters = ItemCounters()
+        total = count(counters, 0, last_pk, batch_size)
+
+        with transaction.atomic():
+            lock_all(stats_model, item_model)
+            newest = attempt_model.objects.aggregate(last=Max('pk'))['last'] or 0
+            total += count(counters, last_pk, newest, batch_size)
+            replace_all(stats_model, counters)
+        return total, len(counters)
+
+    def batches(self, queryset, after, last_pk, batch_size):
+        position = after
+        while position < last_pk:
+            batch = list(queryset.filter(pk__gt=position, pk__lte=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            yield batch
+            position = batch[-1][0]
+
+    def backfill_questions(self, batch_size):
+        questions_by_test = {}
+
+        def count(counters, after, last_pk, batch_size):
+            total = 0
+            attempts = TestAttempt.objects.values_list('pk', 'mock_test_id', 'score')
+            for batch in self.batches(attempts, after, last_pk, batch_size):
+                missing = {test_id for _, test_id, _ in batch} - questions_by_test.keys()
+                for test_id in missing:
+                    questions_by_test[test_id] = []
+                for question_id, test_id, correct_option in Question.objects.filter(
+                    mock_test_id__in=missing
+                ).order_by('id').values_list('id', 'mock_test_id', 'correct_option'):
+                    questions_by_test[test_id].append((question_id, correct_option))
+
+                selected = {}
+                for attempt_id, question_id, option in UserAnswer.objects.filter(
+                    attempt_id__in=[pk for pk, _, _ in batch]
+                ).values_list('attempt_id', 'question_id', 'selected_option'):
+                    selected.setdefault(attempt_id, {})[question_id] = option
+
+                for attempt_id, test_id, score in batch:
+                    for item_id, option, correct_option in test_responses(
+                        questions_by_test[test_id], selected.get(attempt_id, {})
+                    ):
+                        counters.add(item_id, option, correct_option, score)
+                total += len(batch)
+            return total
+
+        return self.rebuild(QuestionStatistics, Question, TestAttempt, count, batch_size)
+
+    def backfill_daily_quiz(self, batch_size):
+        """
+        Recounts the attempts already rolled up, in one transaction: submissions never
+        lock these rows (see roll_up_daily_quiz_attempts), so holding them for the whole
+        count only delays the roll-up, which then counts the attempts left pending.
+        """
+        quizzes_by_date = {}
+        counters = ItemCounters()
+        total = 0
+        with transaction.atomic():
+            lock_all(DailyQuizStatistics, DailyQuiz)
+            attempts = DailyQuizAttempt.objects.filter(stats_recorded=True).values_list(
+                'pk', 'quiz_date', 'percent', 'answers'
+            )
+            last_pk = attempts.aggregate(last=Max('pk'))['last'] or 0
+            for batch in self.batches(attempts, 0, last_pk, batch_size):
+                missing = {quiz_date for _, quiz_date, _, _ in batch} - quizzes_by_date.keys()
+                for quiz_date in missing:
+                    quizzes_by_date[quiz_date] = []
+                for quiz_id, quiz_date, correct_option in DailyQuiz.objects.filter(
+                    quiz_date__in=missing
+                ).order_by('id').values_list('id', 'quiz_date', 'correct_option'):
+                    quizzes_by_date[quiz_date].append((quiz_id, correct_option))
+
+                for _, quiz_date, percent, answers in batch:
+                    for item_id, option, correct_option in daily_quiz_responses(quizzes_by_date[quiz_date], answers or []):
+                        counters.add(item_id, option, correct_option, percent)
+                total += len(batch)
+            replace_all(DailyQuizStatistics, counters)
+        total += roll_up_daily_quiz_attempts(batch_size)
+        return total, len(counters)
@@ -0,0 +1,43 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.compression import available_encodings, compress
+from core.models import InterviewQuestion, Keyword, Syllabus
+from core.serializers import InterviewQuestionSerializer, KeywordSerializer, SyllabusSerializer
+
+
+LEVELS = {
+    'gzip': range(1, 10),
+    'br': range(0, 12),
+}
+
+
+class Command(BaseCommand):
+    help = "Measure size and CPU cost of each gzip/Brotli level on the catalog API payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Compressions per level (default: 5).")
+
+    def handle(self, *args, **options):
+        payloads = {
+            'keywords': KeywordSerializer(Keyword.objects.all(), many=True).data,
+            'interview-questions': InterviewQuestionSerializer(InterviewQuestion.objects.all(), many=True).data,
+            'syllabus': SyllabusSerializer(Syllabus.objects.all(), many=True).data,
+        }
+        repeat = options['repeat']
+
+        for name, payload in payloads.items():
+            data = json.dumps(payload).encode('utf-8')
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {len(data)} bytes"))
+            for encoding in available_encodings():
+                for level in LEVELS[encoding]:
+                    started = time.process_time()
+                    for _ in range(repeat):
+                        body = compress(data, encoding, level)
+                    cpu_ms = (time.process_time() - started) * 1000 / repeat
+                    ratio = len(body) / len(data) if data else 0
+                    self.stdout.write(
+                        f"  {encoding:>4} {level:>2}  {len(body):>9} bytes  ratio {ratio:6.3f}  {cpu_ms:8.2f} ms"
+                    )
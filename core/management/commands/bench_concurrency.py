@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many concurrent connections a running deployment sustains. Run it once "
+        "against `gunicorn crackit_backend.wsgi:application -k sync` and once against the default "
+        "ASGI setup (gunicorn.conf.py) on the same machine and compare the tables. Point it at an "
+        "I/O-bound endpoint such as /api/ai-chat/ (pass the session cookie and CSRF header)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="http:// URL to load.")
+        parser.add_argument('--connections', default='10,50,100,200,400',
+                            help="Comma-separated concurrency levels (default: 10,50,100,200,400).")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per level.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', default='', help="Request body (sent as application/json).")
+        parser.add_argument('--header', action='append', default=[], help="Extra 'Name: value' header.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError("Only plain http:// URLs are supported; benchmark the app server directly.")
+        levels = [int(level) for level in options['connections'].split(',')]
+
+        body = options['data'].encode('utf-8')
+        headers = [
+            f"{options['method']} {url.path or '/'}{'?' + url.query if url.query else ''} HTTP/1.1",
+            f"Host: {url.netloc}",
+            "Connection: close",
+            *options['header'],
+        ]
+        if body:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        request_bytes = ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+        target = (url.hostname, url.port or 80)
+        self.stdout.write(f"{'conns':>6} {'req/s':>8} {'ok':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for level in levels:
+            ok, errors, latencies, elapsed = asyncio.run(
+                self.run_level(target, request_bytes, level, options['duration'], options['timeout'])
+            )
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000 if latencies else 0
+            p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000 if latencies else 0
+            self.stdout.write(f"{level:>6} {ok / elapsed:>8.1f} {ok:>7} {errors:>7} {p50:>8.1f} {p95:>8.1f}")
+
+    async def run_level(self, target, request_bytes, connections, duration, timeout):
+        deadline = time.perf_counter() + duration
+        results = {'ok': 0, 'errors': 0, 'latencies': []}
+
+        async def client():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self.request(target, request_bytes), timeout)
+                except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                    results['errors'] += 1
+                    continue
+                if 200 <= status < 400:
+                    results['ok'] += 1
+                    results['latencies'].append(time.perf_counter() - started)
+                else:
+                    results['errors'] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(connections)))
+        return results['ok'], results['errors'], results['latencies'], time.perf_counter() - started
+
+    async def request(self, target, request_bytes):
+        reader, writer = await asyncio.open_connection(*target)
+        try:
+            writer.write(request_bytes)
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()  # Connection: close, so the body ends at EOF
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
@@ -0,0 +1,92 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from core.models import DailyQuiz, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a peak minute of daily quiz submissions (with client retries) and report "
+        "throughput, latency and queries per submission. Run against a staging database: "
+        "temporary users, and today's quiz if none exists, are created and removed again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--retry-rate', type=float, default=0.2, help="Fraction of students that resubmit.")
+
+    def handle(self, *args, **options):
+        today = localdate()
+        prefix = f"bench-dq-{uuid.uuid4().hex[:8]}-"
+        created_quiz = not DailyQuiz.objects.filter(quiz_date=today).exists()
+        if created_quiz:
+            DailyQuiz.objects.bulk_create([
+                DailyQuiz(question=f"Benchmark question {i}", option_a='A', option_b='B', option_c='C',
+                          option_d='D', correct_option='ABCD'[i % 4], quiz_date=today)
+                for i in range(10)
+            ])
+        total_questions = DailyQuiz.objects.filter(quiz_date=today).count()
+        User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(options['students'])])
+        users = list(User.objects.filter(username__startswith=prefix))
+        url = reverse('submit_daily_quiz')
+
+        def submit(user):
+            client = Client()
+            client.force_login(user)
+            body = json.dumps({'answers': [random.choice('ABCD') for _ in range(total_questions)]})
+            key = uuid.uuid4().hex
+            timings, statuses = [], []
+            attempts = 2 if random.random() < options['retry_rate'] else 1
+            first = None
+            for _ in range(attempts):
+                started = time.perf_counter()
+                response = client.post(url, body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+                timings.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+                payload = response.json()
+                if first is None:
+                    first = payload
+                elif payload != first:
+                    statuses.append('retry-mismatch')
+            connection.close()
+            return timings, statuses
+
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                sample = Client()
+                sample.force_login(users[0])
+                login_queries = len(queries)
+                sample.post(url, json.dumps({'answers': ['A'] * total_questions}),
+                            content_type='application/json', HTTP_IDEMPOTENCY_KEY='sample')
+            submit_queries = len(queries) - login_queries
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                results = list(pool.map(submit, users[1:]))
+            elapsed = time.perf_counter() - started
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+            if created_quiz:
+                DailyQuiz.objects.filter(quiz_date=today).delete()
+            connections.close_all()
+
+        timings = sorted(t for result in results for t in result[0])
+        statuses = [s for result in results for s in result[1]]
+        self.stdout.write(f"Submissions: {len(timings)} from {len(results)} students in {elapsed:.2f}s "
+                          f"({len(timings) / elapsed:.0f}/s, {len(timings) / elapsed * 60:.0f}/min)")
+        self.stdout.write(f"Latency: p50 {statistics.median(timings) * 1000:.1f} ms, "
+                          f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms")
+        self.stdout.write(f"Queries per submission (including session and user lookup): {submit_queries}")
+        self.stdout.write(f"Status codes: { {s: statuses.count(s) for s in set(statuses)} }")
@@ -0,0 +1,126 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from core.exams import expire_sessions, flush_answers, start_session
+from core.models import ExamSession, MockTest, Question, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate thousands of students autosaving a mock test at once: every student "
+        "changes answers for --rounds rounds, the write-behind pass runs between rounds, "
+        "then everyone submits. Reports autosave throughput and latency, queries per "
+        "autosave and database writes compared with saving every click. Run against a "
+        "staging database with EXAM_SESSIONS['CACHE'] set as in production: a temporary "
+        "mock test and users are created and removed again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--rounds', type=int, default=5, help="Autosaves per student.")
+        parser.add_argument('--threads', type=int, default=32)
+
+    def handle(self, *args, **options):
+        prefix = f"bench-exam-{uuid.uuid4().hex[:8]}-"
+        mock_test = MockTest.objects.create(subject=f"{prefix}test", description="Benchmark", date=localdate())
+        Question.objects.bulk_create([
+            Question(mock_test=mock_test, question_text=f"Benchmark question {i}", option_a='A', option_b='B',
+                     option_c='C', option_d='D', correct_option='ABCD'[i % 4])
+            for i in range(options['questions'])
+        ])
+        question_ids = list(mock_test.questions.values_list('id', flat=True))
+        User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(options['students'])])
+        users = list(User.objects.filter(username__startswith=prefix))
+
+        students = []
+        for user in users:
+            session, _ = start_session(user, mock_test)
+            client = Client()
+            client.force_login(user)
+            students.append({'client': client, 'session': session.pk, 'answers': {}, 'seq': 0})
+
+        def change_answers(student):
+            for question_id in random.sample(question_ids, k=min(3, len(question_ids))):
+                student['answers'][str(question_id)] = random.choice('ABCD')
+            student['seq'] += 1
+            return json.dumps({'answers': student['answers'], 'seq': student['seq']})
+
+        def save(student):
+            body = change_answers(student)
+            url = reverse('exam-session-answers', args=[student['session']])
+            started = time.perf_counter()
+            response = student['client'].put(url, body, content_type='application/json')
+            elapsed = time.perf_counter() - started
+            connection.close()
+            return elapsed, response.status_code
+
+        def submit(student):
+            body = json.dumps({'answers': student['answers'], 'session': student['session'], 'seq': student['seq'] + 1})
+            started = time.perf_counter()
+            response = student['client'].post(
+                reverse('mocktest-submit', args=[mock_test.pk]), body, content_type='application/json'
+            )
+            elapsed = time.perf_counter() - started
+            connection.close()
+            return elapsed, response.status_code
+
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                sample = students[0]
+                sample['client'].put(
+                    reverse('exam-session-answers', args=[sample['session']]),
+                    change_answers(sample), content_type='application/json',
+                )
+            autosave_queries = len(queries)
+
+            timings, statuses, flushes = [], [], []
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                for _ in range(options['rounds']):
+                    for elapsed, status in pool.map(save, students):
+                        timings.append(elapsed)
+                        statuses.append(status)
+                    flush_started = time.perf_counter()
+                    flushes.append((flush_answers(), time.perf_counter() - flush_started))
+            elapsed = time.perf_counter() - started
+
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                submits = list(pool.map(submit, students))
+            leftover = expire_sessions()
+            graded = ExamSession.objects.filter(mock_test=mock_test, status='submitted').count()
+        finally:
+            mock_test.delete()
+            User.objects.filter(username__startswith=prefix).delete()
+            connections.close_all()
+
+        timings.sort()
+        self.stdout.write(f"Autosaves: {len(timings)} from {len(students)} students in {elapsed:.2f}s "
+                          f"({len(timings) / elapsed:.0f}/s, including write-behind passes)")
+        self.stdout.write(f"Autosave latency: p50 {statistics.median(timings) * 1000:.1f} ms, "
+                          f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms")
+        self.stdout.write(f"Queries per autosave (session and user lookup plus {settings.EXAM_SESSIONS['CACHE']!r} "
+                          f"cache): {autosave_queries}")
+        for written, seconds in flushes:
+            self.stdout.write(f"Write-behind pass: {written} session(s) in {seconds * 1000:.0f} ms")
+        clicks = len(timings) * 3
+        self.stdout.write(f"ExamSession rows written: {sum(w for w, _ in flushes)}, "
+                          f"vs {clicks} UserAnswer writes saving every click")
+        submit_timings = sorted(t for t, _ in submits)
+        self.stdout.write(f"Submit latency: p50 {statistics.median(submit_timings) * 1000:.1f} ms, "
+                          f"p95 {submit_timings[int(len(submit_timings) * 0.95) - 1] * 1000:.1f} ms; "
+                          f"{graded} graded, {leftover} left to expire")
+        codes = statuses + [status for _, status in submits]
+        self.stdout.write(f"Status codes: { {s: codes.count(s) for s in set(codes)} }")
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.timezone import localdate
+
+from core.live import live_quiz_app
+from core.models import MockTest, Question, TestAttempt, User, UserAnswer
+
+
+class SimulatedSocket:
+    """
+    Drives core.live's ASGI WebSocket app directly, without a network stack in between.
+    """
+
+    def __init__(self, path, user):
+        self.scope = {'type': 'websocket', 'path': path, 'headers': [(b'origin', b'http://localhost')], 'user': user}
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        self.task = None
+
+    async def _receive(self):
+        return await self.inbox.get()
+
+    async def _send(self, event):
+        self.outbox.put_nowait((time.perf_counter(), event))
+
+    def connect(self):
+        self.inbox.put_nowait({'type': 'websocket.connect'})
+        self.task = asyncio.create_task(live_quiz_app(self.scope, self._receive, self._send))
+
+    def send_json(self, message):
+        self.inbox.put_nowait({'type': 'websocket.receive', 'text': json.dumps(message)})
+
+    def disconnect(self):
+        self.inbox.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+
+    async def expect(self, message_type, **match):
+        while True:
+            received_at, event = await self.outbox.get()
+            if event['type'] == 'websocket.close':
+                raise RuntimeError(f"Socket closed with {event.get('code')} while waiting for {message_type}")
+            if event['type'] != 'websocket.send':
+                continue
+            message = json.loads(event['text'])
+            if message['type'] == message_type and all(message.get(k) == v for k, v in match.items()):
+                return received_at, message
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test live classroom mode: one teacher and hundreds of simulated students run a "
+        "session in-process, reporting question fan-out and answer latency and the bulk flush "
+        "time. Run against a staging database: the users and mock test it creates are removed again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=300)
+        parser.add_argument('--questions', type=int, default=10)
+
+    def handle(self, *args, **options):
+        prefix = f"bench-live-{uuid.uuid4().hex[:8]}-"
+        mock_test = MockTest.objects.create(subject=f"{prefix}test", description="Live quiz benchmark", date=localdate())
+        Question.objects.bulk_create([
+            Question(mock_test=mock_test, question_text=f"Benchmark question {i}", option_a='A', option_b='B',
+                     option_c='C', option_d='D', correct_option='ABCD'[i % 4])
+            for i in range(options['questions'])
+        ])
+        User.objects.bulk_create(
+            [User(username=f"{prefix}teacher", is_staff=True)]
+            + [User(username=f"{prefix}{i}") for i in range(options['students'])]
+        )
+        teacher = User.objects.get(username=f"{prefix}teacher")
+        students = list(User.objects.filter(username__startswith=prefix, is_staff=False))
+
+        try:
+            report = asyncio.run(self.run_session(mock_test, teacher, students))
+            attempts = TestAttempt.objects.filter(mock_test=mock_test).count()
+            answers = UserAnswer.objects.filter(attempt__mock_test=mock_test).count()
+        finally:
+            MockTest.objects.filter(pk=mock_test.pk).delete()
+            User.objects.filter(username__startswith=prefix).delete()
+            connections.close_all()
+
+        fanout, acks = report['fanout'], report['acks']
+        self.stdout.write(f"Students: {len(students)}, questions: {options['questions']}")
+        self.stdout.write(f"Join: {report['join'] * 1000:.1f} ms for all students")
+        self.stdout.write(f"Question fan-out: p50 {statistics.median(fanout) * 1000:.2f} ms, "
+                          f"p95 {percentile(fanout, 0.95) * 1000:.2f} ms, max {max(fanout) * 1000:.2f} ms")
+        self.stdout.write(f"Answer ack: p50 {statistics.median(acks) * 1000:.2f} ms, "
+                          f"p95 {percentile(acks, 0.95) * 1000:.2f} ms")
+        self.stdout.write(f"Teacher tally complete after last answer: p50 "
+                          f"{statistics.median(report['tally']) * 1000:.1f} ms")
+        self.stdout.write(f"End of session flush: {report['flush'] * 1000:.1f} ms "
+                          f"({attempts} attempts, {answers} answers written)")
+
+    async def run_session(self, mock_test, teacher, students):
+        host = SimulatedSocket(f"/ws/live/host/{mock_test.pk}/", teacher)
+        host.connect()
+        _, session = await host.expect('session')
+
+        sockets = [SimulatedSocket(f"/ws/live/{session['code']}/", student) for student in students]
+        started = time.perf_counter()
+        for socket in sockets:
+            socket.connect()
+        await asyncio.gather(*(socket.expect('joined') for socket in sockets))
+        report = {'join': time.perf_counter() - started, 'fanout': [], 'acks': [], 'tally': []}
+
+        async def answer(socket, question_id):
+            await asyncio.sleep(random.random() * 0.05)
+            sent_at = time.perf_counter()
+            socket.send_json({'action': 'answer', 'question_id': question_id, 'option': random.choice('ABCD')})
+            received_at, _ = await socket.expect('ack', question_id=question_id)
+            report['acks'].append(received_at - sent_at)
+            return received_at
+
+        for index in range(session['questions']):
+            sent_at = time.perf_counter()
+            host.send_json({'action': 'next'})
+            received = await asyncio.gather(*(socket.expect('question', index=index) for socket in sockets))
+            report['fanout'] += [received_at - sent_at for received_at, _ in received]
+
+            question_id = received[0][1]['question']['id']
+            last_answer = max(await asyncio.gather(*(answer(socket, question_id) for socket in sockets)))
+            tally_at, _ = await host.expect('tally', index=index, answered=len(sockets))
+            report['tally'].append(tally_at - last_answer)
+
+            host.send_json({'action': 'reveal'})
+            await asyncio.gather(*(socket.expect('reveal', index=index) for socket in sockets))
+
+        sent_at = time.perf_counter()
+        host.send_json({'action': 'end'})
+        ended_at, _ = await host.expect('ended')
+        report['flush'] = ended_at - sent_at
+        await asyncio.gather(*(socket.expect('score') for socket in sockets))
+
+        for socket in [host, *sockets]:
+            socket.disconnect()
+        await asyncio.gather(*(socket.task for socket in [host, *sockets]))
+        return report
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.models import InterviewQuestion, Keyword, MockTest, Question
+from core.renderers import FastJSONRenderer
+from core.serializers import (
+    InterviewQuestionSerializer, InterviewQuestionValuesSerializer, KeywordSerializer,
+    KeywordValuesSerializer, QuestionSerializer, QuestionValuesSerializer,
+)
+
+
+class ValuesList(list):
+    """
+    In-memory stand-in for a `.values()` queryset, so only serialization is measured.
+    """
+
+    def values(self, *fields):
+        return ({field: row[field] for field in fields} for row in self)
+
+
+def keyword_rows(count):
+    return [{
+        'id': i, 'subject': 'History', 'title': f"Chapter {i % 40}", 'word': f"word {i}",
+        'meaning': "Multi-line meaning of the keyword.\nSecond line with more detail. " * 3,
+    } for i in range(count)]
+
+
+def interview_rows(count):
+    departments = [key for key, _ in InterviewQuestion.DEPARTMENT_CHOICES]
+    return [{
+        'id': i, 'department': departments[i % len(departments)],
+        'question': f"Interview question number {i}?", 'answer': "A reasonably long model answer. " * 6,
+    } for i in range(count)]
+
+
+def question_rows(count):
+    return [{
+        'id': i, 'mock_test_id': 1, 'question_text': f"Question {i}: which option is correct?",
+        'option_a': "First option", 'option_b': "Second option", 'option_c': "Third option",
+        'option_d': "Fourth option", 'correct_option': 'A',
+    } for i in range(count)]
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer + JSONRenderer against the .values() fast path + FastJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows per run (default: 10000).")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the best is reported.")
+
+    def best_of(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        count, repeat = options['rows'], options['repeat']
+        mock_test = MockTest(id=1, subject='Bench', description='', date=None)
+        cases = [
+            ('Keyword', Keyword, keyword_rows(count), KeywordSerializer, KeywordValuesSerializer),
+            ('InterviewQuestion', InterviewQuestion, interview_rows(count),
+             InterviewQuestionSerializer, InterviewQuestionValuesSerializer),
+            ('Question', Question, question_rows(count), QuestionSerializer, QuestionValuesSerializer),
+        ]
+        json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        scale = 10000 / count
+
+        self.stdout.write(f"Best of {repeat} runs, reported as ms per 10k rows")
+        for name, model, rows, serializer_class, values_serializer_class in cases:
+            instances = [model(**row) for row in rows]
+            if model is Question:
+                for instance in instances:
+                    instance.mock_test = mock_test
+            values = ValuesList(rows)
+
+            slow = self.best_of(repeat, lambda: json_renderer.render(serializer_class(instances, many=True).data))
+            fast = self.best_of(repeat, lambda: fast_renderer.render(values_serializer_class().rows(values)))
+            self.stdout.write(
+                f"  {name:<18} serializer {slow * 1000 * scale:9.1f} ms   "
+                f"values fast path {fast * 1000 * scale:8.1f} ms   ({slow / fast:5.1f}x)"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.assets import build_assets, bundle_dir
+
+
+class Command(BaseCommand):
+    help = "Extract inline template CSS/JS into hashed, minified, precompressed bundles."
+
+    def handle(self, *args, **options):
+        manifest = build_assets()
+        for filename in manifest['files']:
+            self.stdout.write(f"  {filename}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(manifest['files'])} bundle(s) for {len(manifest['blocks'])} inline block(s) in {bundle_dir()}"
+        ))
@@ -0,0 +1,66 @@
+from itertools import combinations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core import dedup
+from core.models import NearDuplicateBucket, NearDuplicateSignature
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the near-duplicate index of questions and daily quiz questions. Saves keep "
+        "it current afterwards; rerun after bulk loads that bypass save() or after changing "
+        "the MinHash parameters in core/dedup.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=sorted(dedup.KINDS), help="Rebuild only one kind of item.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Items indexed per query.")
+        parser.add_argument('--report', action='store_true',
+                            help="List likely duplicates already in the bank instead of rebuilding.")
+
+    def handle(self, *args, **options):
+        if options['report']:
+            self.report()
+            return
+
+        for kind in [options['only']] if options['only'] else dedup.KINDS:
+            model, _ = dedup.KINDS[kind]
+            NearDuplicateSignature.objects.filter(kind=kind).delete()
+            NearDuplicateBucket.objects.filter(kind=kind).delete()
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+                if not batch:
+                    break
+                dedup.index_items(kind, batch)
+                total += len(batch)
+                last_pk = batch[-1].pk
+            self.stdout.write(f"Indexed {total} {model._meta.verbose_name_plural}")
+
+    def report(self):
+        threshold = settings.QUESTION_DEDUP['THRESHOLD']
+        shared = NearDuplicateBucket.objects.values('key').annotate(n=Count('id')).filter(n__gt=1).values('key')
+        members = {}
+        for kind, item_id, key in NearDuplicateBucket.objects.filter(key__in=shared).values_list('kind', 'item_id', 'key'):
+            members.setdefault(key, []).append((kind, item_id))
+
+        items = {item for group in members.values() for item in group}
+        signatures = {
+            (kind, item_id): dedup.unpack(data)
+            for kind, item_id, data in NearDuplicateSignature.objects.values_list('kind', 'item_id', 'signature')
+            if (kind, item_id) in items
+        }
+        pairs = {}
+        for group in members.values():
+            for a, b in combinations(sorted(group), 2):
+                if (a, b) not in pairs and a in signatures and b in signatures:
+                    pairs[(a, b)] = dedup.similarity(signatures[a], signatures[b])
+
+        found = sorted(((score, a, b) for (a, b), score in pairs.items() if score >= threshold), reverse=True)
+        for score, a, b in found:
+            self.stdout.write(f"{score:.0%}  {a[0]} {a[1]}  ~  {b[0]} {b[1]}")
+        self.stdout.write(f"{len(found)} likely duplicate pair(s) at {threshold:.0%} similarity or more")
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import MockTest
+from core.packs import build_pack
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the question pack of every mock test ahead of the first request. Packs are "
+        "rebuilt on demand after edits, so this is only needed to warm them after a deploy "
+        "or after bulk loads that bypass save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tests', nargs='*', type=int, help="Mock test ids to build (default: all).")
+
+    def handle(self, *args, **options):
+        test_ids = options['tests'] or MockTest.objects.order_by('pk').values_list('pk', flat=True)
+        built = 0
+        for test_id in test_ids:
+            version = build_pack(test_id)
+            if version is None:
+                self.stderr.write(f"  {test_id}: no such mock test")
+                continue
+            built += 1
+            self.stdout.write(f"  {test_id}: {version}")
+        self.stdout.write(self.style.SUCCESS(f"Built {built} pack(s) in {settings.QUESTION_PACKS['DIR']}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.shells import SHELL_PAGES, build_shells, shell_dir
+
+
+class Command(BaseCommand):
+    help = "Pre-render the static content pages to compressed HTML shells."
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='*', help="Shell names to build (default: all).")
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        unknown = [page for page in pages if page not in SHELL_PAGES]
+        if unknown:
+            raise CommandError(f"Unknown shell(s): {', '.join(unknown)}. Choose from: {', '.join(SHELL_PAGES)}")
+
+        manifest = build_shells(pages or None)
+        for name in pages or SHELL_PAGES:
+            self.stdout.write(f"  {name}: {manifest[name]['file']} ({manifest[name]['etag']})")
+        self.stdout.write(self.style.SUCCESS(f"Built {len(pages or SHELL_PAGES)} shell(s) in {shell_dir()}"))
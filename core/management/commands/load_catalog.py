@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_import import BATCH_SIZE, CATALOGS, FORMATS, CatalogFileError, import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert a catalog (keywords, interview questions, formulas, syllabus) from a CSV or "
+        "JSON Lines file, matching rows on their natural key: subject + word, department + "
+        "question, subject + heading, board + class_level + subject. Only new and changed "
+        "rows are written. Columns are the model's field names, as in the admin's export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('catalog', choices=sorted(CATALOGS))
+        parser.add_argument('path', help="File to load, or - for stdin.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Default: from the file extension (.jsonl, otherwise csv).")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change, then roll back.")
+
+    def handle(self, *args, **options):
+        catalog = CATALOGS[options['catalog']]
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        started = time.perf_counter()
+        try:
+            if path == '-':
+                result = import_catalog(catalog, sys.stdin.buffer, file_format, options['dry_run'], options['batch_size'])
+            else:
+                with open(path, 'rb') as f:
+                    result = import_catalog(catalog, f, file_format, options['dry_run'], options['batch_size'])
+        except (OSError, CatalogFileError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for line, message in result.errors:
+            self.stderr.write(f"  line {line}: {message}")
+        if result.skipped > len(result.errors):
+            self.stderr.write(f"  ... and {result.skipped - len(result.errors)} more")
+        prefix = "Dry run, nothing saved: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{catalog.name}: {result.summary()} in {elapsed:.2f}s"))
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import PreviousPaper, Syllabus
+from core.storage import document_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the paper and syllabus PDFs referenced in the database from local disk to "
+        "STORAGES['documents'] (object storage, see OBJECT_STORAGE), in parallel. Files keep "
+        "their names, so no rows change; a file already there with the same size is skipped, "
+        "which makes the command safe to re-run after an interruption. Run it before "
+        "switching traffic to object storage, and once more after to catch late uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.MEDIA_ROOT),
+                            help="Directory the files are in now (default: MEDIA_ROOT).")
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--dry-run', action='store_true', help="List what would be copied.")
+
+    def handle(self, *args, **options):
+        target = document_storage()
+        if isinstance(target, FileSystemStorage):
+            raise CommandError("STORAGES['documents'] is the local disk; set OBJECT_STORAGE_BUCKET first.")
+        source = FileSystemStorage(location=options['source'])
+
+        names = set(PreviousPaper.objects.exclude(file='').values_list('file', flat=True))
+        names |= set(Syllabus.objects.exclude(pdf='').exclude(pdf__isnull=True).values_list('pdf', flat=True))
+
+        def move(name):
+            try:
+                size = source.size(name)
+            except OSError:
+                return name, 'missing', 0
+            if target.exists(name) and target.size(name) == size:
+                return name, 'present', 0
+            if options['dry_run']:
+                return name, 'copy', size
+            with source.open(name) as f:
+                target.save(name, f)
+            return name, 'copied', size
+
+        started = time.perf_counter()
+        counts = {}
+        copied_bytes = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for future in as_completed([pool.submit(move, name) for name in sorted(names)]):
+                name, outcome, size = future.result()
+                counts[outcome] = counts.get(outcome, 0) + 1
+                copied_bytes += size
+                if outcome in ('missing', 'copy'):
+                    (self.stderr if outcome == 'missing' else self.stdout).write(f"  {outcome}: {name}")
+        elapsed = time.perf_counter() - started
+
+        summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(counts.items())) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(names)} file(s): {summary}; {copied_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+            f"({copied_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)"
+        ))
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.invalidation import bus as invalidation_bus
+from core.reports import claim_job, prune_reports, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Background worker rendering queued PDF reports (ReportJob) into REPORTS['STORAGE']. "
+        "Run one or more alongside the web process; workers never pick the same job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty.")
+        parser.add_argument('--prune', action='store_true',
+                            help="Delete reports older than REPORTS['KEEP_DAYS'] and exit.")
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            self.stdout.write(f"Pruned {prune_reports()} report(s)")
+            return
+
+        poll = settings.REPORTS['POLL_SECONDS']
+        last_requeue = 0.0
+        while True:
+            close_old_connections()
+            if invalidation_bus.due():
+                invalidation_bus.poll()
+            if time.monotonic() - last_requeue > poll * 30:
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale job(s)")
+                last_requeue = time.monotonic()
+
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(poll)
+                continue
+
+            run_job(job)
+            if job.status == 'done':
+                self.stdout.write(f"Rendered {job.kind} report {job.digest[:12]} in {job.render_ms} ms ({job.size} bytes)")
+            else:
+                self.stderr.write(f"Report {job.digest[:12]} {job.status} after try {job.tries}: {job.error}")
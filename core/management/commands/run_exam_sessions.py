@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.exams import expire_sessions, flush_answers
+from core.invalidation import bus as invalidation_bus
+
+
+class Command(BaseCommand):
+    help = (
+        "Background worker for exam sessions: writes autosaved answers from the cache back "
+        "to the database every EXAM_SESSIONS['FLUSH_SECONDS'] and grades sessions left open "
+        "past their deadline. Run one alongside the web process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single pass and exit (for cron).")
+
+    def handle(self, *args, **options):
+        interval = settings.EXAM_SESSIONS['FLUSH_SECONDS']
+        while True:
+            started = time.monotonic()
+            close_old_connections()
+            # Answer keys are cached per process, like in the web processes
+            if invalidation_bus.due():
+                invalidation_bus.poll()
+            written = flush_answers()
+            expired = expire_sessions()
+            if written or expired:
+                self.stdout.write(
+                    f"Saved answers of {written} session(s), graded {expired} expired session(s) "
+                    f"in {(time.monotonic() - started) * 1000:.0f} ms"
+                )
+            if options['once']:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,138 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .compression import (
+    CompressedBodyCache, astream_compress, negotiate_encoding, stats, stream_compress, timed_compress,
+)
+from .invalidation import bus as invalidation_bus
+
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'text/',
+)
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip response compression.
+
+    Responses under COMPRESSION['CACHED_PATHS'] (the immutable catalog endpoints) are
+    compressed once per content version at the static levels and served from a
+    per-process cache afterwards. Everything else is compressed at the cheaper dynamic
+    levels, incrementally for streaming responses. Responses that may hold a secret (the
+    CSRF token, a fresh session) are sent uncompressed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.COMPRESSION
+        self.cache = CompressedBodyCache(self.config['CACHE_MAX_BYTES'])
+        # Async-capable so ASGI requests don't hop to a thread just for this middleware
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming or not self.should_compress(response):
+            return self.process_response(request, response)  # At most wraps the iterator
+        # Compressing a body is CPU-bound: done on a worker thread, not the event loop
+        return await sync_to_async(self.process_response, thread_sensitive=False)(request, response)
+
+    def process_response(self, request, response):
+        if not self.should_compress(response) or self.reveals_secret(request, response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            level = self.config['DYNAMIC_LEVELS'][encoding]
+            stream = astream_compress if response.is_async else stream_compress
+            response.streaming_content = stream(response.streaming_content, encoding, level)
+            del response['Content-Length']
+        else:
+            body = self.compressed_body(request, response, encoding)
+            if body is None:
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def should_compress(self, response):
+        if response.has_header('Content-Encoding') or response.status_code != 200:
+            return False
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        return response.streaming or len(response.content) >= self.config['MIN_SIZE']
+
+    def reveals_secret(self, request, response):
+        # BREACH: the compressed size of a body holding a secret next to reflected input
+        # leaks the secret. Pages that render the CSRF token mark it for a cookie update,
+        # and logins set the session cookie; both go out uncompressed.
+        return bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE')) or settings.SESSION_COOKIE_NAME in response.cookies
+
+    def is_cacheable(self, request):
+        return request.method == 'GET' and request.path.startswith(tuple(self.config['CACHED_PATHS']))
+
+    def compressed_body(self, request, response, encoding):
+        content = response.content
+        if not self.is_cacheable(request):
+            body = timed_compress(content, encoding, self.config['DYNAMIC_LEVELS'][encoding], 'dynamic')
+        else:
+            # The body digest is the content version: these bodies only change on admin edits
+            version = hashlib.blake2b(content, digest_size=16).hexdigest()
+            key = (request.get_full_path(), version, encoding)
+            body = self.cache.get(key)
+            stats.record_cache(body is not None)
+            if body is None:
+                body = timed_compress(content, encoding, self.config['STATIC_LEVELS'][encoding], 'cached')
+                self.cache.set(key, body)
+        return body if len(body) < len(content) else None
+
+
+class InvalidationMiddleware:
+    """
+    Applies the invalidation events other processes published (core/invalidation.py)
+    before the request is handled, polling at most every INVALIDATION['POLL_SECONDS'].
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if invalidation_bus.due():
+            invalidation_bus.poll()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if invalidation_bus.due():
+            await sync_to_async(invalidation_bus.poll)()
+        return await self.get_response(request)
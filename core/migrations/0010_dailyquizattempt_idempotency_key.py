@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_alter_dailyquiz_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dailyquizattempt',
+            options={'ordering': ['-quiz_date', '-attempted_at'], 'verbose_name': 'Daily Quiz Attempt'},
+        ),
+        migrations.AddField(
+            model_name='dailyquizattempt',
+            name='idempotency_key',
+            field=models.CharField(blank=True, default='', help_text='Client-supplied key; a retried submission with the same key gets the original result', max_length=64),
+        ),
+    ]
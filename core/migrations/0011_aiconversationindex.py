@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_index(apps, schema_editor):
+    AIChatHistory = apps.get_model('core', 'AIChatHistory')
+    AIConversationIndex = apps.get_model('core', 'AIConversationIndex')
+    batch = []
+    for history in AIChatHistory.objects.order_by('pk').iterator(chunk_size=500):
+        messages = history.messages or []
+        first_user = next((m.get('content') for m in messages if m.get('role') == 'user'), '')
+        last = messages[-1].get('content') if messages else ''
+        batch.append(AIConversationIndex(
+            chat_id=history.pk,
+            user_id=history.user_id,
+            conversation_id=history.conversation_id,
+            title=str(first_user or '')[:100],
+            last_message_preview=str(last or '')[:160],
+            message_count=len(messages),
+            updated_at=history.timestamp,
+        ))
+        if len(batch) >= 500:
+            AIConversationIndex.objects.bulk_create(batch)
+            batch = []
+    AIConversationIndex.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_dailyquizattempt_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIConversationIndex',
+            fields=[
+                ('chat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='index_entry', serialize=False, to='core.aichathistory')),
+                ('conversation_id', models.CharField(blank=True, max_length=36, null=True)),
+                ('title', models.CharField(blank=True, max_length=100)),
+                ('last_message_preview', models.CharField(blank=True, max_length=160)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated_at', '-chat'],
+                'indexes': [models.Index(fields=['user', '-updated_at', '-chat'], name='core_aiconv_user_updated_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_aiconversationindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyQuizStatistics',
+            fields=[
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('option_a_count', models.PositiveIntegerField(default=0)),
+                ('option_b_count', models.PositiveIntegerField(default=0)),
+                ('option_c_count', models.PositiveIntegerField(default=0)),
+                ('option_d_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveBigIntegerField(default=0)),
+                ('score_sq_sum', models.PositiveBigIntegerField(default=0)),
+                ('correct_score_sum', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.dailyquiz')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily quiz statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('option_a_count', models.PositiveIntegerField(default=0)),
+                ('option_b_count', models.PositiveIntegerField(default=0)),
+                ('option_c_count', models.PositiveIntegerField(default=0)),
+                ('option_d_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveBigIntegerField(default=0)),
+                ('score_sq_sum', models.PositiveBigIntegerField(default=0)),
+                ('correct_score_sum', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.question')),
+            ],
+            options={
+                'verbose_name_plural': 'Question statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NearDuplicateBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('question', 'Question'), ('daily_quiz', 'Daily quiz')], max_length=10)),
+                ('item_id', models.PositiveBigIntegerField()),
+                ('key', models.BigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key'], name='core_neardup_bucket_key_idx'), models.Index(fields=['kind', 'item_id'], name='core_neardup_bucket_item_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NearDuplicateSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('question', 'Question'), ('daily_quiz', 'Daily quiz')], max_length=10)),
+                ('item_id', models.PositiveBigIntegerField()),
+                ('signature', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'item_id'), name='core_neardup_signature_item_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_near_duplicate_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deck', models.PositiveSmallIntegerField(choices=[(1, 'Keywords'), (2, 'Formulas')])),
+                ('item_id', models.PositiveIntegerField()),
+                ('due_at', models.DateTimeField()),
+                ('interval_days', models.PositiveIntegerField(default=0)),
+                ('ease', models.PositiveSmallIntegerField(default=2500)),
+                ('reps', models.PositiveSmallIntegerField(default=0)),
+                ('lapses', models.PositiveSmallIntegerField(default=0)),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_cards', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due_at'], name='core_reviewcard_due_idx'), models.Index(fields=['user', 'deck', 'due_at'], name='core_reviewcard_deck_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'deck', 'item_id'), name='core_reviewcard_item_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewDeck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deck', models.PositiveSmallIntegerField(choices=[(1, 'Keywords'), (2, 'Formulas')])),
+                ('last_item_id', models.PositiveIntegerField(default=0)),
+                ('new_on', models.DateField(blank=True, null=True)),
+                ('new_count', models.PositiveSmallIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_decks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'deck'), name='core_reviewdeck_user_uniq')],
+            },
+        ),
+    ]
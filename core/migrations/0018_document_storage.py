@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:55
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='previouspaper',
+            name='file',
+            field=models.FileField(storage=core.storage.document_storage, upload_to='papers/'),
+        ),
+        migrations.AlterField(
+            model_name='syllabus',
+            name='pdf',
+            field=models.FileField(blank=True, null=True, storage=core.storage.document_storage, upload_to='syllabus_pdfs/'),
+        ),
+    ]
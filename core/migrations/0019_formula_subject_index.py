@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_document_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='formula',
+            index=models.Index(fields=['subject', 'id'], name='formula_subject_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_formula_subject_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvalidationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, default='', max_length=100)),
+                ('origin', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_invalidation_events'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='aiconversationindex',
+            options={'ordering': ['-updated_at', '-chat_id']},
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_conversation_index_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=6, unique=True)),
+                ('current', models.IntegerField(default=-1)),
+                ('revealed', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('ending', 'Ending'), ('ended', 'Ended')], default='active', max_length=10)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hosted_live_sessions', to=settings.AUTH_USER_MODEL)),
+                ('mock_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='live_sessions', to='core.mocktest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LiveParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('connected', models.BooleanField(default=True)),
+                ('score', models.IntegerField(blank=True, null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='core.livesession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='live_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LiveAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('option', models.CharField(max_length=1)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.question')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='core.livesession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='live_answers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='liveparticipant',
+            constraint=models.UniqueConstraint(fields=('session', 'user'), name='core_liveparticipant_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='liveanswer',
+            constraint=models.UniqueConstraint(fields=('session', 'user', 'question'), name='core_liveanswer_uniq'),
+        ),
+    ]
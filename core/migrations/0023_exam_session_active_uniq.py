@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:40
+
+from django.db import migrations, models
+
+
+def close_duplicates(apps, schema_editor):
+    # Sessions started twice by racing requests: the newest one stays open
+    ExamSession = apps.get_model('core', 'ExamSession')
+    keep = {}
+    for pk, user_id, mock_test_id in ExamSession.objects.filter(status='active').order_by('-started_at', '-pk').values_list(
+        'pk', 'user_id', 'mock_test_id',
+    ):
+        keep.setdefault((user_id, mock_test_id), pk)
+    ExamSession.objects.filter(status='active').exclude(pk__in=keep.values()).update(status='expired')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_live_sessions'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='examsession',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('user', 'mock_test'), name='core_examsession_active_uniq'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:57
+
+from django.db import migrations, models
+
+
+def clear_closed(apps, schema_editor):
+    ExamSession = apps.get_model('core', 'ExamSession')
+    ExamSession.objects.exclude(status='active').update(active_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_exam_session_active_uniq'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='examsession',
+            name='core_examsession_active_uniq',
+        ),
+        migrations.AddField(
+            model_name='examsession',
+            name='active_key',
+            field=models.BooleanField(default=True, editable=False, null=True),
+        ),
+        migrations.RunPython(clear_closed, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='examsession',
+            constraint=models.UniqueConstraint(fields=('user', 'mock_test', 'active_key'), name='core_examsession_active_uniq'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_rate_limit_counter'),
+    ]
+
+    operations = [
+        # Existing attempts were counted when they were submitted: the column is added
+        # as True for them, then defaults to False for new ones
+        migrations.AddField(
+            model_name='dailyquizattempt',
+            name='stats_recorded',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='dailyquizattempt',
+            name='stats_recorded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='dailyquizattempt',
+            index=models.Index(fields=['stats_recorded', 'id'], name='dailyquizattempt_pending_idx'),
+        ),
+    ]
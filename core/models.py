@@ -1,7 +1,11 @@
 
+import uuid
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .storage import document_storage
+
 
 
 class User(AbstractUser):
@@ -22,12 +26,53 @@ class AIChatHistory(models.Model):
         ordering = ['-timestamp']
 
 
+class AIConversationIndex(models.Model):
+    """
+    Sidebar summary of one AIChatHistory row, kept current by a post_save signal so the
+    chat list never has to read the full `messages` JSON.
+    """
+    TITLE_LENGTH = 100
+    PREVIEW_LENGTH = 160
+
+    chat = models.OneToOneField(AIChatHistory, on_delete=models.CASCADE, primary_key=True, related_name='index_entry')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_conversations')
+    conversation_id = models.CharField(max_length=36, blank=True, null=True)
+    title = models.CharField(max_length=TITLE_LENGTH, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.title or '(untitled)'} ({self.message_count} messages)"
+
+    @classmethod
+    def summarize(cls, history):
+        messages = history.messages or []
+        first_user = next((m.get('content') for m in messages if m.get('role') == 'user'), '')
+        last = messages[-1].get('content') if messages else ''
+        return {
+            'user_id': history.user_id,
+            'conversation_id': history.conversation_id,
+            'title': str(first_user or '')[:cls.TITLE_LENGTH],
+            'last_message_preview': str(last or '')[:cls.PREVIEW_LENGTH],
+            'message_count': len(messages),
+        }
+
+    class Meta:
+        # chat_id, not chat: ordering by the relation would sort by AIChatHistory's ordering
+        ordering = ['-updated_at', '-chat_id']
+        indexes = [
+            # Keyset pagination of a user's sidebar: WHERE user = ? AND (updated_at, chat) < (?, ?)
+            models.Index(fields=['user', '-updated_at', '-chat'], name='core_aiconv_user_updated_idx'),
+        ]
+
+
 class Syllabus(models.Model):
     board = models.CharField(max_length=50)
     class_level = models.IntegerField()
     subject = models.CharField(max_length=50)
     content = models.TextField()
-    pdf = models.FileField(upload_to="syllabus_pdfs/", null=True, blank=True)
+    pdf = models.FileField(upload_to="syllabus_pdfs/", storage=document_storage, null=True, blank=True)
 
     def __str__(self):
         return f"{self.board} Class {self.class_level} {self.subject}"
@@ -63,7 +108,12 @@ class Question(models.Model):
     correct_option = models.CharField(max_length=1)  # 'A', 'B', 'C', 'D'
 
     def __str__(self):
-        return f"Question for {self.mock_test.subject} - {self.question_text[:50]}"
+        # Avoid a query per row when listed without select_related('mock_test')
+        if Question.mock_test.is_cached(self):
+            test = self.mock_test.subject
+        else:
+            test = f"test {self.mock_test_id}"
+        return f"Question for {test} - {self.question_text[:50]}"
 
 
 class TestAttempt(models.Model):
@@ -82,7 +132,7 @@ class UserAnswer(models.Model):
     selected_option = models.CharField(max_length=1)  # 'A', 'B', 'C', or 'D'
 
     def __str__(self):
-        return f"{self.attempt} | Q: {self.question.id} | Selected: {self.selected_option}"
+        return f"Attempt {self.attempt_id} | Q: {self.question_id} | Selected: {self.selected_option}"
 
 
 class PreviousPaper(models.Model):
@@ -93,7 +143,7 @@ class PreviousPaper(models.Model):
     title = models.CharField(max_length=255)
     year = models.IntegerField()
     exam_type = models.CharField(max_length=10, choices=EXAM_TYPE_CHOICES, null=True, blank=True)
-    file = models.FileField(upload_to="papers/")
+    file = models.FileField(upload_to="papers/", storage=document_storage)
 
     def __str__(self):
         etype = self.exam_type if self.exam_type else "No Type"
@@ -242,6 +292,12 @@ class Formula(models.Model):
     def __str__(self):
         return f"{self.subject} - {self.heading}"
 
+    class Meta:
+        indexes = [
+            # The formula page reads one subject at a time, in id order
+            models.Index(fields=['subject', 'id'], name='formula_subject_id_idx'),
+        ]
+
 
 class DailyQuizAttempt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_quiz_attempts")
@@ -253,12 +309,22 @@ class DailyQuizAttempt(models.Model):
         help_text="List of user's answers in order ['A', 'B', 'C', ...]"
     )
     attempted_at = models.DateTimeField(auto_now_add=True)
+    idempotency_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Client-supplied key; a retried submission with the same key gets the original result"
+    )
+    # Counted into DailyQuizStatistics yet (core.item_stats.roll_up_daily_quiz_attempts)
+    stats_recorded = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz_date} - {self.score}/{self.get_total_questions()} ({self.percent}%)"
 
     def get_total_questions(self):
         """Get total questions for this quiz date"""
+        if hasattr(self, 'total_question_count'):  # Annotated by the admin changelist
+            return self.total_question_count
         return DailyQuiz.objects.filter(quiz_date=self.quiz_date).count()
 
     def save(self, *args, **kwargs):
@@ -273,3 +339,365 @@ class DailyQuizAttempt(models.Model):
         ordering = ['-quiz_date', '-attempted_at']
         unique_together = ('user', 'quiz_date')  # One attempt per user per day
         verbose_name = "Daily Quiz Attempt"
+        indexes = [
+            models.Index(fields=['stats_recorded', 'id'], name='dailyquizattempt_pending_idx'),
+        ]
+
+
+class ItemStatistics(models.Model):
+    """
+    Running counters for one quiz item, incremented when an attempt is graded (see
+    core.item_stats). Every figure below is derived from these sums, so item analysis
+    never has to read the answers themselves.
+    """
+    attempts = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    option_a_count = models.PositiveIntegerField(default=0)
+    option_b_count = models.PositiveIntegerField(default=0)
+    option_c_count = models.PositiveIntegerField(default=0)
+    option_d_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    # Attempt scores (percent) of everyone / of those who got this item right, for the discrimination index
+    score_sum = models.PositiveBigIntegerField(default=0)
+    score_sq_sum = models.PositiveBigIntegerField(default=0)
+    correct_score_sum = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def difficulty(self):
+        """Share of attempts answering correctly (the classical p-value); higher is easier."""
+        return self.correct_count / self.attempts if self.attempts else None
+
+    @property
+    def discrimination(self):
+        """
+        Point-biserial correlation between getting this item right and the attempt score.
+        Near zero or negative flags an item that strong students miss (often ambiguous).
+        """
+        n, right = self.attempts, self.correct_count
+        if not n or right in (0, n):
+            return None
+        mean = self.score_sum / n
+        variance = self.score_sq_sum / n - mean * mean
+        if variance <= 0:
+            return None
+        mean_right = self.correct_score_sum / right
+        mean_wrong = (self.score_sum - self.correct_score_sum) / (n - right)
+        p = right / n
+        return (mean_right - mean_wrong) / variance ** 0.5 * (p * (1 - p)) ** 0.5
+
+    @property
+    def option_distribution(self):
+        return {
+            'A': self.option_a_count,
+            'B': self.option_b_count,
+            'C': self.option_c_count,
+            'D': self.option_d_count,
+            'skipped': self.skipped_count,
+        }
+
+    class Meta:
+        abstract = True
+
+
+class QuestionStatistics(ItemStatistics):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats for question {self.question_id} ({self.attempts} attempts)"
+
+    class Meta:
+        verbose_name_plural = "Question statistics"
+
+
+class DailyQuizStatistics(ItemStatistics):
+    quiz = models.OneToOneField(DailyQuiz, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats for daily quiz {self.quiz_id} ({self.attempts} attempts)"
+
+    class Meta:
+        verbose_name_plural = "Daily quiz statistics"
+
+
+class ReportJob(models.Model):
+    """
+    A PDF report queued for the `render_reports` worker. `digest` is the SHA-256 of the
+    report payload and doubles as the file name, so a changed attempt means a new job.
+    """
+    KIND_CHOICES = [
+        ('attempt', 'Test attempt'),
+        ('term', 'Term summary'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    tries = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    render_ms = models.PositiveIntegerField(null=True, blank=True)
+    size = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} report for {self.user.username} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Worker queue scan: WHERE status = 'pending' ORDER BY created_at
+            models.Index(fields=['status', 'created_at'], name='core_reportjob_queue_idx'),
+        ]
+
+
+class NearDuplicateSignature(models.Model):
+    """
+    MinHash signature of one Question or DailyQuiz (see core/dedup.py), kept current by
+    post_save/post_delete signals. Its LSH band keys live in NearDuplicateBucket.
+    """
+    KIND_CHOICES = [
+        ('question', 'Question'),
+        ('daily_quiz', 'Daily quiz'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    item_id = models.PositiveBigIntegerField()
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature of {self.get_kind_display().lower()} {self.item_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'item_id'], name='core_neardup_signature_item_uniq'),
+        ]
+
+
+class NearDuplicateBucket(models.Model):
+    """
+    One LSH band of a signature: items sharing a `key` in any band are duplicate candidates.
+    """
+    kind = models.CharField(max_length=10, choices=NearDuplicateSignature.KIND_CHOICES)
+    item_id = models.PositiveBigIntegerField()
+    key = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Bucket {self.key} of {self.kind} {self.item_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key'], name='core_neardup_bucket_key_idx'),
+            models.Index(fields=['kind', 'item_id'], name='core_neardup_bucket_item_idx'),
+        ]
+
+
+class ReviewCard(models.Model):
+    """
+    One user's spaced-repetition state for a Keyword or Formula (core/review.py). Cards are
+    created when first introduced; the (user, due_at) indexes are the review queue.
+    """
+    DECK_CHOICES = [
+        (1, 'Keywords'),
+        (2, 'Formulas'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_cards')
+    deck = models.PositiveSmallIntegerField(choices=DECK_CHOICES)
+    item_id = models.PositiveIntegerField()
+    due_at = models.DateTimeField()
+    interval_days = models.PositiveIntegerField(default=0)
+    ease = models.PositiveSmallIntegerField(default=2500)  # Ease factor x 1000
+    reps = models.PositiveSmallIntegerField(default=0)     # Successful reviews in a row
+    lapses = models.PositiveSmallIntegerField(default=0)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_deck_display()} card {self.item_id} for {self.user_id} (due {self.due_at:%Y-%m-%d %H:%M})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'deck', 'item_id'], name='core_reviewcard_item_uniq'),
+        ]
+        indexes = [
+            # Due queues: WHERE user_id = ? [AND deck = ?] AND due_at <= now ORDER BY due_at LIMIT n
+            models.Index(fields=['user', 'due_at'], name='core_reviewcard_due_idx'),
+            models.Index(fields=['user', 'deck', 'due_at'], name='core_reviewcard_deck_due_idx'),
+        ]
+
+
+class ReviewDeck(models.Model):
+    """
+    How far a user has got through a deck's new cards, which are introduced in item id
+    order, and how many were introduced on `new_on`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_decks')
+    deck = models.PositiveSmallIntegerField(choices=ReviewCard.DECK_CHOICES)
+    last_item_id = models.PositiveIntegerField(default=0)
+    new_on = models.DateField(null=True, blank=True)
+    new_count = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.get_deck_display()} deck of {self.user_id} (up to item {self.last_item_id})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'deck'], name='core_reviewdeck_user_uniq'),
+        ]
+
+
+class ExamSession(models.Model):
+    """
+    A mock test in progress, timed by the server (core/exams.py). Autosaved answers live
+    in the cache and are written back here in batches by `run_exam_sessions`; `seq` is
+    the client's counter of the last answer set written.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('submitted', 'Submitted'),
+        ('expired', 'Expired'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exam_sessions')
+    mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='exam_sessions')
+    started_at = models.DateTimeField()
+    deadline = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    answers = models.JSONField(default=dict)  # {question id: option as shown to the student}
+    seq = models.PositiveIntegerField(default=0)
+    saved_at = models.DateTimeField(null=True, blank=True)
+    attempt = models.OneToOneField(
+        TestAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='exam_session'
+    )
+    # True while active, NULL once closed. Unique with (user, mock_test), it allows one open
+    # session per test on every backend; MySQL ignores conditional unique constraints.
+    active_key = models.BooleanField(null=True, default=True, editable=False)
+
+    def __str__(self):
+        return f"Session {self.pk} of {self.user_id} on test {self.mock_test_id} ({self.status})"
+
+    class Meta:
+        constraints = [
+            # One open session per student and test; start_session relies on it
+            models.UniqueConstraint(fields=['user', 'mock_test', 'active_key'], name='core_examsession_active_uniq'),
+        ]
+        indexes = [
+            # Write-behind and expiry sweeps: WHERE status = 'active' [AND deadline < ?]
+            models.Index(fields=['status', 'deadline'], name='core_examsession_sweep_idx'),
+            models.Index(fields=['user', 'mock_test', 'status'], name='core_examsession_user_idx'),
+        ]
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file being uploaded in chunks for a PreviousPaper or Syllabus (core/uploads.py).
+    Chunks collect in CHUNKED_UPLOADS['STORAGE'] until `offset` reaches `size`; the file
+    is then stored under its SHA-256 and `name` is its storage name.
+    """
+    TARGET_CHOICES = [
+        ('paper', 'Previous paper'),
+        ('syllabus', 'Syllabus PDF'),
+    ]
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    name = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.status})"
+
+
+class InvalidationEvent(models.Model):
+    """
+    "Drop your cached copy of `key` under `topic`", published to every process by the
+    invalidation bus (core/invalidation.py) when its database transport is in use. Rows
+    are pruned after INVALIDATION['KEEP_SECONDS'].
+    """
+    topic = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, blank=True, default='')  # '' means everything
+    origin = models.CharField(max_length=64)  # Publishing process, which already applied it
+    created_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.topic}:{self.key or '*'} from {self.origin}"
+
+
+class RateLimitCounter(models.Model):
+    """
+    One sliding-window counter of a shared rate-limit bucket (core/ratelimit.py), used
+    when RATE_LIMIT['CACHE'] has no atomic incr(). Expired rows are pruned as new ones
+    are added.
+    """
+    name = models.CharField(max_length=255, unique=True)  # <bucket key>:<window number>
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.count}"
+
+
+class LiveSession(models.Model):
+    """
+    A live classroom run of a MockTest (core/live.py). The teacher's and students' sockets
+    may be spread over several processes; each applies this row's state whenever
+    `version` moves on.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('ending', 'Ending'),   # Answers still being collected from other processes
+        ('ended', 'Ended'),
+    ]
+    code = models.CharField(max_length=6, unique=True)
+    mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='live_sessions')
+    host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hosted_live_sessions')
+    current = models.IntegerField(default=-1)  # Index of the open question, -1 before the first
+    revealed = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Live session {self.code} of test {self.mock_test_id} ({self.status})"
+
+
+class LiveParticipant(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='live_participations')
+    session = models.ForeignKey(LiveSession, on_delete=models.CASCADE, related_name='participants')
+    connected = models.BooleanField(default=True)
+    score = models.IntegerField(null=True, blank=True)  # Set when the session ends
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'user'], name='core_liveparticipant_uniq'),
+        ]
+
+
+class LiveAnswer(models.Model):
+    session = models.ForeignKey(LiveSession, on_delete=models.CASCADE, related_name='answers')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='live_answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    option = models.CharField(max_length=1)
+
+    class Meta:
+        constraints = [
+            # A student's first answer counts; later ones are dropped on insert
+            models.UniqueConstraint(fields=['session', 'user', 'question'], name='core_liveanswer_uniq'),
+        ]
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from django.conf import settings
+from storages.backends.s3 import S3Storage
+
+
+# Paper and syllabus PDFs in S3-compatible object storage (AWS S3, MinIO, R2, ...), used
+# as STORAGES['documents'] when OBJECT_STORAGE['BUCKET'] is set. Clients download
+# straight from the bucket through short-lived presigned URLs, so the bytes never pass
+# through Django. Stored names are content addresses (core/uploads.py) and never change,
+# so objects are written once and cached by browsers for as long as a URL is valid.
+
+MAX_URLS = 10000
+
+
+class ObjectStorage(S3Storage):
+    """
+    S3Storage configured from OBJECT_STORAGE, presigning GETs. A presigned URL is reused
+    until half its lifetime has passed: catalog pages list the same URLs from one request
+    to the next (so their ETags hold and the browser cache works), and signing is skipped.
+    """
+
+    def __init__(self, **kwargs):
+        config = settings.OBJECT_STORAGE
+        options = {
+            'bucket_name': config['BUCKET'],
+            'endpoint_url': config['ENDPOINT_URL'],
+            'region_name': config['REGION'],
+            'access_key': config['ACCESS_KEY'],
+            'secret_key': config['SECRET_KEY'],
+            'addressing_style': config['ADDRESSING_STYLE'],
+            'querystring_auth': True,
+            'querystring_expire': config['URL_EXPIRE_SECONDS'],
+            'signature_version': 's3v4',
+            'file_overwrite': True,
+            'default_acl': None,
+            'object_parameters': {'CacheControl': f"private, max-age={config['URL_EXPIRE_SECONDS']}"},
+        }
+        options.update(kwargs)
+        super().__init__(**options)
+        self._urls = {}  # name: (reuse until, url)
+        self._urls_lock = threading.Lock()
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire is not None or http_method:
+            return super().url(name, parameters, expire, http_method)
+        now = time.monotonic()
+        cached = self._urls.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        url = super().url(name)
+        with self._urls_lock:
+            if len(self._urls) >= MAX_URLS:
+                self._urls = {k: v for k, v in self._urls.items() if v[0] > now}
+                if len(self._urls) >= MAX_URLS:
+                    self._urls.clear()
+            self._urls[name] = (now + self.querystring_expire / 2, url)
+        return url
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from . import invalidation
+from .compression import (
+    ENCODING_SUFFIXES, CompressedBodyCache, negotiate_encoding, timed_compress, write_precompressed,
+)
+from .models import MockTest, Question
+from .renderers import FastJSONRenderer
+from .serializers import QuestionValuesSerializer
+from .shuffle import shuffle_question_rows
+
+
+# Question packs: each mock test's questions, answers stripped, compiled once into
+#   <DIR>/<test id>/<version>.json (+ .br/.gz)
+# where the version is a digest of the content. <DIR>/<test id>/current names the version
+# being served; saving or deleting a question removes it and the next request rebuilds
+# the pack. Serving a pack reads the pointer and the bytes, never the database.
+
+POINTER_NAME = 'current'
+INVALIDATED_NAME = 'invalidated'
+
+_bodies = None
+_pointers = {}  # test id: ((pointer inode, mtime), version)
+_rows = {}      # test id: (version, parsed rows), for shuffled packs
+_build_lock = threading.Lock()
+
+
+def pack_dir(test_id):
+    return settings.QUESTION_PACKS['DIR'] / str(test_id)
+
+
+def body_cache():
+    global _bodies
+    if _bodies is None:
+        _bodies = CompressedBodyCache(settings.QUESTION_PACKS['CACHE_BYTES'])
+    return _bodies
+
+
+def render_pack(test_id):
+    questions = Question.objects.filter(mock_test_id=test_id).order_by('id')
+    return FastJSONRenderer().render(QuestionValuesSerializer().rows(questions))
+
+
+def build_pack(test_id):
+    """
+    Compiles the pack of mock test `test_id` and points `current` at it. Returns its
+    version, or None if the mock test does not exist.
+    """
+    if not MockTest.objects.filter(pk=test_id).exists():
+        return None
+    # Created before reading, so a first build also sees the marker of an edit made meanwhile
+    directory = pack_dir(test_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    marker = _read_marker(directory)
+    data = render_pack(test_id)
+    version = hashlib.blake2b(data, digest_size=10).hexdigest()
+
+    path = directory / f'{version}.json'
+    if not path.exists():
+        write_precompressed(path, data)
+
+    # A question saved while this pack was being read is not in it: take the pointer back
+    # so the next request builds again. Checked after writing it, because invalidate()
+    # writes the marker before removing the pointer.
+    _write_atomic(directory / POINTER_NAME, version)
+    if _read_marker(directory) != marker:
+        (directory / POINTER_NAME).unlink(missing_ok=True)
+        return version
+    prune(test_id, keep=version)
+    return version
+
+
+def _read_marker(directory):
+    try:
+        return (directory / INVALIDATED_NAME).read_text()
+    except OSError:
+        return None
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def prune(test_id, keep):
+    """
+    Removes every version but `keep`.
+    """
+    for path in pack_dir(test_id).glob('*.json*'):
+        if not path.name.startswith(f'{keep}.'):
+            path.unlink(missing_ok=True)
+
+
+def current_version(test_id):
+    pointer = pack_dir(test_id) / POINTER_NAME
+    try:
+        stat = pointer.stat()
+    except OSError:
+        return None
+    # Every write replaces the file, so its inode tells rewrites in the same mtime tick apart
+    identity = (stat.st_ino, stat.st_mtime_ns)
+    cached = _pointers.get(test_id)
+    if cached and cached[0] == identity:
+        return cached[1]
+    version = pointer.read_text().strip()
+    _pointers[test_id] = (identity, version)
+    return version
+
+
+def invalidate(test_id):
+    directory = pack_dir(test_id)
+    if not directory.exists():
+        return
+    # A new token each time: builds compare it rather than mtimes, which are too coarse
+    _write_atomic(directory / INVALIDATED_NAME, secrets.token_hex(8))
+    (directory / POINTER_NAME).unlink(missing_ok=True)
+
+
+def remove(test_id):
+    shutil.rmtree(pack_dir(test_id), ignore_errors=True)
+    _pointers.pop(test_id, None)
+
+
+def invalidate_all():
+    root = settings.QUESTION_PACKS['DIR']
+    if root.exists():
+        for directory in root.iterdir():
+            if directory.name.isdigit():
+                invalidate(int(directory.name))
+
+
+# Packs are files on each node: every process applies edits made on any of them
+invalidation.register('mock-test', lambda key: invalidate_all() if key is invalidation.ALL else invalidate(int(key)))
+invalidation.register('mock-test-deleted', lambda key: key is invalidation.ALL or remove(int(key)))
+
+
+def ensure_pack(test_id):
+    """
+    The current version of the pack, built on first use. None if the mock test is gone.
+    """
+    version = current_version(test_id)
+    if version is None:
+        with _build_lock:
+            version = current_version(test_id) or build_pack(test_id)
+    return version
+
+
+def pack_body(test_id, version, encoding):
+    key = (test_id, version, encoding)
+    cache = body_cache()
+    body = cache.get(key)
+    if body is None:
+        path = pack_dir(test_id) / f'{version}.json'
+        if encoding:
+            path = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+        body = path.read_bytes()
+        cache.set(key, body)
+    return body
+
+
+def pack_rows(test_id, version):
+    cached = _rows.get(test_id)
+    if cached is None or cached[0] != version:
+        cached = _rows[test_id] = (version, json.loads(pack_body(test_id, version, None)))
+    return cached[1]
+
+
+def shuffled_pack_body(test_id, version, seed, encoding):
+    # Kept in the same LRU as the shared packs, keyed by the student's seed: a student
+    # refetching the pack (reloads, resumed sessions) costs neither a render nor a
+    # compression, at the price of one cache entry per student working on the test
+    key = (test_id, version, seed, encoding)
+    cache = body_cache()
+    body = cache.get(key)
+    if body is None:
+        body = FastJSONRenderer().render(shuffle_question_rows(pack_rows(test_id, version), seed))
+        if encoding:
+            body = timed_compress(body, encoding, settings.COMPRESSION['DYNAMIC_LEVELS'][encoding], 'dynamic')
+        cache.set(key, body)
+    return body
+
+
+def shuffled_pack_response(request, test_id, version, seed):
+    """
+    The pack reordered for one student (core/shuffle.py), with an ETag per version,
+    student order and encoding.
+    """
+    encoding = negotiate_encoding(request)
+    etag = f'"{version}-{seed:016x}-{encoding or "identity"}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            body = shuffled_pack_body(test_id, version, seed, encoding)
+        except OSError:
+            # Removed by another process since the pointer was read
+            with _build_lock:
+                version = build_pack(test_id)
+            if version is None:
+                return None
+            etag = f'"{version}-{seed:016x}-{encoding or "identity"}"'
+            body = shuffled_pack_body(test_id, version, seed, encoding)
+        response = HttpResponse(body, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def pack_response(request, test_id, seed=None):
+    """
+    Serves the question pack of mock test `test_id` with a strong ETag per version and
+    encoding, or returns None if there is no such mock test. With a shuffle `seed` the
+    questions come in that student's order.
+    """
+    version = ensure_pack(test_id)
+    if version is None:
+        return None
+    if seed is not None:
+        return shuffled_pack_response(request, test_id, version, seed)
+
+    encoding = negotiate_encoding(request)
+    etag = f'"{version}-{encoding or "identity"}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            body = pack_body(test_id, version, encoding)
+        except OSError:
+            # Removed by another process since the pointer was read
+            with _build_lock:
+                version = build_pack(test_id)
+            if version is None:
+                return None
+            etag = f'"{version}-{encoding or "identity"}"'
+            body = pack_body(test_id, version, encoding)
+        response = HttpResponse(body, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
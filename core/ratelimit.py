@@ -0,0 +1,343 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from .models import RateLimitCounter
+
+
+# Capacity protection for expensive endpoints. Each rate-limited scope has token buckets
+# (RATE_LIMIT['BUCKETS']) keyed by:
+#   user      the authenticated user, shared by all processes through the cache
+#   ip        the client address, likewise shared
+#   username  the username a login/registration is for, likewise shared
+#   endpoint  the scope as a whole, per process: it protects this worker's capacity
+# A bucket allows `burst` requests, refilled evenly over `period`. Per-process buckets
+# are GCRA (generic cell rate algorithm) state: one "theoretical arrival time" each.
+# Shared buckets are sliding-window counters kept with cache.incr(), which is atomic on
+# Redis, Memcached and local memory; with other caches (the database cache) they are
+# RateLimitCounter rows bumped with a single UPDATE, so concurrent requests for one
+# bucket queue briefly on its row instead of being refused.
+# On top of that, `in_flight` caps concurrent expensive operations (LLM calls, password
+# hashing) per process and answers 503 when the pool is full.
+
+ATOMIC_INCR_BACKENDS = (RedisCache, BaseMemcachedCache, LocMemCache)
+
+PRUNE_SECONDS = 60  # Expired RateLimitCounter rows are deleted at most this often per process
+
+
+def _gcra(tat, now, burst, period):
+    """
+    (new theoretical arrival time, seconds to wait); the wait is 0 when a token was taken.
+    """
+    interval = period / burst
+    new_tat = max(tat, now) + interval
+    wait = new_tat - period - now
+    if wait > 0:
+        return tat, wait
+    return new_tat, 0.0
+
+
+class LocalBucket:
+    def __init__(self, burst, period):
+        self.burst = burst
+        self.period = period
+        self.tat = 0.0
+        self._lock = threading.Lock()
+
+    def take(self, now):
+        with self._lock:
+            self.tat, wait = _gcra(self.tat, now, self.burst, self.period)
+        return wait
+
+
+class CacheCounters:
+    """
+    Window counters in a cache with an atomic incr().
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def incr(self, name, timeout, now):
+        self.cache.add(name, 0, timeout=timeout)
+        try:
+            return self.cache.incr(name)
+        except ValueError:  # Evicted between add() and incr()
+            self.cache.add(name, 1, timeout=timeout)
+            return 1
+
+    def decr(self, name):
+        try:
+            self.cache.decr(name)
+        except ValueError:
+            pass
+
+    def get(self, name):
+        return self.cache.get(name, 0)
+
+
+class DatabaseCounters:
+    """
+    Window counters as RateLimitCounter rows. The increment and the read of the result
+    share one short transaction, holding the row lock only between the two.
+    """
+    last_prune = 0.0
+
+    def incr(self, name, timeout, now):
+        expires_at = datetime.fromtimestamp(now + timeout, tz=dt_timezone.utc)
+        with transaction.atomic():
+            if RateLimitCounter.objects.filter(name=name).update(count=F('count') + 1):
+                return RateLimitCounter.objects.values_list('count', flat=True).get(name=name)
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(name=name, count=1, expires_at=expires_at)
+            except IntegrityError:  # Created by a concurrent request
+                RateLimitCounter.objects.filter(name=name).update(count=F('count') + 1)
+                return RateLimitCounter.objects.values_list('count', flat=True).get(name=name)
+        self.prune(now)
+        return 1
+
+    def decr(self, name):
+        RateLimitCounter.objects.filter(name=name, count__gt=0).update(count=F('count') - 1)
+
+    def get(self, name):
+        return RateLimitCounter.objects.filter(name=name).values_list('count', flat=True).first() or 0
+
+    def prune(self, now):
+        if now - DatabaseCounters.last_prune < PRUNE_SECONDS:
+            return
+        DatabaseCounters.last_prune = now
+        RateLimitCounter.objects.filter(expires_at__lt=datetime.fromtimestamp(now, tz=dt_timezone.utc)).delete()
+
+
+def take_counted(counters, key, burst, period, now):
+    """
+    Sliding-window counter: the requests counted in the current fixed window of `period`
+    plus the previous window's, weighted by how much of it is still within the last
+    `period`. Only atomic increments, so nothing is refused for waiting on other
+    requests; a refused request gives its increment back.
+    """
+    window = int(now // period)
+    elapsed = now - window * period
+    current = f'{key}:{window}'
+    count = counters.incr(current, math.ceil(2 * period) + 1, now)
+    previous = counters.get(f'{key}:{window - 1}')
+    if previous * (1 - elapsed / period) + count <= burst:
+        return 0.0
+    counters.decr(current)
+    if count > burst:
+        return period - elapsed
+    # Wait until the previous window's share has decayed enough to leave room
+    return period * (1 - (burst - count) / previous) - elapsed
+
+
+def take_shared(cache, key, burst, period, now):
+    """
+    Takes a token from the bucket stored at `key`, in `cache` when it has an atomic
+    incr() and in the database otherwise; returns the seconds to wait, or 0.
+    """
+    if isinstance(cache, ATOMIC_INCR_BACKENDS):
+        return take_counted(CacheCounters(cache), key, burst, period, now)
+    return take_counted(DatabaseCounters(), key, burst, period, now)
+
+
+class RateLimitStats:
+    """
+    Per-process counters of allowed and rejected requests per scope and bucket.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, scope, outcome):
+        with self._lock:
+            self._counters[(scope, outcome)] = self._counters.get((scope, outcome), 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+        scopes = {}
+        for (scope, outcome), count in sorted(counters.items()):
+            scopes.setdefault(scope, {})[outcome] = count
+        return {
+            'scopes': scopes,
+            'in_flight': {name: pool.snapshot() for name, pool in sorted(_pools.items())},
+        }
+
+
+stats = RateLimitStats()
+
+_local_buckets = {}
+_local_buckets_lock = threading.Lock()
+
+
+def _local_bucket(scope, burst, period):
+    with _local_buckets_lock:
+        bucket = _local_buckets.get(scope)
+        if bucket is None or (bucket.burst, bucket.period) != (burst, period):
+            bucket = _local_buckets[scope] = LocalBucket(burst, period)
+        return bucket
+
+
+def client_ip(request):
+    """
+    The client address, taken from X-Forwarded-For when RATE_LIMIT['NUM_PROXIES'] trusted
+    proxies sit in front of the app.
+    """
+    num_proxies = settings.RATE_LIMIT['NUM_PROXIES']
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(scope, request, username=None):
+    """
+    Takes a token from each of `scope`'s buckets that applies to the request. Returns 0 if
+    the request may go ahead, otherwise the seconds until it may be retried.
+    """
+    config = settings.RATE_LIMIT
+    buckets = config['BUCKETS'].get(scope, {})
+    cache = caches[config['CACHE']]
+    user = getattr(request, 'user', None)
+    identities = {
+        'user': user.pk if user is not None and user.is_authenticated else None,
+        'ip': client_ip(request),
+        'username': username.strip().lower() if isinstance(username, str) and username.strip() else None,
+    }
+
+    now = time.time()
+    for kind, (burst, period) in buckets.items():
+        if kind == 'endpoint':
+            wait = _local_bucket(scope, burst, period).take(now)
+        elif identities.get(kind) is not None:
+            wait = take_shared(cache, f'ratelimit:{scope}:{kind}:{identities[kind]}', burst, period, now)
+        else:
+            continue
+        if wait:
+            stats.record(scope, f'limited_by_{kind}')
+            return wait
+    stats.record(scope, 'allowed')
+    return 0
+
+
+def retry_after(wait):
+    return str(max(1, math.ceil(wait)))
+
+
+def rate_limited_response(wait):
+    """
+    429 for views outside DRF, which uses BucketThrottle instead.
+    """
+    response = JsonResponse({'detail': 'Request was throttled.'}, status=429)
+    response['Retry-After'] = retry_after(wait)
+    return response
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    DRF throttle for views declaring `rate_limit_scope`; DRF answers 429 with Retry-After.
+    Views for which the username bucket applies get it from the request body.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'rate_limit_scope', None)
+        if scope is None:
+            return True
+        username = None
+        if 'username' in settings.RATE_LIMIT['BUCKETS'].get(scope, {}):
+            username = request.data.get('username')
+        self.delay = check(scope, request, username=username)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class ServerBusy(APIException):
+    status_code = 503
+    default_detail = 'The server is busy, please retry shortly.'
+    default_code = 'server_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait  # DRF sends it as Retry-After
+
+
+class InFlightPool:
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'limit': self.limit, 'active': self.active, 'rejected': self.rejected}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(name):
+    limit = settings.RATE_LIMIT['IN_FLIGHT'][name]
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = InFlightPool(name, limit)
+        pool.limit = limit
+        return pool
+
+
+@contextmanager
+def in_flight(name):
+    """
+    Runs the block as one of at most RATE_LIMIT['IN_FLIGHT'][name] concurrent operations
+    in this process, raising ServerBusy when they are all taken. Never blocks, so it can
+    wrap awaits in async views too.
+    """
+    pool = _pool(name)
+    if not pool.acquire():
+        raise ServerBusy(settings.RATE_LIMIT['BUSY_RETRY_AFTER_SECONDS'])
+    try:
+        yield
+    finally:
+        pool.release()
+
+
+def busy_response(exc):
+    """
+    503 for a ServerBusy raised in a view outside DRF.
+    """
+    response = JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    response['Retry-After'] = retry_after(exc.wait)
+    return response
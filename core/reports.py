@@ -0,0 +1,388 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from datetime import timedelta
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse
+from django.utils import timezone
+
+from .exports import day_start
+from .models import DailyQuizAttempt, Question, ReportJob, TestAttempt, UserAnswer
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:  # Only the render_reports worker needs reportlab
+    A4 = None
+
+
+# Part of every payload: bump it when the PDF layout changes so cached reports re-render
+REPORT_VERSION = 1
+
+
+def report_settings():
+    return settings.REPORTS
+
+
+def _student(user):
+    return {'username': user.username, 'name': user.get_full_name()}
+
+
+def attempt_payload(user, attempt_id):
+    """
+    Everything a per-attempt report shows, or None if the attempt isn't the user's.
+    """
+    attempt = TestAttempt.objects.filter(pk=attempt_id, user=user).values(
+        'id', 'score', 'taken_on', 'mock_test_id', 'mock_test__subject', 'mock_test__class_level',
+    ).first()
+    if attempt is None:
+        return None
+    selected = dict(UserAnswer.objects.filter(attempt_id=attempt_id).values_list('question_id', 'selected_option'))
+    questions = Question.objects.filter(mock_test_id=attempt['mock_test_id']).order_by('id').values_list(
+        'id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option',
+    )
+    return {
+        'kind': 'attempt',
+        'version': REPORT_VERSION,
+        'student': _student(user),
+        'attempt': {
+            'id': attempt['id'],
+            'subject': attempt['mock_test__subject'],
+            'class_level': attempt['mock_test__class_level'],
+            'taken_on': timezone.localtime(attempt['taken_on']).isoformat(),
+            'score': attempt['score'],
+        },
+        'questions': [
+            {
+                'text': text,
+                'options': {'A': a, 'B': b, 'C': c, 'D': d},
+                'selected': selected.get(question_id),
+                'correct': correct,
+            }
+            for question_id, text, a, b, c, d, correct in questions
+        ],
+    }
+
+
+def term_payload(user, start, end):
+    tests = TestAttempt.objects.filter(
+        user=user, taken_on__gte=day_start(start), taken_on__lt=day_start(end + timedelta(days=1)),
+    ).order_by('taken_on', 'id').values_list('id', 'mock_test__subject', 'taken_on', 'score')
+    daily = DailyQuizAttempt.objects.filter(
+        user=user, quiz_date__gte=start, quiz_date__lte=end,
+    ).order_by('quiz_date').values_list('quiz_date', 'score', 'percent')
+    return {
+        'kind': 'term',
+        'version': REPORT_VERSION,
+        'student': _student(user),
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'tests': [
+            {'id': pk, 'subject': subject, 'taken_on': timezone.localtime(taken_on).isoformat(), 'score': score}
+            for pk, subject, taken_on, score in tests
+        ],
+        'daily': [
+            {'quiz_date': quiz_date.isoformat(), 'score': score, 'percent': percent}
+            for quiz_date, score, percent in daily
+        ],
+    }
+
+
+def payload_digest(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def report_storage():
+    # Shared by the web processes and the render_reports workers, which may not share a disk
+    return storages[report_settings()['STORAGE']]
+
+
+def report_name(digest):
+    return f"{report_settings()['PREFIX']}/{digest[:2]}/{digest}.pdf"
+
+
+class ReportCacheStats:
+    """
+    Per-process counts of report requests served from storage vs. queued for rendering.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+cache_stats = ReportCacheStats()
+
+
+def request_report(user, kind, payload):
+    """
+    Returns (digest, storage name) when the PDF is rendered, else (digest, job) after
+    making sure a render job for exactly this payload is queued.
+    """
+    digest = payload_digest(payload)
+    job, created = ReportJob.objects.get_or_create(
+        digest=digest, defaults={'user': user, 'kind': kind, 'payload': payload},
+    )
+    if job.status == 'done':
+        name = report_name(digest)
+        if report_storage().exists(name):
+            cache_stats.record(True)
+            return digest, name
+        # Rendered before but the file is gone. A store that is slow to show new objects
+        # gets a grace period before the job renders again.
+        grace = timedelta(seconds=report_settings()['MISSING_GRACE_SECONDS'])
+        if job.finished_at is None or job.finished_at < timezone.now() - grace:
+            ReportJob.objects.filter(pk=job.pk, status='done').update(status='pending', tries=0, error='')
+        job.status = 'pending'
+    cache_stats.record(False)
+    return digest, job
+
+
+def report_response(request, user, kind, payload, filename):
+    """
+    200 with the PDF when it's cached (304 on a matching If-None-Match), 202 while it is
+    being rendered, 500 once rendering has failed for good.
+    """
+    digest, result = request_report(user, kind, payload)
+    etag = f'"{digest}"'
+    if isinstance(result, ReportJob):
+        if result.status == 'failed':
+            return JsonResponse({'status': 'failed', 'error': 'The report could not be generated.'}, status=500)
+        response = JsonResponse({'status': result.status}, status=202)
+        response['Retry-After'] = str(report_settings()['RETRY_AFTER_SECONDS'])
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    storage = report_storage()
+    disposition = f'attachment; filename="{filename}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    elif getattr(storage, 'querystring_auth', False):
+        # Object storage: the client downloads from a presigned URL, like papers and
+        # syllabi, instead of the PDF passing through this process
+        response = HttpResponseRedirect(storage.url(result, parameters={'ResponseContentDisposition': disposition}))
+        response['Cache-Control'] = 'no-store'
+        return response
+    else:
+        with storage.open(result, 'rb') as report:
+            response = HttpResponse(report.read(), content_type='application/pdf')
+        response['Content-Disposition'] = disposition
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _styles():
+    styles = getSampleStyleSheet()
+    return styles['Title'], styles['Heading2'], styles['Normal']
+
+
+def _table(rows, widths=None):
+    table = Table(rows, colWidths=widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#cbd5e1')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f1f5f9')]),
+    ]))
+    return table
+
+
+def _attempt_story(payload):
+    title, heading, normal = _styles()
+    attempt = payload['attempt']
+    student = payload['student']
+    questions = payload['questions']
+    correct = sum(1 for q in questions if q['selected'] and q['selected'].upper() == (q['correct'] or '').upper())
+    attempted = sum(1 for q in questions if q['selected'])
+    story = [
+        Paragraph('Crack_it Report Card', title),
+        Paragraph(escape(f"{student['name'] or student['username']} - {attempt['subject'] or 'Mock test'}"), heading),
+        Paragraph(escape(f"Taken on {attempt['taken_on'][:10]}"
+                         + (f" - Class {attempt['class_level']}" if attempt['class_level'] else '')), normal),
+        Spacer(1, 12),
+        _table([
+            ['Score', 'Questions', 'Attempted', 'Correct', 'Incorrect'],
+            [f"{attempt['score']}%", len(questions), attempted, correct, attempted - correct],
+        ]),
+        Spacer(1, 18),
+    ]
+    rows = [['#', 'Question', 'Your answer', 'Correct answer']]
+    for number, question in enumerate(questions, start=1):
+        selected = question['selected']
+        rows.append([
+            number,
+            Paragraph(escape(question['text']), normal),
+            Paragraph(escape(f"{selected}. {question['options'].get(selected.upper(), '')}" if selected else '-'), normal),
+            Paragraph(escape(f"{question['correct']}. {question['options'].get((question['correct'] or '').upper(), '')}"), normal),
+        ])
+    story.append(_table(rows, widths=[24, 240, 120, 120]))
+    return story
+
+
+def _term_story(payload):
+    title, heading, normal = _styles()
+    student = payload['student']
+    tests, daily = payload['tests'], payload['daily']
+    story = [
+        Paragraph('Crack_it Term Report', title),
+        Paragraph(escape(f"{student['name'] or student['username']} - {payload['from']} to {payload['to']}"), heading),
+        Spacer(1, 12),
+        _table([
+            ['Mock tests', 'Average score', 'Daily quizzes', 'Average daily quiz'],
+            [
+                len(tests),
+                f"{sum(t['score'] for t in tests) / len(tests):.1f}%" if tests else '-',
+                len(daily),
+                f"{sum(d['percent'] for d in daily) / len(daily):.1f}%" if daily else '-',
+            ],
+        ]),
+        Spacer(1, 18),
+    ]
+    if tests:
+        story += [Paragraph('Mock tests', heading), _table(
+            [['Date', 'Subject', 'Score']]
+            + [[t['taken_on'][:10], Paragraph(escape(t['subject'] or '-'), normal), f"{t['score']}%"] for t in tests],
+            widths=[90, 300, 80],
+        ), Spacer(1, 18)]
+    if daily:
+        story += [Paragraph('Daily quizzes', heading), _table(
+            [['Date', 'Correct', 'Score']] + [[d['quiz_date'], d['score'], f"{d['percent']}%"] for d in daily],
+            widths=[90, 80, 80],
+        )]
+    return story
+
+
+def render_pdf(payload):
+    buffer = io.BytesIO()
+    story = _attempt_story(payload) if payload['kind'] == 'attempt' else _term_story(payload)
+    # invariant=1 drops the creation timestamp so the same payload renders to the same bytes
+    SimpleDocTemplate(buffer, pagesize=A4, title='Crack_it report', invariant=1).build(story)
+    return buffer.getvalue()
+
+
+def write_report(digest, data):
+    # The job is only marked done after this returns, so readers never see a partial file
+    name = report_name(digest)
+    storage = report_storage()
+    if storage.exists(name):
+        storage.delete(name)  # Left by an attempt that failed later; saving would pick another name
+    storage.save(name, ContentFile(data))
+
+
+def claim_job():
+    """
+    Marks the oldest pending job as running and returns it; SKIP LOCKED lets several
+    workers poll the same queue without handing out a job twice.
+    """
+    with transaction.atomic():
+        job = ReportJob.objects.select_for_update(skip_locked=True).filter(
+            status='pending',
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.tries += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'tries', 'started_at'])
+    return job
+
+
+def run_job(job):
+    started = time.perf_counter()
+    try:
+        data = render_pdf(job.payload)
+        write_report(job.digest, data)
+    except Exception as exc:
+        job.status = 'failed' if job.tries >= report_settings()['MAX_TRIES'] else 'pending'
+        job.error = repr(exc)
+    else:
+        job.status = 'done'
+        job.error = ''
+        job.size = len(data)
+    job.render_ms = int((time.perf_counter() - started) * 1000)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'size', 'render_ms', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    # A worker that died mid-render leaves its job running forever otherwise
+    cutoff = timezone.now() - timedelta(seconds=report_settings()['STALE_SECONDS'])
+    return ReportJob.objects.filter(status='running', started_at__lt=cutoff).update(status='pending')
+
+
+def prune_reports(keep_days=None):
+    """
+    Deletes report files and finished jobs older than `keep_days`. Returns the number of jobs removed.
+    """
+    keep_days = report_settings()['KEEP_DAYS'] if keep_days is None else keep_days
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    old = ReportJob.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff)
+    storage = report_storage()
+    for digest in old.values_list('digest', flat=True).iterator():
+        storage.delete(report_name(digest))
+    return old.delete()[0]
+
+
+def _percentile(values, fraction):
+    return values[max(int(len(values) * fraction) - 1, 0)] if values else None
+
+
+def metrics(sample_size=500):
+    """
+    Render timings of the most recent jobs plus queue depth and this process's cache counters.
+    """
+    recent = list(ReportJob.objects.filter(status='done').order_by('-finished_at').values_list(
+        'kind', 'render_ms', 'size', 'created_at', 'started_at',
+    )[:sample_size])
+    by_kind = {}
+    for kind, render_ms, size, created_at, started_at in recent:
+        entry = by_kind.setdefault(kind, {'render_ms': [], 'bytes': [], 'wait_ms': []})
+        entry['render_ms'].append(render_ms)
+        entry['bytes'].append(size or 0)
+        entry['wait_ms'].append(int((started_at - created_at).total_seconds() * 1000))
+
+    renders = {}
+    for kind, entry in by_kind.items():
+        render_ms, wait_ms = sorted(entry['render_ms']), sorted(entry['wait_ms'])
+        renders[kind] = {
+            'count': len(render_ms),
+            'render_ms_p50': _percentile(render_ms, 0.5),
+            'render_ms_p95': _percentile(render_ms, 0.95),
+            'render_ms_max': render_ms[-1],
+            'queue_wait_ms_p50': _percentile(wait_ms, 0.5),
+            'queue_wait_ms_p95': _percentile(wait_ms, 0.95),
+            'avg_bytes': sum(entry['bytes']) // len(entry['bytes']),
+        }
+    queue = dict.fromkeys(['pending', 'running', 'failed'], 0)
+    for row in ReportJob.objects.filter(status__in=list(queue)).order_by().values('status').annotate(count=Count('id')):
+        queue[row['status']] = row['count']
+    return {
+        'renders': renders,
+        'queue': queue,
+        'cache_hits': cache_stats.hits,
+        'cache_misses': cache_stats.misses,
+    }
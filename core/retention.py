@@ -0,0 +1,229 @@
+import gzip
+import json
+import secrets
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AIChatHistory, DailyQuizAttempt, UserAnswer
+
+
+# Archives go to RETENTION_SETTINGS['STORAGE'], partitioned by user and month as
+#   <PREFIX>/<policy>/<user_id % 100>/<user_id>/<YYYY-MM>/<first row id>-<token>.jsonl.gz
+# so reading one user's history lists and opens only their own files. The two-digit
+# level keeps directories small.
+
+PAGE_SIZE = 100       # Archived rows per API page
+MAX_PAGE_SIZE = 1000
+
+
+class RetentionPolicy:
+    """
+    Describes how one table is archived: which rows are past policy, the columns
+    written to the archive and the column that decides the date partition.
+    `annotations` adds computed columns that `date_field` and `fields` may name.
+    """
+
+    def __init__(self, name, model, date_field, fields, user_field='user_id', date_is_datetime=True,
+                 annotations=None):
+        self.name = name
+        self.model = model
+        self.date_field = date_field
+        self.fields = fields
+        self.user_field = user_field
+        self.date_is_datetime = date_is_datetime
+        self.annotations = annotations or {}
+
+    def queryset(self):
+        return self.model.objects.annotate(**self.annotations)
+
+    @property
+    def keep_days(self):
+        return settings.RETENTION_SETTINGS['KEEP_DAYS'][self.name]
+
+    def cutoff(self, today=None):
+        today = today or timezone.localdate()
+        return today - timedelta(days=self.keep_days)
+
+    def expired(self, cutoff):
+        if self.date_is_datetime:
+            cutoff = timezone.make_aware(datetime.combine(cutoff, dt_time.min))
+        return self.queryset().filter(**{f'{self.date_field}__lt': cutoff})
+
+
+POLICIES = {
+    policy.name: policy for policy in [
+        # `timestamp` is when the conversation started; it is archived once idle, on the
+        # index's last update (rows saved before the index existed have only `timestamp`)
+        RetentionPolicy(
+            'ai_chat_history', AIChatHistory, 'last_activity',
+            ('id', 'user_id', 'conversation_id', 'messages', 'timestamp', 'last_activity'),
+            annotations={'last_activity': Coalesce('index_entry__updated_at', 'timestamp')},
+        ),
+        RetentionPolicy(
+            'user_answers', UserAnswer, 'attempt__taken_on',
+            ('id', 'attempt_id', 'attempt__user_id', 'attempt__taken_on', 'question_id', 'selected_option'),
+            user_field='attempt__user_id',
+        ),
+        RetentionPolicy(
+            'daily_quiz_attempts', DailyQuizAttempt, 'quiz_date',
+            ('id', 'user_id', 'quiz_date', 'score', 'percent', 'answers', 'attempted_at'),
+            date_is_datetime=False,
+        ),
+    ]
+}
+
+
+def archive_storage():
+    # Rows are deleted once archived, so the archive goes where every node can read it
+    return storages[settings.RETENTION_SETTINGS['STORAGE']]
+
+
+def user_prefix(policy, user_id):
+    return f"{settings.RETENTION_SETTINGS['PREFIX']}/{policy.name}/{user_id % 100:02d}/{user_id}"
+
+
+def partition_name(policy, user_id, month, first_id):
+    # Object storage can't append: each batch writes its own file in the month, named
+    # after its first row and never overwriting another
+    return f"{user_prefix(policy, user_id)}/{month:%Y-%m}/{first_id:012d}-{secrets.token_hex(4)}.jsonl.gz"
+
+
+def _partition_day(value):
+    if isinstance(value, str):
+        value = parse_datetime(value) if 'T' in value else date.fromisoformat(value)
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def write_partitions(policy, rows):
+    by_file = {}
+    for row in rows:
+        month = _partition_day(row[policy.date_field]).replace(day=1)
+        by_file.setdefault((row[policy.user_field], month), []).append(row)
+
+    storage = archive_storage()
+    for (user_id, month), file_rows in by_file.items():
+        data = ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in file_rows)
+        name = partition_name(policy, user_id, month, min(row['id'] for row in file_rows))
+        storage.save(name, ContentFile(gzip.compress(data.encode('utf-8'), mtime=0)))
+
+
+def archive_batch(policy, cutoff, batch_size):
+    """
+    Archives and deletes at most `batch_size` expired rows. Rows are written to the
+    archive before they are deleted, and the delete touches only those primary keys,
+    so each transaction is short and never range-locks the live part of the table.
+    """
+    pks = list(policy.expired(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return 0
+
+    rows = list(policy.queryset().filter(pk__in=pks).values(*policy.fields))
+    write_partitions(policy, rows)
+    with transaction.atomic():
+        policy.model.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def run_retention(names=None, batch_size=None, pause=None, dry_run=False, today=None):
+    """
+    Applies each retention policy in bounded batches. Returns {policy name: rows archived}
+    (or rows that would be archived, for a dry run).
+    """
+    config = settings.RETENTION_SETTINGS
+    batch_size = batch_size or config['BATCH_SIZE']
+    pause = config['BATCH_PAUSE_SECONDS'] if pause is None else pause
+    results = {}
+
+    for name in names or POLICIES:
+        policy = POLICIES[name]
+        cutoff = policy.cutoff(today)
+        if dry_run:
+            results[name] = policy.expired(cutoff).count()
+            continue
+
+        total = 0
+        while True:
+            archived = archive_batch(policy, cutoff, batch_size)
+            total += archived
+            if archived < batch_size:
+                break
+            time.sleep(pause)
+        results[name] = total
+    return results
+
+
+def read_archive(name, user_id, start=None, end=None, cursor=None):
+    """
+    Yields (cursor, row) for a user's archived rows of policy `name`, oldest month first,
+    optionally within a date range. Passing a yielded cursor back resumes at that row.
+    Rows archived twice after an interrupted run land in the same month and are yielded once.
+    """
+    policy = POLICIES[name]
+    storage = archive_storage()
+    prefix = user_prefix(policy, user_id)
+    try:
+        months, _ = storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+
+    first_month, first_line = cursor or ('', 0)
+    for month in sorted(months):
+        if month < first_month:
+            continue
+        month_start = date.fromisoformat(f"{month}-01")
+        if (end and month_start > end) or (start and month_start < start.replace(day=1)):
+            continue
+        # Lines are numbered across the month's files, in name order
+        seen = set()
+        line_number = -1
+        for file_name in sorted(storage.listdir(f"{prefix}/{month}")[1]):
+            with storage.open(f"{prefix}/{month}/{file_name}", 'rb') as raw, \
+                    gzip.open(raw, 'rt', encoding='utf-8') as fh:
+                for line in fh:
+                    line_number += 1
+                    row = json.loads(line)
+                    if row['id'] in seen:
+                        continue
+                    seen.add(row['id'])
+                    if month == first_month and line_number < first_line:
+                        continue
+                    day = _partition_day(row[policy.date_field])
+                    if (start and day < start) or (end and day > end):
+                        continue
+                    yield (month, line_number), row
+
+
+def archive_page(name, user_id, start=None, end=None, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of read_archive: (rows, cursor of the next page or None).
+    """
+    page = list(islice(read_archive(name, user_id, start, end, cursor), limit + 1))
+    next_cursor = page[limit][0] if len(page) > limit else None
+    return [row for _, row in page[:limit]], next_cursor
+
+
+def encode_cursor(cursor):
+    return f"{cursor[0]}:{cursor[1]}"
+
+
+def decode_cursor(value):
+    """
+    Parses a cursor from encode_cursor, raising ValueError when it isn't one.
+    """
+    month, line_number = value.split(':')
+    date.fromisoformat(f"{month}-01")
+    return month, int(line_number)
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Formula, Keyword, ReviewCard, ReviewDeck
+
+
+# Spaced repetition over keywords and formulas, scheduled with a variant of SM-2: each
+# successful review multiplies the card's interval by its ease, and forgetting it resets
+# the interval and lowers the ease. Only cards a user has been introduced to have a
+# ReviewCard row; "what's due" is an index range scan of the user's rows by due_at.
+
+# name: (ReviewCard.deck, model, fields returned with each card)
+DECKS = {
+    'keywords': (1, Keyword, ('id', 'subject', 'title', 'word', 'meaning')),
+    'formulas': (2, Formula, ('id', 'subject', 'heading', 'formula')),
+}
+DECK_NAMES = {number: name for name, (number, _, _) in DECKS.items()}
+
+GRADES = ('again', 'hard', 'good', 'easy')
+
+MIN_EASE = 1300
+MAX_INTERVAL_DAYS = 3650
+
+SCHEDULE_FIELDS = ('due_at', 'interval_days', 'ease', 'reps', 'lapses', 'last_reviewed_at')
+
+
+def schedule(card, grade, reviewed_at):
+    """
+    Applies one review to `card` in place.
+    """
+    config = settings.SPACED_REPETITION
+    if grade == 'again':
+        card.reps = 0
+        card.lapses += 1
+        card.ease = max(MIN_EASE, card.ease - 200)
+        card.interval_days = 0
+        card.due_at = reviewed_at + timedelta(minutes=config['RELEARN_MINUTES'])
+    else:
+        if grade == 'hard':
+            card.ease = max(MIN_EASE, card.ease - 150)
+        elif grade == 'easy':
+            card.ease += 150
+
+        if card.reps == 0:
+            interval = config['EASY_INTERVAL_DAYS'] if grade == 'easy' else 1
+        elif card.reps == 1 and grade != 'hard':
+            interval = config['EASY_INTERVAL_DAYS'] if grade == 'easy' else config['SECOND_INTERVAL_DAYS']
+        else:
+            factor = 1.2 if grade == 'hard' else card.ease / 1000 * (1.3 if grade == 'easy' else 1)
+            interval = max(card.interval_days + 1, round(card.interval_days * factor))
+
+        card.reps += 1
+        card.interval_days = min(interval, MAX_INTERVAL_DAYS)
+        card.due_at = reviewed_at + timedelta(days=card.interval_days)
+    card.last_reviewed_at = reviewed_at
+    return card
+
+
+def introduce(user, deck, count, now):
+    """
+    Creates cards for up to `count` items of `deck` the user has not seen yet, within the
+    daily new-card allowance, and returns them.
+    """
+    number, model, _ = DECKS[deck]
+    today = timezone.localdate(now)
+    with transaction.atomic():
+        state, _ = ReviewDeck.objects.select_for_update().get_or_create(user=user, deck=number)
+        if state.new_on != today:
+            state.new_on, state.new_count = today, 0
+        count = min(count, settings.SPACED_REPETITION['NEW_CARDS_PER_DAY'] - state.new_count)
+        if count <= 0:
+            return []
+        item_ids = list(
+            model.objects.filter(pk__gt=state.last_item_id).order_by('pk').values_list('pk', flat=True)[:count]
+        )
+        if not item_ids:
+            return []
+        ReviewCard.objects.bulk_create(
+            [ReviewCard(user=user, deck=number, item_id=item_id, due_at=now) for item_id in item_ids],
+            ignore_conflicts=True,
+        )
+        state.last_item_id = item_ids[-1]
+        state.new_count += len(item_ids)
+        state.save(update_fields=['last_item_id', 'new_on', 'new_count'])
+    return list(ReviewCard.objects.filter(user=user, deck=number, item_id__in=item_ids).order_by('item_id'))
+
+
+def due_cards(user, decks, limit, now=None):
+    """
+    Up to `limit` cards of `decks` due for review, oldest due first, topped up with new
+    cards when fewer are due. Each card gets an `item` dict with its content.
+    """
+    now = now or timezone.now()
+    queue = ReviewCard.objects.filter(user=user, due_at__lte=now)
+    if len(decks) < len(DECKS):
+        queue = queue.filter(deck__in=[DECKS[deck][0] for deck in decks])
+    cards = list(queue.order_by('due_at', 'pk')[:limit])
+    for deck in decks:
+        if len(cards) >= limit:
+            break
+        cards += introduce(user, deck, limit - len(cards), now)
+
+    missing = []
+    for deck in decks:
+        number, model, fields = DECKS[deck]
+        ids = [card.item_id for card in cards if card.deck == number]
+        items = {row['id']: row for row in model.objects.filter(pk__in=ids).values(*fields)} if ids else {}
+        for card in cards:
+            if card.deck == number:
+                card.item = items.get(card.item_id)
+                if card.item is None:
+                    missing.append(card.pk)
+    if missing:
+        # The keyword or formula was deleted since the card was introduced
+        ReviewCard.objects.filter(pk__in=missing).delete()
+    return [card for card in cards if card.item is not None]
+
+
+def submit_reviews(user, reviews, now=None):
+    """
+    Applies a batch of (card_id, grade, reviewed_at) reviews in one transaction, oldest
+    first; reviewed_at defaults to now. Reviews no newer than a card's last review are
+    ignored, so a resent batch changes nothing. Returns the updated cards.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        cards = ReviewCard.objects.select_for_update().filter(user=user).in_bulk(
+            [card_id for card_id, _, _ in reviews]
+        )
+        updated = {}
+        for card_id, grade, reviewed_at in sorted(reviews, key=lambda review: review[2] or now):
+            card = cards.get(card_id)
+            if card is None:
+                continue
+            reviewed_at = min(reviewed_at or now, now)
+            if card.last_reviewed_at and reviewed_at <= card.last_reviewed_at:
+                continue
+            updated[card_id] = schedule(card, grade, reviewed_at)
+        ReviewCard.objects.bulk_update(updated.values(), SCHEDULE_FIELDS, batch_size=500)
+    return list(updated.values())
+
+
+def card_row(card):
+    row = {
+        'card': card.pk,
+        'deck': DECK_NAMES[card.deck],
+        'due_at': card.due_at,
+        'interval_days': card.interval_days,
+        'reps': card.reps,
+        'lapses': card.lapses,
+        'new': card.last_reviewed_at is None,
+    }
+    if hasattr(card, 'item'):
+        row['item'] = card.item
+    return row
@@ -1,5 +1,6 @@
 
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from .models import (
     Syllabus,
     PreviousPaper,
@@ -16,6 +17,37 @@ from .models import (
 from django.db import models
 
 
+# Sparse fieldsets: ?fields=a,b returns only those fields, ?omit=c all but those
+
+def parse_fieldset(params, available):
+    """
+    The output fields asked for with ?fields=a,b and/or ?omit=c, in `available` order,
+    or None when neither is given.
+    """
+    if 'fields' not in params and 'omit' not in params:
+        return None
+    wanted = [name for name in params.get('fields', '').split(',') if name] or list(available)
+    omitted = [name for name in params.get('omit', '').split(',') if name]
+    unknown = sorted(set(wanted + omitted) - set(available))
+    if unknown:
+        raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."})
+    return tuple(name for name in available if name in wanted and name not in omitted)
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin returning only the fields in context['fields'] (from
+    parse_fieldset), or all of them when it is None.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class SyllabusSerializer(serializers.ModelSerializer):
     pdf_url = serializers.SerializerMethodField()
 
@@ -51,7 +83,7 @@ class PreviousPaperSerializer(serializers.ModelSerializer):
 class KeywordSerializer(serializers.ModelSerializer):
     class Meta:
         model = Keyword
-        fields = ['subject', 'title', 'word', 'meaning']
+        fields = ['id', 'subject', 'title', 'word', 'meaning']
 
 
 class InterviewQuestionSerializer(serializers.ModelSerializer):
@@ -98,7 +130,7 @@ class UserAnswerSerializer(serializers.ModelSerializer):
         fields = ['question_id', 'selected_option']
 
 
-class TestAttemptSerializer(serializers.ModelSerializer):
+class TestAttemptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     mock_test = MockTestSerializer()
     test_name = serializers.CharField(source='mock_test.subject', read_only=True)
@@ -159,3 +191,116 @@ class FormulaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Formula
         fields = ['id', 'subject', 'heading', 'formula']
+
+
+# Read-only fast path: the same rows as the serializers above, built straight from `.values()`
+
+def file_url(storage, name, request=None):
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+class ValuesSerializer:
+    """
+    Builds list rows from a `.values()` queryset without instantiating models or
+    serializer fields. Subclasses declare `value_fields` and reshape rows in `to_row`.
+    Output fields computed from other columns are declared in `derived_fields`, so a
+    sparse fieldset (`fields`) selects only the columns it needs.
+    """
+    value_fields = ()
+    output_fields = None      # Defaults to value_fields
+    derived_fields = {}       # {output field: columns it is computed from}
+
+    def __init__(self, context=None, fields=None):
+        self.context = context or {}
+        self.fields = fields  # Output fields to return, None for all of them
+
+    @classmethod
+    def get_output_fields(cls):
+        return cls.output_fields if cls.output_fields is not None else cls.value_fields
+
+    def columns(self, fields):
+        columns = {}
+        for name in fields:
+            columns.update(dict.fromkeys(self.derived_fields.get(name, (name,))))
+        return tuple(columns)
+
+    def to_row(self, values):
+        return values
+
+    def rows(self, queryset):
+        to_row = self.to_row
+        if self.fields is None:
+            return [to_row(values) for values in queryset.values(*self.value_fields)]
+        fields = self.fields
+        return [
+            {name: row[name] for name in fields if name in row}
+            for row in map(to_row, queryset.values(*self.columns(fields)))
+        ]
+
+
+class SyllabusValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'board', 'class_level', 'subject', 'content', 'pdf')
+    output_fields = ('id', 'board', 'class_level', 'subject', 'content', 'pdf_url')
+    derived_fields = {'pdf_url': ('pdf',)}
+
+    def to_row(self, values):
+        if 'pdf' in values:
+            storage = Syllabus._meta.get_field('pdf').storage
+            values['pdf_url'] = file_url(storage, values.pop('pdf'), self.context.get('request'))
+        return values
+
+
+class PreviousPaperValuesSerializer(ValuesSerializer):
+    value_fields = ('title', 'year', 'exam_type', 'file')
+    output_fields = ('title', 'year', 'exam_type', 'pdf_url')
+    derived_fields = {'pdf_url': ('file',)}
+
+    def to_row(self, values):
+        if 'file' in values:
+            storage = PreviousPaper._meta.get_field('file').storage
+            values['pdf_url'] = file_url(storage, values.pop('file'), self.context.get('request'))
+        return values
+
+
+class KeywordValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'subject', 'title', 'word', 'meaning')
+
+
+class InterviewQuestionValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'department', 'question', 'answer')
+    output_fields = ('id', 'department', 'department_label', 'question', 'answer')
+    derived_fields = {'department_label': ('department',)}
+    department_labels = dict(InterviewQuestion.DEPARTMENT_CHOICES)
+
+    def to_row(self, values):
+        if 'department' in values:
+            department = values['department']
+            values['department_label'] = self.department_labels.get(department, department)
+        return values
+
+
+class MockTestValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'subject', 'description', 'date')
+
+
+class FormulaValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'subject', 'heading', 'formula')
+
+
+class QuestionValuesSerializer(ValuesSerializer):
+    value_fields = ('id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d')
+    output_fields = ('id', 'question_text', 'options')
+    derived_fields = {'options': ('option_a', 'option_b', 'option_c', 'option_d')}
+
+    def to_row(self, values):
+        if 'option_a' in values:
+            values['options'] = {
+                'A': values.pop('option_a'),
+                'B': values.pop('option_b'),
+                'C': values.pop('option_c'),
+                'D': values.pop('option_d'),
+            }
+        return values
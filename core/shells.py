@@ -0,0 +1,125 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from .compression import ENCODING_SUFFIXES, negotiate_encoding, write_precompressed
+
+
+# Pages whose templates are static apart from the CSRF cookie, keyed by shell name
+SHELL_PAGES = {
+    'index': 'index.html',
+    'syllabus': 'syllabus.html',
+    'keywords': 'keywords.html',
+    'interview': 'interview.html',
+    'previouspaper': 'previouspaper.html',
+    'results': 'results.html',
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+# Shells are served without rendering, so the CSRF cookie is fetched by the page itself
+CSRF_BOOTSTRAP = (
+    "<script>if(!/(^|;\\s*)csrftoken=/.test(document.cookie))"
+    "{{fetch('{url}',{{credentials:'same-origin'}});}}</script>"
+)
+
+_manifest_cache = {'mtime': None, 'data': {}}
+
+
+def shell_dir():
+    return settings.PRERENDERED_SHELLS['DIR']
+
+
+def render_shell(template_name):
+    html = render_to_string(template_name)
+    bootstrap = CSRF_BOOTSTRAP.format(url=reverse('csrf-token'))
+    head, sep, tail = html.rpartition('</body>')
+    if not sep:
+        return html + bootstrap
+    return head + bootstrap + sep + tail
+
+
+def build_shells(names=None):
+    """
+    Renders each shell page once and writes it with precompressed variants.
+    Returns the manifest of {name: {'file': ..., 'etag': ...}}.
+    """
+    directory = shell_dir()
+    manifest_path = directory / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    for name in names or SHELL_PAGES:
+        data = render_shell(SHELL_PAGES[name]).encode('utf-8')
+        filename = f"{name}.html"
+        write_precompressed(directory / filename, data)
+        manifest[name] = {
+            'file': filename,
+            'etag': hashlib.sha256(data).hexdigest()[:20],
+        }
+
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def load_manifest():
+    manifest_path = shell_dir() / MANIFEST_NAME
+    try:
+        mtime = manifest_path.stat().st_mtime
+    except OSError:
+        return {}
+    if _manifest_cache['mtime'] != mtime:
+        _manifest_cache['data'] = json.loads(manifest_path.read_text())
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def shell_response(request, name):
+    """
+    Serves a pre-rendered shell, or returns None if it hasn't been built.
+    """
+    entry = load_manifest().get(name)
+    if entry is None:
+        return None
+
+    encoding = negotiate_encoding(request)
+    path = shell_dir() / entry['file']
+    if encoding:
+        path = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+    etag = f'"{entry["etag"]}-{encoding or "identity"}"'
+
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        response = HttpResponse(content, content_type='text/html; charset=utf-8')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def prerendered_shell(name):
+    """
+    Serves the pre-rendered shell `name` when it exists, falling back to the wrapped view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if settings.PRERENDERED_SHELLS['ENABLED'] and request.method in ('GET', 'HEAD'):
+                response = shell_response(request, name)
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
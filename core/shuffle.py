@@ -0,0 +1,95 @@
+import hashlib
+from itertools import permutations
+
+from django.conf import settings
+
+
+# Per-student question and option order. Nothing is stored: a student's seed is a keyed
+# hash of (user, test, QUESTION_SHUFFLE['VERSION']) and every question's position and
+# option permutation is derived from the seed and the question id, so the order is the
+# same on every fetch, survives edits to other questions and is undone when grading.
+# Students answer with the letters they were shown; answers are stored and graded in
+# the original letters.
+
+LETTERS = 'ABCD'
+
+# The 24 orders of four options: PERMUTATIONS[k][shown slot] = original slot
+PERMUTATIONS = list(permutations(range(4)))
+# Translation tables for whole answer strings: shown letter -> original letter and back
+TO_ORIGINAL = [str.maketrans(LETTERS, ''.join(LETTERS[i] for i in perm)) for perm in PERMUTATIONS]
+TO_SHOWN = [str.maketrans(''.join(LETTERS[i] for i in perm), LETTERS) for perm in PERMUTATIONS]
+
+_MASK = (1 << 64) - 1
+
+
+def enabled():
+    return settings.QUESTION_SHUFFLE['ENABLED']
+
+
+def student_seed(user_id, scope):
+    """
+    64-bit seed for one student on one test; `scope` names the test, e.g. 'mock_test:12'.
+    Keyed with SECRET_KEY so students can't work out each other's order.
+    """
+    message = f"{scope}:{user_id}:{settings.QUESTION_SHUFFLE['VERSION']}".encode()
+    digest = hashlib.blake2b(message, digest_size=8, key=settings.SECRET_KEY.encode()[:64]).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _mix(seed, item_id):
+    # splitmix64 finalizer: a cheap, well-spread hash of (seed, item id)
+    z = (seed + (item_id + 1) * 0x9E3779B97F4A7C15) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+class Shuffle:
+    """
+    One student's view of a list of items: `order[shown position]` is the item's index
+    in `item_ids`, and `option_perm[item id]` its index into PERMUTATIONS.
+    """
+
+    def __init__(self, seed, item_ids):
+        hashes = [_mix(seed, item_id) for item_id in item_ids]
+        self.order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        self.option_perm = {item_id: h % 24 for item_id, h in zip(item_ids, hashes)}
+
+    def shown_options(self, item_id, options):
+        """`options`, in original order, in the order this student sees them."""
+        perm = PERMUTATIONS[self.option_perm[item_id]]
+        return [options[i] for i in perm]
+
+    def to_original(self, item_id, letter):
+        return letter.upper().translate(TO_ORIGINAL[self.option_perm[item_id]])
+
+    def to_shown(self, item_id, letter):
+        return letter.upper().translate(TO_SHOWN[self.option_perm[item_id]])
+
+
+def shuffle_question_rows(rows, seed):
+    """
+    Reorders QuestionValuesSerializer rows and relabels their options for the student
+    with `seed`.
+    """
+    shuffle = Shuffle(seed, [row['id'] for row in rows])
+    shuffled = []
+    for index in shuffle.order:
+        row = rows[index]
+        shown = shuffle.shown_options(row['id'], [row['options'][letter] for letter in LETTERS])
+        shuffled.append({**row, 'options': dict(zip(LETTERS, shown))})
+    return shuffled
+
+
+def unshuffle_answers(answers, seed, item_ids):
+    """
+    {question id: shown letter} -> {question id: original letter}. Ids outside
+    `item_ids` and values that aren't a single letter are dropped.
+    """
+    shuffle = Shuffle(seed, item_ids)
+    original = {}
+    for item_id in item_ids:
+        letter = answers.get(str(item_id))
+        if isinstance(letter, str) and len(letter) == 1:
+            original[str(item_id)] = shuffle.to_original(item_id, letter)
+    return original
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import dedup, exams, formulas, packs  # noqa: F401 (exams and packs register invalidation handlers)
+from .invalidation import publish_on_commit
+from .models import AIChatHistory, AIConversationIndex, DailyQuiz, Formula, MockTest, Question
+
+
+@receiver(post_save, sender=AIChatHistory)
+def update_conversation_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    AIConversationIndex.objects.update_or_create(
+        chat=instance,
+        defaults={**AIConversationIndex.summarize(instance), 'updated_at': timezone.now()},
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=DailyQuiz)
+def index_near_duplicates(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    dedup.index_items(dedup.MODEL_KINDS[sender], [instance])
+
+
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=DailyQuiz)
+def unindex_near_duplicates(sender, instance, **kwargs):
+    dedup.remove_items(dedup.MODEL_KINDS[sender], [instance.pk])
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_mock_test(sender, instance, **kwargs):
+    # Question packs and answer keys, on every process. After commit, so the rebuild it
+    # triggers reads the new rows
+    publish_on_commit('mock-test', instance.mock_test_id)
+
+
+@receiver(post_delete, sender=MockTest)
+def remove_mock_test(sender, instance, **kwargs):
+    publish_on_commit('mock-test-deleted', instance.pk)
+
+
+@receiver(pre_save, sender=DailyQuiz)
+def remember_quiz_date(sender, instance, raw=False, **kwargs):
+    # A question moved to another day changes both quizzes
+    if instance.pk and not raw:
+        instance._previous_quiz_date = DailyQuiz.objects.filter(pk=instance.pk).values_list('quiz_date', flat=True).first()
+
+
+@receiver(post_save, sender=DailyQuiz)
+@receiver(post_delete, sender=DailyQuiz)
+def invalidate_daily_quiz(sender, instance, **kwargs):
+    for day in {instance.quiz_date, getattr(instance, '_previous_quiz_date', None)} - {None}:
+        publish_on_commit('daily-quiz', day.isoformat())
+
+
+@receiver(pre_save, sender=Formula)
+def remember_formula_subject(sender, instance, raw=False, **kwargs):
+    # A formula moved to another subject changes both sections
+    if instance.pk and not raw:
+        instance._previous_subject = Formula.objects.filter(pk=instance.pk).values_list('subject', flat=True).first()
+
+
+@receiver(post_save, sender=Formula)
+@receiver(post_delete, sender=Formula)
+def invalidate_formula_section(sender, instance, **kwargs):
+    subjects = {instance.subject, getattr(instance, '_previous_subject', None)} - {None}
+    transaction.on_commit(lambda: formulas.bump_versions(subjects))
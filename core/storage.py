@@ -0,0 +1,9 @@
+from django.core.files.storage import storages
+
+
+def document_storage():
+    """
+    Storage of PreviousPaper.file and Syllabus.pdf: STORAGES['documents'], the local
+    disk by default or object storage (core/object_storage.py).
+    """
+    return storages['documents']
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.admin_scale import EstimatedCountPaginator
+from core.models import MockTest, Question, TestAttempt, UserAnswer
+
+
+User = get_user_model()
+
+URL = '/admin/core/testattempt/'
+
+
+class ScaleModeTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        now = timezone.now()
+        self.attempts = []
+        for n in range(7):
+            attempt = TestAttempt.objects.create(user=self.admin, mock_test=self.mock_test, score=n)
+            self.attempts.append(attempt)
+        # Pairs share a timestamp, so sorting by it needs the pk as tie-breaker
+        for n, attempt in enumerate(self.attempts):
+            TestAttempt.objects.filter(pk=attempt.pk).update(taken_on=now - timedelta(hours=n // 2))
+        per_page = mock.patch.object(admin.site._registry[TestAttempt], 'list_per_page', 3)
+        per_page.start()
+        self.addCleanup(per_page.stop)
+
+    def walk(self, params):
+        pks, cursor_pages = [], 0
+        url = URL + '?' + params if params else URL
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            changelist = response.context['cl']
+            self.assertTrue(changelist.keyset)
+            pks += [obj.pk for obj in changelist.result_list]
+            url = URL + changelist.next_page_url if changelist.next_page_url else None
+            cursor_pages += 1
+        return pks, cursor_pages
+
+    def test_pages_by_cursor(self):
+        pks, pages = self.walk('')
+        self.assertEqual(pks, [attempt.pk for attempt in reversed(self.attempts)])
+        self.assertEqual(pages, 3)
+
+    def test_cursor_over_a_sorted_column(self):
+        pks, _ = self.walk('o=4')  # taken_on ascending, ties by -pk
+        expected = sorted(self.attempts, key=lambda a: (-(self.attempts.index(a) // 2), -a.pk))
+        self.assertEqual(pks, [attempt.pk for attempt in expected])
+
+    def test_bad_cursor(self):
+        response = self.client.get(URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('e=1', response['Location'])
+
+    @override_settings(ADMIN_SCALE={'EXACT_COUNT_LIMIT': 5, 'INLINE_ROWS_LIMIT': 200})
+    def test_counts_are_capped(self):
+        paginator = EstimatedCountPaginator(TestAttempt.objects.filter(score__gte=0), 3)
+        self.assertEqual((paginator.count, paginator.is_estimate), (5, True))
+        paginator = EstimatedCountPaginator(TestAttempt.objects.filter(score__lt=3), 3)
+        self.assertEqual((paginator.count, paginator.is_estimate), (3, False))
+
+    @override_settings(ADMIN_SCALE={'EXACT_COUNT_LIMIT': 100000, 'INLINE_ROWS_LIMIT': 1})
+    def test_long_attempts_link_to_their_answers(self):
+        attempt = self.attempts[0]
+        for correct in 'AB':
+            question = Question.objects.create(
+                mock_test=self.mock_test, question_text='?', option_a='a', option_b='b', option_c='c',
+                option_d='d', correct_option=correct,
+            )
+            UserAnswer.objects.create(attempt=attempt, question=question, selected_option='A')
+        response = self.client.get(f'{URL}{attempt.pk}/change/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['inline_admin_formsets'], [])
+        self.assertContains(response, f'/admin/core/useranswer/?attempt__id__exact={attempt.pk}')
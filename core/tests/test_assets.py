@@ -0,0 +1,84 @@
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from core import assets
+
+
+class MinifyTests(SimpleTestCase):
+    def test_js_drops_comment_lines_and_indentation(self):
+        js = "\n    // note\n    const a = 1;   \n\n    if (a) {\n        go();\n    }\n"
+        self.assertEqual(assets.minify_js(js), "const a = 1;\nif (a) {\ngo();\n}")
+
+    def test_js_keeps_template_literals_untouched(self):
+        js = (
+            "    const html = `<ul>\n"
+            "        // not a comment\n"
+            "\n"
+            "        ${items.map(i => `<li>${i}</li>`).join('')}  \n"
+            "    </ul>`;\n"
+            "    // a comment\n"
+            "    const quote = 'it`s';\n"
+        )
+        self.assertEqual(assets.minify_js(js), (
+            "const html = `<ul>\n"
+            "        // not a comment\n"
+            "\n"
+            "        ${items.map(i => `<li>${i}</li>`).join('')}  \n"
+            "    </ul>`;\n"
+            "const quote = 'it`s';"
+        ))
+
+    def test_js_comment_mentioning_a_backtick(self):
+        js = "/* wrap in ` quotes */\n    const a = 1;\n"
+        self.assertEqual(assets.minify_js(js), "/* wrap in ` quotes */\nconst a = 1;")
+
+    def test_css(self):
+        css = "/* c */\n.a :hover {\n    color: red;\n    margin : 0;\n}\n"
+        self.assertEqual(assets.minify_css(css), ".a :hover{color:red;margin :0}")
+
+
+class BundleTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.templates = self.root / 'templates'
+        self.templates.mkdir()
+        (self.templates / 'page.html').write_text(
+            "<style>\n  body { color: red; }\n</style>\n<script>\n  const a = 1;\n</script>\n"
+            "<script>\n  const b = {{ value }};\n</script>\n"
+        )
+        settings_override = override_settings(ASSET_PIPELINE={'DIR': self.root / 'bundles', 'URL': '/assets/'})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_build_extracts_only_static_blocks(self):
+        manifest = assets.build_assets([self.templates])
+        self.assertEqual(len(manifest['files']), 2)
+        linked = assets.link_assets((self.templates / 'page.html').read_text(), manifest)
+        self.assertIn('<link rel="stylesheet" href="/assets/css/page.', linked)
+        self.assertIn('<script src="/assets/js/page.', linked)
+        self.assertIn('{{ value }}', linked)
+
+    def test_serves_known_bundles_only(self):
+        manifest = assets.build_assets([self.templates])
+        name = next(name for name in manifest['files'] if name.endswith('.js'))
+        response = self.client.get(f'/assets/{name}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(gzip.decompress(response.content), b'const a = 1;')
+        self.assertEqual(response['Cache-Control'], assets.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.client.get('/assets/js/other.js').status_code, 404)
+
+    def test_manifest_is_reread_when_rebuilt(self):
+        assets.build_assets([self.templates])
+        self.assertEqual(len(assets.bundle_files()), 2)
+        (self.templates / 'other.html').write_text("<script>\n  const c = 3;\n</script>\n")
+        assets.build_assets([self.templates])
+        manifest_path = self.root / 'bundles' / assets.MANIFEST_NAME
+        stat = manifest_path.stat()
+        os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(len(assets.bundle_files()), 3)
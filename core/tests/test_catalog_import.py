@@ -0,0 +1,94 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import catalog_import
+from core.catalog_import import CATALOGS, CatalogFileError, import_catalog
+from core.models import Formula, InterviewQuestion, Keyword
+
+
+HEADER = 'subject,word,title,meaning\n'
+
+
+def csv_file(*lines):
+    return io.BytesIO((HEADER + ''.join(line + '\n' for line in lines)).encode())
+
+
+class CatalogImportTests(TestCase):
+    def load(self, fileobj, catalog='keywords', file_format='csv', **kwargs):
+        return import_catalog(CATALOGS[catalog], fileobj, file_format, **kwargs)
+
+    def counts(self, result):
+        return (result.created, result.updated, result.unchanged, result.skipped)
+
+    def test_reimport_matches_on_the_natural_key(self):
+        result = self.load(csv_file('Physics,velocity,Motion,speed with a direction', 'Physics,mass,,amount of matter'))
+        self.assertEqual(self.counts(result), (2, 0, 0, 0))
+        self.assertIsNone(Keyword.objects.get(word='mass').title)
+
+        result = self.load(csv_file(
+            ' physics ,  velocity ,Motion,speed with a direction',  # Same key and text once stripped
+            'Physics,MASS,,Amount of matter',                       # Same key; the change of case is an update
+            'Chemistry,mole,,6.022e23 particles',
+        ))
+        self.assertEqual(self.counts(result), (1, 1, 1, 0))
+        self.assertEqual(Keyword.objects.count(), 3)
+        self.assertEqual(Keyword.objects.get(word='MASS').meaning, 'Amount of matter')
+
+        result = self.load(csv_file('Physics,velocity,Motion,speed with a direction', 'Physics,MASS,,Amount of matter'))
+        self.assertEqual(self.counts(result), (0, 0, 2, 0))
+
+    def test_bad_rows_are_skipped_and_reported(self):
+        result = self.load(csv_file(
+            'Physics,velocity,,speed',
+            'Astrology,star,,a sign',
+            'Physics,,,no word',
+            'Physics,VELOCITY,,again',
+        ))
+        self.assertEqual(self.counts(result), (1, 0, 0, 3))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5])
+        self.assertIn('not one of the choices', result.errors[0][1])
+        self.assertEqual(result.errors[2][1], 'Same subject + word as line 2.')
+
+    def test_batches_and_dry_run(self):
+        lines = [json.dumps({'department': 'Physics', 'question': f'Q{n}?', 'answer': 'A'}) for n in range(7)]
+        data = '\n'.join(lines).encode()
+        result = self.load(io.BytesIO(data), 'interview-questions', 'jsonl', dry_run=True, batch_size=3)
+        self.assertEqual(self.counts(result), (7, 0, 0, 0))
+        self.assertFalse(InterviewQuestion.objects.exists())
+        self.load(io.BytesIO(data), 'interview-questions', 'jsonl', batch_size=3)
+        self.assertEqual(set(InterviewQuestion.objects.values_list('department', flat=True)), {'physics'})
+        self.assertEqual(InterviewQuestion.objects.count(), 7)
+
+    def test_unreadable_files(self):
+        with self.assertRaisesMessage(CatalogFileError, 'The header has no word column.'):
+            self.load(io.BytesIO(b'subject,meaning\nPhysics,x\n'))
+        with self.assertRaisesMessage(CatalogFileError, 'Line 2 is not valid JSON.'):
+            self.load(io.BytesIO(b'{"subject": "Physics"}\n{oops\n'), file_format='jsonl')
+
+    def test_changes_run_the_catalog_hook_after_commit(self):
+        rows = io.BytesIO(b'subject,heading,formula\nPhysics,Speed,v = d / t\n')
+        with mock.patch.object(catalog_import.CATALOGS['formulas'], 'on_change') as on_change:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.load(rows, 'formulas')
+            self.assertEqual(on_change.call_count, 1)
+            rows.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                result = self.load(rows, 'formulas')
+            self.assertEqual((result.unchanged, on_change.call_count), (1, 1))
+        self.assertEqual(Formula.objects.get().formula, 'v = d / t')
+
+    def test_command_reports_the_counts(self):
+        Keyword.objects.create(subject='Physics', word='mass', meaning='old')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'keywords.csv'
+        path.write_bytes(csv_file('Physics,mass,,new', 'Physics,force,,a push').getvalue())
+        out = io.StringIO()
+        call_command('load_catalog', 'keywords', str(path), stdout=out)
+        self.assertIn('keywords: 1 created, 1 updated, 0 unchanged, 0 skipped', out.getvalue())
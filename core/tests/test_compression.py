@@ -0,0 +1,95 @@
+import gzip
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase
+
+from core import middleware as compression_middleware
+from core.compression import negotiate_encoding, parse_accept_encoding, timed_compress
+from core.middleware import CompressionMiddleware
+
+
+BODY = {'items': ['x' * 40] * 100}
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_parse_qualities(self):
+        self.assertEqual(parse_accept_encoding('gzip;q=0.5, br, *;q=0'), {'gzip': 0.5, 'br': 1.0, '*': 0.0})
+
+    def test_prefers_first_available_accepted(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(negotiate_encoding(request, ('br', 'gzip')), 'gzip')
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='identity')
+        self.assertIsNone(negotiate_encoding(request))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def run_middleware(self, view, path='/api/anything/', **headers):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='gzip', **headers)
+        return CompressionMiddleware(view)(request)
+
+    def test_compresses_json(self):
+        response = self.run_middleware(lambda request: JsonResponse(BODY))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), JsonResponse(BODY).content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_skips_small_and_binary_bodies(self):
+        response = self.run_middleware(lambda request: JsonResponse({'ok': True}))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.run_middleware(lambda request: HttpResponse(b'\0' * 4096, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_skips_responses_carrying_the_csrf_token(self):
+        def view(request):
+            return HttpResponse(f'<form>{get_token(request)}</form>' + 'x' * 4096)
+        self.assertFalse(self.run_middleware(view).has_header('Content-Encoding'))
+
+    def test_skips_responses_setting_the_session_cookie(self):
+        def view(request):
+            response = JsonResponse(BODY)
+            response.set_cookie('sessionid', 'abc')
+            return response
+        self.assertFalse(self.run_middleware(view).has_header('Content-Encoding'))
+
+    def test_streams_compressed_chunks(self):
+        response = self.run_middleware(
+            lambda request: StreamingHttpResponse((b'row,' * 100 for _ in range(10)), content_type='text/csv')
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'row,' * 1000)
+
+    def test_weakens_strong_etags(self):
+        def view(request):
+            response = JsonResponse(BODY)
+            response['ETag'] = '"v1"'
+            return response
+        self.assertEqual(self.run_middleware(view)['ETag'], 'W/"v1"')
+
+    def test_catalog_bodies_are_compressed_once_per_version(self):
+        middleware = CompressionMiddleware(lambda request: JsonResponse(BODY))
+        first = middleware(RequestFactory().get('/api/keywords/', HTTP_ACCEPT_ENCODING='gzip'))
+        second = middleware(RequestFactory().get('/api/keywords/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(len(middleware.cache), 1)
+
+    def test_async_requests_compress_off_the_event_loop(self):
+        threads = {}
+
+        async def view(request):
+            threads['loop'] = threading.get_ident()
+            return JsonResponse(BODY)
+
+        def compress(*args):
+            threads['compress'] = threading.get_ident()
+            return timed_compress(*args)
+
+        request = RequestFactory().get('/api/anything/', HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch.object(compression_middleware, 'timed_compress', compress):
+            response = async_to_sync(CompressionMiddleware(view))(request)
+        self.assertEqual(gzip.decompress(response.content), JsonResponse(BODY).content)
+        self.assertNotEqual(threads['compress'], threads['loop'])
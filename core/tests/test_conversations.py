@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import AIChatHistory, AIConversationIndex
+
+
+User = get_user_model()
+
+
+def turn(number):
+    return [{'role': 'user', 'content': f'question {number}'}, {'role': 'assistant', 'content': f'answer {number}'}]
+
+
+class ConversationIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+
+    def test_index_follows_each_save(self):
+        chat = AIChatHistory.objects.create(user=self.user, conversation_id='c1', messages=turn(1))
+        entry = AIConversationIndex.objects.get(chat=chat)
+        self.assertEqual((entry.title, entry.last_message_preview, entry.message_count), ('question 1', 'answer 1', 2))
+        chat.messages += turn(2)
+        chat.save()
+        entry.refresh_from_db()
+        self.assertEqual((entry.title, entry.last_message_preview, entry.message_count), ('question 1', 'answer 2', 4))
+
+    def test_list_is_keyset_paginated_newest_first(self):
+        now = timezone.now()
+        chats = [AIChatHistory.objects.create(user=self.user, messages=turn(n)) for n in range(5)]
+        for n, chat in enumerate(chats):
+            AIConversationIndex.objects.filter(chat=chat).update(updated_at=now - timedelta(minutes=n // 2))
+        other = User.objects.create_user('other', password='pw')
+        AIChatHistory.objects.create(user=other, messages=turn(9))
+
+        ids, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get('/api/ai-chat/conversations/', params).json()
+            ids += [entry['id'] for entry in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        # Ties on updated_at fall back to the chat id, descending
+        self.assertEqual(ids, [chats[1].pk, chats[0].pk, chats[3].pk, chats[2].pk, chats[4].pk])
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/api/ai-chat/conversations/', {'cursor': 'x'}).status_code, 400)
+
+    def test_messages_walk_backwards(self):
+        chat = AIChatHistory.objects.create(user=self.user, messages=sum((turn(n) for n in range(3)), []))
+        url = f'/api/ai-chat/conversations/{chat.pk}/messages/'
+        last = self.client.get(url, {'limit': 4}).json()
+        self.assertEqual([m['content'] for m in last['messages']], ['question 1', 'answer 1', 'question 2', 'answer 2'])
+        self.assertEqual(last['next_before'], 2)
+        first = self.client.get(url, {'limit': 4, 'before': last['next_before']}).json()
+        self.assertEqual([m['content'] for m in first['messages']], ['question 0', 'answer 0'])
+        self.assertIsNone(first['next_before'])
+
+    def test_other_users_chats_are_not_found(self):
+        chat = AIChatHistory.objects.create(user=User.objects.create_user('other', password='pw'), messages=turn(1))
+        response = self.client.get(f'/api/ai-chat/conversations/{chat.pk}/messages/')
+        self.assertEqual(response.status_code, 404)
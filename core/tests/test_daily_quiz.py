@@ -0,0 +1,85 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+
+from core import invalidation, item_stats
+from core.models import DailyQuiz, DailyQuizAttempt, DailyQuizStatistics
+
+
+User = get_user_model()
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': False, 'VERSION': 1})
+class DailyQuizSubmitTests(TestCase):
+    def setUp(self):
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        for number, correct in enumerate('ABCD'):
+            DailyQuiz.objects.create(
+                question=f'Question {number}', option_a='a', option_b='b', option_c='c', option_d='d',
+                correct_option=correct, quiz_date=localdate(),
+            )
+
+    def submit(self, answers, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(
+            '/submit-daily-quiz/', json.dumps({'answers': answers}), content_type='application/json', **headers
+        )
+
+    def test_grades_in_one_round_trip(self):
+        response = self.submit(['A', 'B', 'D', None])
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['score'], result['percent']), (2, 50))
+        self.assertEqual(result['correct_answers'], ['A', 'B', 'C', 'D'])
+        attempt = DailyQuizAttempt.objects.get(user=self.user)
+        self.assertEqual(attempt.answers, ['A', 'B', 'D', None])
+
+    def test_retry_with_the_same_key_gets_the_original_result(self):
+        first = self.submit(['A', 'B', 'C', 'D'], key='k1').json()
+        retry = self.submit(['A', 'A', 'A', 'A'], key='k1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first)
+        self.assertEqual(DailyQuizAttempt.objects.filter(user=self.user).count(), 1)
+
+    def test_second_submission_is_refused(self):
+        self.submit(['A', 'B', 'C', 'D'], key='k1')
+        self.assertEqual(self.submit(['A', 'B', 'C', 'D'], key='k2').status_code, 400)
+        self.assertEqual(self.submit(['A', 'B', 'C', 'D']).status_code, 400)
+        self.assertEqual(DailyQuizAttempt.objects.get(user=self.user).score, 4)
+
+    def test_key_that_is_not_a_string(self):
+        response = self.client.post(
+            '/submit-daily-quiz/', json.dumps({'answers': ['A'], 'idempotency_key': 12}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DailyQuizAttempt.objects.get(user=self.user).idempotency_key, '12')
+
+    def test_statistics_are_rolled_up_after_submission(self):
+        self.submit(['A', 'C', None, 'D'])
+        other = User.objects.create_user('other', password='pw')
+        self.client.force_login(other)
+        self.submit(['A', 'B', 'C', 'D'])
+        self.assertFalse(DailyQuizStatistics.objects.exists())  # Submissions only insert
+        self.assertEqual(item_stats.roll_up_daily_quiz_attempts(batch_size=1), 2)
+        self.assertEqual(item_stats.roll_up_daily_quiz_attempts(), 0)
+        stats = list(DailyQuizStatistics.objects.order_by('pk'))
+        self.assertEqual([s.attempts for s in stats], [2, 2, 2, 2])
+        self.assertEqual([s.correct_count for s in stats], [2, 1, 1, 2])
+        self.assertEqual(stats[2].skipped_count, 1)
+
+    def test_page_shows_the_stored_attempt(self):
+        self.submit(['A', 'C', 'C', 'D'])
+        response = self.client.get('/dailyquiz.html')
+        self.assertTrue(response.context['quiz_submitted'])
+        self.assertEqual(response.context['score'], 3)
+        self.assertEqual(response.context['user_answers'], ['A', 'C', 'C', 'D'])
+
+    def test_no_quiz_today(self):
+        DailyQuiz.objects.all().delete()
+        invalidation.apply_all()
+        self.assertEqual(self.submit(['A']).status_code, 400)
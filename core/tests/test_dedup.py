@@ -0,0 +1,73 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from core import dedup
+from core.models import MockTest, NearDuplicateBucket, NearDuplicateSignature, Question
+
+
+TEXT = 'A ball is thrown vertically upwards with a speed of 20 m/s. How high does it rise?'
+OPTIONS = ('10 m', '20 m', '30 m', '40 m')
+
+
+class SignatureTests(SimpleTestCase):
+    def test_normalization_and_option_order_do_not_matter(self):
+        reformatted = 'a BALL is thrown   vertically upwards, with a speed of 20 m/s -- how high does it rise'
+        self.assertEqual(dedup.signature(TEXT, OPTIONS), dedup.signature(reformatted, OPTIONS[::-1]))
+
+    def test_similarity_tracks_the_overlap(self):
+        reworded = dedup.signature(TEXT.replace('How high', 'To what height'), OPTIONS)
+        unrelated = dedup.signature('Which gas do plants absorb during photosynthesis?', ('O2', 'CO2', 'N2', 'H2'))
+        original = dedup.signature(TEXT, OPTIONS)
+        self.assertGreater(dedup.similarity(original, reworded), 0.6)
+        self.assertLess(dedup.similarity(original, unrelated), 0.2)
+        self.assertEqual(dedup.unpack(dedup.pack(original)), original)
+
+    def test_empty_text_has_no_signature(self):
+        self.assertIsNone(dedup.signature('  ?! ', ()))
+
+
+class FindDuplicatesTests(TestCase):
+    def setUp(self):
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        self.question = self.create(TEXT)
+        self.create('Which gas do plants absorb during photosynthesis?', ('O2', 'CO2', 'N2', 'H2'))
+
+    def create(self, text, options=OPTIONS):
+        a, b, c, d = options
+        return Question.objects.create(
+            mock_test=self.mock_test, question_text=text, option_a=a, option_b=b, option_c=c, option_d=d,
+            correct_option='B',
+        )
+
+    def test_saves_keep_the_index_current(self):
+        self.assertEqual(NearDuplicateBucket.objects.filter(item_id=self.question.pk).count(), dedup.BANDS)
+        self.question.delete()
+        self.assertFalse(NearDuplicateSignature.objects.filter(kind='question', item_id=self.question.pk).exists())
+
+    def test_matches_the_bank_and_earlier_rows(self):
+        fresh = 'What is the SI unit of electric charge?'
+        results = dedup.find_duplicates([(TEXT + ' ', OPTIONS), (fresh, ('C', 'A', 'V', 'W')), (fresh, ('C', 'A', 'V', 'W'))])
+        self.assertEqual([(m['kind'], m['item_id']) for m in results[0]], [('question', self.question.pk)])
+        self.assertEqual(results[1], [])
+        self.assertEqual([(m['kind'], m['item_id'], m['similarity']) for m in results[2]], [('row', 1, 1.0)])
+
+    def test_excluded_items_are_ignored(self):
+        results = dedup.find_duplicates([(TEXT, OPTIONS)], exclude={('question', self.question.pk)})
+        self.assertEqual(results, [[]])
+
+    def test_rebuild_and_report(self):
+        NearDuplicateSignature.objects.all().delete()
+        NearDuplicateBucket.objects.all().delete()
+        Question.objects.bulk_create([Question(
+            mock_test=self.mock_test, question_text=TEXT, option_a='10 m', option_b='20 m', option_c='30 m',
+            option_d='40 m', correct_option='B',
+        )])
+        out = StringIO()
+        call_command('build_duplicate_index', '--only', 'question', stdout=out)
+        self.assertIn('Indexed 3', out.getvalue())
+        out = StringIO()
+        call_command('build_duplicate_index', '--report', stdout=out)
+        self.assertIn('1 likely duplicate pair(s)', out.getvalue())
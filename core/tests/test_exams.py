@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import exams, invalidation
+from core.models import ExamSession, MockTest, Question, TestAttempt
+
+
+User = get_user_model()
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': False, 'VERSION': 1})
+class ExamSessionTests(TestCase):
+    def setUp(self):
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        self.questions = [
+            Question.objects.create(
+                mock_test=self.mock_test, question_text=f'Q{n}', option_a='a', option_b='b', option_c='c',
+                option_d='d', correct_option='A',
+            )
+            for n in range(2)
+        ]
+        self.now = timezone.now()
+        self.session, _ = exams.start_session(self.user, self.mock_test, self.now)
+
+    def answers(self, *options):
+        return {str(question.pk): option for question, option in zip(self.questions, options)}
+
+    def overdue(self):
+        return self.session.deadline + exams.grace() + timedelta(seconds=1)
+
+    def submit(self, **data):
+        return self.client.post(f'/api/mock-tests/{self.mock_test.pk}/submit/', data, content_type='application/json')
+
+    def test_later_seq_wins(self):
+        exams.autosave(self.user, self.session.pk, self.answers('A', 'b'), 2, self.now)
+        entry = exams.autosave(self.user, self.session.pk, self.answers('C', 'C'), 1, self.now)
+        self.assertEqual((entry['answers'], entry['seq']), (self.answers('A', 'B'), 2))
+        entry = exams.autosave(self.user, self.session.pk, {**self.answers('A'), '999999': 'D'}, 3, self.now)
+        self.assertEqual(entry['answers'], self.answers('A'))  # Other tests' questions dropped
+        with self.assertRaises(ValueError):
+            exams.autosave(self.user, self.session.pk, self.answers('E'), 4, self.now)
+
+    def test_racing_autosaves_keep_the_highest_seq(self):
+        # Both saves read seq 0; the lower one sets the head last
+        cache = exams.answer_cache()
+        for seq, option in ((2, 'B'), (1, 'A')):
+            cache.add(exams.version_key(self.session.pk, seq), {'answers': self.answers(option), 'seq': seq})
+            cache.set(exams.head_key(self.session.pk), seq)
+        entry = exams.load_entry(self.session.pk, self.now)
+        self.assertEqual((entry['answers'], entry['seq']), (self.answers('B'), 2))
+        self.assertEqual(exams.flush_answers(self.now), 1)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.answers, self.session.seq), (self.answers('B'), 2))
+
+    def test_resuming_keeps_the_session(self):
+        exams.autosave(self.user, self.session.pk, self.answers('A'), 1, self.now)
+        session, entry = exams.start_session(self.user, self.mock_test, self.now + timedelta(minutes=1))
+        self.assertEqual((session.pk, entry['seq']), (self.session.pk, 1))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ExamSession.objects.create(user=self.user, mock_test=self.mock_test, started_at=self.now, deadline=self.now)
+
+    def test_answers_after_the_deadline_are_ignored(self):
+        exams.autosave(self.user, self.session.pk, self.answers('A', 'A'), 1, self.now)
+        with self.assertRaises(exams.SessionClosed):
+            exams.autosave(self.user, self.session.pk, self.answers('B', 'B'), 2, self.overdue())
+        session = exams.close_session(self.session.pk, 'submitted', answers=self.answers('B', 'B'), seq=2, now=self.overdue())
+        self.assertEqual(session.attempt.score, 100)
+        self.assertEqual(session.answers, self.answers('A', 'A'))
+
+    def test_submitting_twice_returns_the_same_attempt(self):
+        first = self.submit(session=self.session.pk, seq=1, answers=self.answers('A', 'B'))
+        self.assertEqual((first.status_code, first.json()['score']), (201, 50))
+        second = self.submit(session=self.session.pk, seq=2, answers=self.answers('A', 'A'))
+        self.assertEqual((second.status_code, second.json()['id']), (200, first.json()['id']))
+
+    def test_submit_without_the_session_is_refused_while_it_runs(self):
+        response = self.submit(answers=self.answers('A', 'A'))
+        self.assertEqual((response.status_code, response.json()['session']), (409, self.session.pk))
+        self.assertFalse(TestAttempt.objects.exists())
+
+    def test_submit_without_the_session_after_time_is_up(self):
+        exams.autosave(self.user, self.session.pk, self.answers('A'), 1, self.now)
+        ExamSession.objects.filter(pk=self.session.pk).update(deadline=self.now - timedelta(hours=1))
+        response = self.submit(answers=self.answers('A', 'A'))
+        self.assertEqual((response.status_code, response.json()['score']), (200, 50))
+        self.assertEqual(exams.expire_sessions(), 0)
+        self.assertEqual(TestAttempt.objects.count(), 1)
+        # Once the session is closed, the test can be practised untimed
+        self.assertEqual(self.submit(answers=self.answers('A', 'A')).status_code, 201)
+
+    def test_sweep_grades_expired_sessions_once(self):
+        exams.autosave(self.user, self.session.pk, self.answers('A', 'A'), 1, self.now)
+        self.assertEqual(exams.flush_answers(self.now), 1)
+        self.assertEqual(exams.flush_answers(self.now), 0)
+        self.assertEqual(exams.expire_sessions(self.now), 0)
+        self.assertEqual(exams.expire_sessions(self.overdue()), 1)
+        self.assertEqual(exams.expire_sessions(self.overdue()), 0)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.attempt.score), ('expired', 100))
+        self.assertIsNone(self.session.active_key)
+        self.assertEqual(TestAttempt.objects.count(), 1)
+
+    def test_starting_after_expiry_grades_the_old_session(self):
+        session, entry = exams.start_session(self.user, self.mock_test, self.overdue())
+        self.assertNotEqual(session.pk, self.session.pk)
+        self.assertEqual(entry['seq'], 0)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'expired')
+        self.assertIsNotNone(self.session.attempt_id)
@@ -0,0 +1,77 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import exports
+from core.models import DailyQuizAttempt, MockTest, TestAttempt
+
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('teacher', password='pw', is_staff=True)
+        self.student = User.objects.create_user('student', email='s@example.com', password='pw')
+        self.physics = MockTest.objects.create(subject='Physics', class_level=10, date=date(2026, 6, 15))
+        self.maths = MockTest.objects.create(subject='Maths', class_level=12, date=date(2026, 6, 15))
+        for score in range(5):
+            TestAttempt.objects.create(user=self.student, mock_test=self.physics, score=score * 10)
+        TestAttempt.objects.create(user=self.student, mock_test=self.maths, score=99)
+        self.client.force_login(self.staff)
+
+    def download(self, name, params=None):
+        response = self.client.get(f'/api/exports/{name}', params or {})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_keyset_rows_cross_batches(self):
+        queryset = TestAttempt.objects.values_list('pk', 'score')
+        self.assertEqual(list(exports.keyset_rows(queryset, batch_size=2)), [(s,) for s in (0, 10, 20, 30, 40, 99)])
+
+    def test_csv_filters(self):
+        rows = list(csv.reader(io.StringIO(self.download('attempts.csv', {'class_level': 10}).decode())))
+        self.assertEqual(rows[0], exports.EXPORTS['attempts'].headers)
+        self.assertEqual([row[6] for row in rows[1:]], ['0', '10', '20', '30', '40'])
+        self.assertEqual(rows[1][1:5], ['student', 's@example.com', str(self.physics.pk), 'Physics'])
+
+    def test_date_range_is_in_local_days(self):
+        # 2026-06-14 20:00 UTC is already 2026-06-15 in Asia/Kolkata
+        for pk, hour in zip(TestAttempt.objects.order_by('pk').values_list('pk', flat=True), (18, 20, 23)):
+            TestAttempt.objects.filter(pk=pk).update(taken_on=datetime(2026, 6, 14, hour, tzinfo=dt_timezone.utc))
+        rows = list(csv.reader(io.StringIO(
+            self.download('attempts.csv', {'from': '2026-06-15', 'to': '2026-06-15', 'class_level': 10}).decode()
+        )))
+        self.assertEqual([row[6] for row in rows[1:]], ['10', '20'])
+        rows = list(csv.reader(io.StringIO(self.download('attempts.csv', {'to': '2026-06-14'}).decode())))
+        self.assertEqual([row[6] for row in rows[1:]], ['0'])
+
+    def test_csv_is_chunked(self):
+        with mock.patch.object(exports, 'CHUNK_BYTES', 100):
+            response = self.client.get('/api/exports/attempts.csv')
+            chunks = [chunk for chunk in response.streaming_content if chunk]
+        self.assertGreater(len(chunks), 1)
+
+    def test_xlsx_continues_on_new_sheets(self):
+        DailyQuizAttempt.objects.create(user=self.student, quiz_date=date(2026, 6, 1), score=3, percent=60)
+        with mock.patch.object(exports, 'XLSX_MAX_ROWS', 4):
+            workbook = zipfile.ZipFile(io.BytesIO(self.download('attempts.xlsx')))
+        sheets = sorted(name for name in workbook.namelist() if name.startswith('xl/worksheets/'))
+        self.assertEqual(len(sheets), 2)
+        self.assertEqual(workbook.read(sheets[0]).count(b'<row>'), 4)  # Header and three attempts
+        self.assertEqual(workbook.read(sheets[1]).count(b'<row>'), 4)
+        self.assertIn(b'sheetId="2"', workbook.read('xl/workbook.xml'))
+
+        quiz = zipfile.ZipFile(io.BytesIO(self.download('daily-quiz.xlsx', {'from': '2026-06-01'})))
+        self.assertIn(b'<v>60</v>', quiz.read('xl/worksheets/sheet1.xml'))
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/exports/attempts.pdf').status_code, 404)
+        self.assertEqual(self.client.get('/api/exports/attempts.csv', {'from': 'June'}).status_code, 400)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get('/api/exports/attempts.csv').status_code, 403)
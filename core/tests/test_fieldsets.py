@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import ValidationError
+
+from core import invalidation
+from core.models import InterviewQuestion, Keyword, MockTest, TestAttempt
+from core.serializers import InterviewQuestionValuesSerializer, parse_fieldset
+
+
+User = get_user_model()
+
+AVAILABLE = ('id', 'subject', 'title', 'word', 'meaning')
+
+
+class ParseFieldsetTests(SimpleTestCase):
+    def parse(self, query):
+        return parse_fieldset(QueryDict(query), AVAILABLE)
+
+    def test_no_parameters_means_every_field(self):
+        self.assertIsNone(self.parse(''))
+
+    def test_fields_come_back_in_declared_order(self):
+        self.assertEqual(self.parse('fields=word,id'), ('id', 'word'))
+        self.assertEqual(self.parse('fields=word,,word'), ('word',))
+
+    def test_omit(self):
+        self.assertEqual(self.parse('omit=meaning,title'), ('id', 'subject', 'word'))
+        self.assertEqual(self.parse('fields=id,word,meaning&omit=meaning'), ('id', 'word'))
+        self.assertEqual(self.parse('fields=&omit='), AVAILABLE)
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ('fields=id,nope', 'omit=secret'):
+            with self.assertRaises(ValidationError) as raised:
+                self.parse(query)
+            self.assertIn('Choose from: id, subject, title, word, meaning.', str(raised.exception.detail['fields']))
+
+    def test_derived_fields_read_their_columns(self):
+        serializer = InterviewQuestionValuesSerializer(fields=('id', 'department_label'))
+        self.assertEqual(serializer.columns(serializer.fields), ('id', 'department'))
+
+
+class SparseListTests(TestCase):
+    def setUp(self):
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        Keyword.objects.create(subject='Physics', title='Motion', word='velocity', meaning='speed with a direction')
+        InterviewQuestion.objects.create(department='physics', question='What is inertia?', answer='A long answer')
+
+    def test_list_and_detail(self):
+        rows = self.client.get('/api/keywords/', {'fields': 'word,id'}).json()
+        self.assertEqual(rows, [{'id': rows[0]['id'], 'word': 'velocity'}])
+        detail = self.client.get(f"/api/keywords/{rows[0]['id']}/", {'omit': 'meaning'}).json()
+        self.assertEqual(set(detail), {'id', 'subject', 'title', 'word'})
+        self.assertEqual(len(self.client.get('/api/keywords/').json()[0]), len(AVAILABLE))
+        self.assertEqual(self.client.get('/api/keywords/velocity/').status_code, 404)
+
+    def test_derived_field_without_its_column(self):
+        rows = self.client.get('/api/interview-questions/', {'fields': 'department_label'}).json()
+        self.assertEqual(rows, [{'department_label': 'Physics'}])
+
+    def test_unknown_field_is_a_bad_request(self):
+        response = self.client.get('/api/keywords/', {'fields': 'word,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['fields'])
+
+    def test_serializer_fields_on_attempts(self):
+        user = User.objects.create_user('student', password='pw')
+        self.client.force_login(user)
+        mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        TestAttempt.objects.create(user=user, mock_test=mock_test, score=80)
+        rows = self.client.get('/api/user/test-attempts/', {'omit': 'answers,mock_test,user'}).json()
+        self.assertEqual(set(rows[0]), {'id', 'test_name', 'score', 'taken_on'})
+        self.assertEqual(rows[0]['test_name'], 'Physics')
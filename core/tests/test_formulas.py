@@ -0,0 +1,87 @@
+import io
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from core import formulas
+from core.catalog_import import CATALOGS, import_catalog
+from core.models import Formula
+
+
+@override_settings(FORMULA_PAGES=dict(settings.FORMULA_PAGES, PAGE_SIZE=2))
+class FormulaSectionTests(TestCase):
+    def setUp(self):
+        self.addCleanup(caches[settings.FORMULA_PAGES['CACHE']].clear)
+        self.speed = self.save(Formula(subject='Physics', heading='Speed', formula='v = d / t'))
+        self.save(Formula(subject='Chemistry', heading='Moles', formula='n = m / M'))
+
+    def save(self, formula):
+        with self.captureOnCommitCallbacks(execute=True):
+            formula.save()
+        return formula
+
+    def versions(self):
+        return formulas.section_version('Physics'), formulas.section_version('Chemistry')
+
+    def test_saving_bumps_only_its_subject(self):
+        physics, chemistry = self.versions()
+        self.assertEqual(self.versions(), (physics, chemistry))
+        self.save(Formula(subject='Physics', heading='Force', formula='F = m a'))
+        self.assertNotEqual(formulas.section_version('Physics'), physics)
+        self.assertEqual(formulas.section_version('Chemistry'), chemistry)
+
+    def test_moving_or_deleting_bumps_every_subject_touched(self):
+        physics, chemistry = self.versions()
+        self.speed.subject = 'Chemistry'
+        self.save(self.speed)
+        moved = self.versions()
+        self.assertNotEqual(moved[0], physics)
+        self.assertNotEqual(moved[1], chemistry)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speed.delete()
+        self.assertNotEqual(self.versions()[1], moved[1])
+
+    def test_fragments_are_reused_until_the_version_changes(self):
+        with mock.patch.object(formulas, 'render_section_page', wraps=formulas.render_section_page) as render:
+            html, version = formulas.section_page('Physics')
+            self.assertEqual(formulas.section_page('Physics'), (html, version))
+            self.assertEqual(render.call_count, 1)
+            self.save(Formula(subject='Physics', heading='Force', formula='F = m a'))
+            html, _ = formulas.section_page('Physics')
+            self.assertEqual(render.call_count, 2)
+        self.assertIn('Force', html)
+
+    def test_evicted_version_starts_afresh(self):
+        _, version = formulas.section_page('Physics')
+        caches[settings.FORMULA_PAGES['CACHE']].delete(formulas.version_key('Physics'))
+        self.assertNotEqual(formulas.section_version('Physics'), version)
+
+    def test_import_bumps_every_subject(self):
+        before = self.versions()
+        rows = io.BytesIO(b'subject,heading,formula\nMaths,Area,A = l b\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            import_catalog(CATALOGS['formulas'], rows, 'csv')
+        after = self.versions()
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_section_pages_and_etags(self):
+        for heading in ('Force', 'Work'):
+            self.save(Formula(subject='Physics', heading=heading, formula='...'))
+        url = '/formula/sections/Physics/'
+        first = self.client.get(url)
+        self.assertContains(first, 'Speed')
+        self.assertContains(first, 'Load more')
+        after = first.content.decode().split('data-after="')[1].split('"')[0]
+        rest = self.client.get(url, {'after': after})
+        self.assertContains(rest, 'Work')
+        self.assertNotContains(rest, 'Load more')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.save(Formula(subject='Physics', heading='Power', formula='P = W / t'))
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(self.client.get('/formula/sections/Alchemy/').status_code, 404)
@@ -0,0 +1,119 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import invalidation
+from core.models import InvalidationEvent
+
+
+TOPIC = 'test-topic'
+
+
+@override_settings(INVALIDATION=dict(settings.INVALIDATION, TRANSPORT='db', SETTLE_SECONDS=5, MAX_EVENTS=100))
+class BusTests(TestCase):
+    def setUp(self):
+        self.applied = []
+        handlers = mock.patch.dict(invalidation._handlers, {TOPIC: [self.applied.append]})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        self.bus = invalidation.Bus()
+        self.bus.poll()  # Starts from the latest event
+        self.now = datetime.now(dt_timezone.utc)
+
+    def event(self, key, origin='elsewhere', age=0, **fields):
+        return InvalidationEvent.objects.create(
+            topic=TOPIC, key=key, origin=origin, created_at=self.now - timedelta(seconds=age), **fields,
+        )
+
+    def test_applies_other_processes_events_once(self):
+        self.event('1')
+        self.event('2', origin=self.bus.origin)
+        self.event('')
+        self.bus.poll()
+        self.bus.poll()
+        self.assertEqual(self.applied, ['1', invalidation.ALL])
+
+    def test_events_committed_out_of_order_inside_the_settle_window(self):
+        base = self.bus.last_id
+        self.event('later', id=base + 3)
+        self.bus.poll()
+        # Lower ids committing after a poll moved past them: picked up while recent
+        self.event('late commit', id=base + 2)
+        self.event('too late', id=base + 1, age=60)
+        self.bus.poll()
+        self.bus.poll()
+        self.assertEqual(self.applied, ['later', 'late commit'])
+
+    def test_events_before_startup_are_not_replayed(self):
+        self.event('old')
+        bus = invalidation.Bus()
+        bus.poll()
+        bus.poll()
+        self.assertEqual(self.applied, [])
+
+    def test_long_gap_flushes_everything(self):
+        flushes = invalidation.stats.full_flushes
+        self.event('1')
+        self.bus.last_poll -= settings.INVALIDATION['KEEP_SECONDS'] + 1
+        self.bus.poll()
+        self.assertEqual(self.applied, [invalidation.ALL])
+        self.assertEqual(invalidation.stats.full_flushes, flushes + 1)
+        self.bus.poll()
+        self.assertEqual(self.applied, [invalidation.ALL])  # Caught up to the latest event
+
+    def test_backlog_longer_than_a_poll_flushes_everything(self):
+        for key in '123':
+            self.event(key)
+        with override_settings(INVALIDATION=dict(settings.INVALIDATION, MAX_EVENTS=2)):
+            self.bus.poll()
+            self.assertEqual(self.applied, ['1', '2', invalidation.ALL])
+            self.bus.poll()
+        self.assertEqual(self.applied, ['1', '2', invalidation.ALL])
+
+    def test_workers_poll_between_passes(self):
+        with mock.patch.object(invalidation.bus, 'last_poll', 0.0), mock.patch.object(invalidation.bus, 'poll') as poll:
+            call_command('run_exam_sessions', '--once')
+            call_command('render_reports', '--once')
+        self.assertEqual(poll.call_count, 2)
+
+
+@override_settings(INVALIDATION=dict(settings.INVALIDATION, MAX_AGE_SECONDS=60))
+class ProcessCacheTests(SimpleTestCase):
+    def setUp(self):
+        handlers = mock.patch.dict(invalidation._handlers, {})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        self.cache = invalidation.ProcessCache(TOPIC)
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_events_drop_entries(self):
+        self.assertEqual([self.cache.get(1, self.build) for _ in range(2)], [1, 1])
+        invalidation.apply(TOPIC, '1')
+        self.assertEqual(self.cache.get(1, self.build), 2)
+        invalidation.apply(TOPIC, invalidation.ALL)
+        self.assertEqual(self.cache.get('1', self.build), 3)
+
+    def test_value_built_during_an_event_is_not_kept(self):
+        def build():
+            invalidation.apply(TOPIC, 'k')
+            return self.build()
+
+        self.assertEqual(self.cache.get('k', build), 1)
+        self.assertEqual(self.cache.get('k', self.build), 2)
+
+    def test_entries_expire_even_without_events(self):
+        now = time.monotonic()
+        with mock.patch.object(invalidation.time, 'monotonic', return_value=now):
+            self.cache.get('k', self.build)
+        with mock.patch.object(invalidation.time, 'monotonic', return_value=now + 59):
+            self.assertEqual(self.cache.get('k', self.build), 1)
+        with mock.patch.object(invalidation.time, 'monotonic', return_value=now + 61):
+            self.assertEqual(self.cache.get('k', self.build), 2)
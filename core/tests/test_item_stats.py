@@ -0,0 +1,80 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import exams, invalidation, item_stats
+from core.models import MockTest, Question, QuestionStatistics, TestAttempt
+
+
+User = get_user_model()
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': False, 'VERSION': 1})
+class ItemStatsTests(TestCase):
+    def setUp(self):
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        self.user = User.objects.create_user('student', password='pw')
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        self.questions = [
+            Question.objects.create(
+                mock_test=self.mock_test, question_text=f'Answer {correct}', option_a='a', option_b='b',
+                option_c='c', option_d='d', correct_option=correct,
+            )
+            for correct in 'ABCD'
+        ]
+
+    def stats(self, question):
+        return QuestionStatistics.objects.get(pk=question.pk)
+
+    def test_counters(self):
+        counters = item_stats.ItemCounters()
+        counters.add(1, 'a', 'A', 80)
+        counters.add(1, None, 'A', 20)
+        counters.add(1, 'B', 'A', 40)
+        self.assertEqual(dict(counters.items[1]), {
+            'attempts': 3, 'option_a_count': 1, 'skipped_count': 1, 'option_b_count': 1,
+            'score_sum': 140, 'score_sq_sum': 8400, 'correct_count': 1, 'correct_score_sum': 80,
+        })
+
+    def test_apply_adds_to_existing_rows(self):
+        counters = item_stats.ItemCounters()
+        for question in self.questions:
+            counters.add(question.pk, 'A', question.correct_option, 50)
+        item_stats.apply(QuestionStatistics, counters)
+        item_stats.apply(QuestionStatistics, counters)
+        first, second = self.stats(self.questions[0]), self.stats(self.questions[1])
+        self.assertEqual((first.attempts, first.correct_count, first.option_a_count), (2, 2, 2))
+        self.assertEqual((second.attempts, second.correct_count, second.option_a_count), (2, 0, 2))
+        self.assertEqual(second.score_sum, 100)
+
+    def test_grading_records_each_question(self):
+        answers = {str(self.questions[0].pk): 'A', str(self.questions[1].pk): 'C'}
+        attempt = exams.grade_attempt(self.user, self.mock_test, answers)
+        self.assertEqual(attempt.score, 25)
+        self.assertEqual(attempt.answers.count(), 2)
+        stats = [self.stats(question) for question in self.questions]
+        self.assertEqual([s.attempts for s in stats], [1, 1, 1, 1])
+        self.assertEqual([s.correct_count for s in stats], [1, 0, 0, 0])
+        self.assertEqual([s.skipped_count for s in stats], [0, 0, 1, 1])
+
+    def test_backfill_replaces_the_counters(self):
+        exams.grade_attempt(self.user, self.mock_test, {str(self.questions[0].pk): 'A'})
+        exams.grade_attempt(self.user, self.mock_test, {str(self.questions[0].pk): 'B'})
+        QuestionStatistics.objects.update(attempts=99, correct_count=42)
+        unanswered = Question.objects.create(
+            mock_test=MockTest.objects.create(subject='Empty', date=date(2026, 6, 15)), question_text='?',
+            option_a='a', option_b='b', option_c='c', option_d='d', correct_option='A',
+        )
+
+        out = StringIO()
+        call_command('backfill_item_stats', '--only', 'questions', '--batch-size', '1', stdout=out)
+        self.assertIn('Questions: 2 attempts', out.getvalue())
+        first = self.stats(self.questions[0])
+        self.assertEqual((first.attempts, first.correct_count, first.option_b_count), (2, 1, 1))
+        self.assertEqual(self.stats(self.questions[3]).skipped_count, 2)
+        self.assertEqual(self.stats(unanswered).attempts, 0)
+        self.assertEqual(TestAttempt.objects.count(), 2)
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+
+from core import live
+from core.management.commands.bench_live_quiz import SimulatedSocket
+from core.models import LiveAnswer, LiveParticipant, LiveSession, MockTest, Question, TestAttempt
+
+
+User = get_user_model()
+
+
+@override_settings(
+    ALLOWED_HOSTS=['localhost'],
+    LIVE_QUIZ={'MAX_STUDENTS': 1, 'SEND_QUEUE_SIZE': 64, 'POLL_SECONDS': 0.02, 'IDLE_POLL_SECONDS': 0.08},
+)
+class LiveQuizTests(TransactionTestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw', is_staff=True)
+        self.student = User.objects.create_user('student', password='pw')
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        for correct in 'AB':
+            Question.objects.create(
+                mock_test=self.mock_test, question_text=f'Answer {correct}', option_a='a', option_b='b',
+                option_c='c', option_d='d', correct_option=correct,
+            )
+
+    async def connect(self, path, user, hub, expect):
+        socket = SimulatedSocket(path, user)
+        with mock.patch.object(live, 'hub', hub):
+            socket.connect()
+            _, message = await asyncio.wait_for(socket.expect(expect), 5)
+        return socket, message
+
+    async def test_teacher_and_student_on_different_processes(self):
+        host, session = await self.connect(f'/ws/live/host/{self.mock_test.pk}/', self.teacher, live.LiveHub(), 'session')
+        student, _ = await self.connect(f"/ws/live/{session['code']}/", self.student, live.LiveHub(), 'joined')
+
+        host.send_json({'action': 'next'})
+        _, question = await asyncio.wait_for(student.expect('question', index=0), 5)
+        student.send_json({'action': 'answer', 'question_id': question['question']['id'], 'option': 'A'})
+        await asyncio.wait_for(student.expect('ack'), 5)
+        await asyncio.wait_for(host.expect('tally', index=0, answered=1, students=1), 5)
+
+        host.send_json({'action': 'reveal'})
+        _, reveal = await asyncio.wait_for(student.expect('reveal', index=0), 5)
+        self.assertEqual((reveal['correct_option'], reveal['counts']['A']), ('A', 1))
+
+        host.send_json({'action': 'end'})
+        _, ended = await asyncio.wait_for(host.expect('ended'), 5)
+        _, score = await asyncio.wait_for(student.expect('score'), 5)
+        self.assertEqual((ended['attempts'], score['score']), (1, 50))
+        host.disconnect()
+        student.disconnect()
+        await asyncio.gather(host.task, student.task)
+
+        self.assertEqual(await TestAttempt.objects.filter(user=self.student).values_list('score', flat=True).aget(), 50)
+        self.assertEqual((await LiveSession.objects.aget()).status, 'ended')
+
+    async def test_idle_polls_back_off(self):
+        await LiveSession.objects.acreate(code='ABC234', mock_test=self.mock_test, host=self.teacher)
+        hub = live.LiveHub()
+        room = live.Room(await live.load_session('ABC234'), [])
+        room.students[self.student.pk] = None
+        written = []
+
+        async def sync_rooms(answers, versions, hosted):
+            written.append(len(answers))
+            return {}, {}, {}, {}
+
+        with mock.patch.object(live, 'sync_rooms', sync_rooms):
+            hub.add(room)
+            await asyncio.sleep(0.5)
+            self.assertLess(len(written), 12)  # Against 25 polls at POLL_SECONDS
+            self.assertEqual(hub.interval, 0.08)
+            idle = len(written)
+            room.pending.append(LiveAnswer(session_id=room.session_id, user_id=self.student.pk, question_id=1, option='A'))
+            await asyncio.sleep(0.05)
+            # Written at the next tick, and the interval starts over
+            self.assertEqual(written[idle], 1)
+            self.assertLess(hub.interval, 0.08)
+            room.students.clear()
+            await asyncio.wait_for(hub.poller, 5)
+
+    async def test_full_session_refuses_students(self):
+        session = await LiveSession.objects.acreate(code='ABC234', mock_test=self.mock_test, host=self.teacher)
+        await LiveParticipant.objects.acreate(session=session, user=self.teacher)
+        socket = SimulatedSocket('/ws/live/ABC234/', self.student)
+        with mock.patch.object(live, 'hub', live.LiveHub()):
+            socket.connect()
+            await socket.task
+        self.assertEqual(socket.outbox.get_nowait()[1], {'type': 'websocket.close', 'code': 4429})
+
+    async def test_missing_origin_is_refused(self):
+        socket = SimulatedSocket(f'/ws/live/host/{self.mock_test.pk}/', self.teacher)
+        socket.scope['headers'] = []
+        socket.connect()
+        await socket.task
+        self.assertEqual(socket.outbox.get_nowait()[1], {'type': 'websocket.close', 'code': 4403})
@@ -0,0 +1,93 @@
+import gzip
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import invalidation, packs
+from core.models import MockTest, Question
+
+
+User = get_user_model()
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': False, 'VERSION': 1})
+class QuestionPackTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(QUESTION_PACKS=dict(settings.QUESTION_PACKS, DIR=Path(directory.name)))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        packs._pointers.clear()
+        packs._rows.clear()
+        packs._bodies = None
+
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        self.add_question('First')
+        self.url = f'/api/mock-tests/{self.mock_test.pk}/questions/'
+
+    def add_question(self, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Question.objects.create(
+                mock_test=self.mock_test, question_text=text, option_a='a', option_b='b', option_c='c',
+                option_d='d', correct_option='A',
+            )
+
+    def texts(self, response):
+        return [question['question_text'] for question in json.loads(response.content)]
+
+    def test_serves_precompressed_versions(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual([q['question_text'] for q in json.loads(gzip.decompress(response.content))], ['First'])
+        self.assertNotIn('correct_option', json.loads(gzip.decompress(response.content))[0])
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        identity = self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertNotEqual(identity['ETag'], response['ETag'])
+
+    def test_saving_a_question_rebuilds_the_pack(self):
+        first = self.client.get(self.url)
+        self.add_question('Second')
+        second = self.client.get(self.url)
+        self.assertEqual(self.texts(second), ['First', 'Second'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(len(list(packs.pack_dir(self.mock_test.pk).glob('*.json'))), 1)  # Old version pruned
+
+    def test_edit_during_a_build_is_not_lost(self):
+        render = packs.render_pack
+
+        def render_then_edit(test_id):
+            data = render(test_id)
+            self.add_question('Saved mid-build')
+            return data
+
+        with mock.patch.object(packs, 'render_pack', side_effect=render_then_edit):
+            self.assertEqual(self.texts(self.client.get(self.url)), ['First'])
+        self.assertIsNone(packs.current_version(self.mock_test.pk))
+        self.assertEqual(self.texts(self.client.get(self.url)), ['First', 'Saved mid-build'])
+
+    def test_version_removed_under_the_pointer(self):
+        self.client.get(self.url)
+        for path in packs.pack_dir(self.mock_test.pk).glob('*.json*'):
+            path.unlink()
+        packs._bodies = None
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.texts(response), ['First'])
+
+    def test_deleted_mock_test(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mock_test.delete()
+        self.assertFalse(packs.pack_dir(self.mock_test.pk).exists())
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from core import ratelimit
+from core.models import RateLimitCounter
+
+
+class GcraTests(SimpleTestCase):
+    def test_burst_then_steady_rate(self):
+        bucket = ratelimit.LocalBucket(burst=3, period=3)
+        self.assertEqual([bucket.take(100.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(100.0), 1.0)
+        self.assertAlmostEqual(bucket.take(100.5), 0.5)
+        self.assertEqual(bucket.take(101.0), 0.0)
+        self.assertAlmostEqual(bucket.take(101.0), 1.0)
+
+    def test_idle_bucket_refills_to_the_burst_only(self):
+        bucket = ratelimit.LocalBucket(burst=2, period=10)
+        bucket.take(0.0)
+        self.assertEqual([bucket.take(1000.0) for _ in range(2)], [0.0, 0.0])
+        self.assertGreater(bucket.take(1000.0), 0)
+
+
+class SharedBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache('ratelimit-tests', {})
+        self.addCleanup(self.cache.clear)
+
+    def test_counted_window(self):
+        takes = [ratelimit.take_shared(self.cache, 'k', 3, 60, 600.0 + n) for n in range(4)]
+        self.assertEqual(takes[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(takes[3], 57.0)  # Rest of the window
+        # Refused requests are not counted
+        self.assertEqual(self.cache.get('k:10'), 3)
+
+    def test_previous_window_decays(self):
+        for _ in range(4):
+            ratelimit.take_shared(self.cache, 'k', 4, 60, 630.0)
+        # A quarter into the next window, 3 of the previous 4 still count
+        self.assertEqual(ratelimit.take_shared(self.cache, 'k', 4, 60, 675.0), 0.0)
+        self.assertAlmostEqual(ratelimit.take_shared(self.cache, 'k', 4, 60, 675.0), 15.0)
+        self.assertEqual(ratelimit.take_shared(self.cache, 'k', 4, 60, 690.0), 0.0)
+
+
+class DatabaseCounterTests(TestCase):
+    def setUp(self):
+        self.cache = caches['default']
+
+    def test_database_cache_counts_in_the_table(self):
+        self.assertNotIsInstance(self.cache, ratelimit.ATOMIC_INCR_BACKENDS)
+        takes = [ratelimit.take_shared(self.cache, 'k', 2, 10, 100.0) for _ in range(3)]
+        self.assertEqual(takes[:2], [0.0, 0.0])
+        self.assertAlmostEqual(takes[2], 10.0)  # Rest of the window
+        self.assertEqual(RateLimitCounter.objects.get(name='k:10').count, 2)
+
+    def test_previous_window_decays(self):
+        for _ in range(4):
+            ratelimit.take_shared(self.cache, 'k', 4, 60, 630.0)
+        self.assertEqual(ratelimit.take_shared(self.cache, 'k', 4, 60, 675.0), 0.0)
+        self.assertAlmostEqual(ratelimit.take_shared(self.cache, 'k', 4, 60, 675.0), 15.0)
+
+    def test_expired_windows_are_pruned(self):
+        ratelimit.DatabaseCounters.last_prune = 0.0
+        ratelimit.take_shared(self.cache, 'k', 2, 10, 100.0)
+        ratelimit.take_shared(self.cache, 'k', 2, 10, 200.0 + ratelimit.PRUNE_SECONDS)
+        self.assertEqual(list(RateLimitCounter.objects.values_list('name', flat=True)), ['k:26'])
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, forwarded):
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded)
+
+    def test_forwarded_for_needs_trusted_proxies(self):
+        self.assertEqual(ratelimit.client_ip(self.request('1.1.1.1, 2.2.2.2')), '10.0.0.1')
+        for proxies, expected in [(1, '2.2.2.2'), (2, '1.1.1.1'), (5, '1.1.1.1')]:
+            with override_settings(RATE_LIMIT=dict(settings.RATE_LIMIT, NUM_PROXIES=proxies)):
+                self.assertEqual(ratelimit.client_ip(self.request('1.1.1.1, 2.2.2.2')), expected)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        self.addCleanup(caches['default'].clear)
+
+    def test_username_bucket(self):
+        for _ in range(5):
+            response = self.client.post('/api/auth/login/', {'username': 'student', 'password': 'wrong'})
+            self.assertNotEqual(response.status_code, 429)
+        response = self.client.post('/api/auth/login/', {'username': ' Student ', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        other = self.client.post('/api/auth/login/', {'username': 'someone', 'password': 'wrong'})
+        self.assertNotEqual(other.status_code, 429)
@@ -0,0 +1,106 @@
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import reports
+from core.models import MockTest, ReportJob, TestAttempt
+
+
+User = get_user_model()
+
+PDF = b'%PDF-1.4 report'
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        documents = {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': directory.name}}
+        settings_override = override_settings(STORAGES=dict(settings.STORAGES, documents=documents))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        render = mock.patch.object(reports, 'render_pdf', return_value=PDF)
+        render.start()
+        self.addCleanup(render.stop)
+
+        self.user = User.objects.create_user('student', password='pw')
+        mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        self.attempt = TestAttempt.objects.create(user=self.user, mock_test=mock_test, score=70)
+        self.url = f'/api/reports/attempts/{self.attempt.pk}.pdf'
+        self.client.force_login(self.user)
+
+    def render_queue(self):
+        while (job := reports.claim_job()) is not None:
+            reports.run_job(job)
+
+    def test_queued_then_served_from_storage(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'status': 'pending'})
+        self.client.get(self.url)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        self.render_queue()
+        job = ReportJob.objects.get()
+        self.assertEqual((job.status, job.size), ('done', len(PDF)))
+        self.assertTrue(reports.report_storage().exists(reports.report_name(job.digest)))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, PDF)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_object_storage_redirects_to_a_presigned_url(self):
+        self.client.get(self.url)
+        self.render_queue()
+        storage = reports.report_storage()
+        with mock.patch.object(storage, 'querystring_auth', True, create=True), \
+                mock.patch.object(storage, 'url', return_value='https://bucket.example/r.pdf?sig') as url:
+            response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response['Location']), (302, 'https://bucket.example/r.pdf?sig'))
+        name, = url.call_args.args
+        self.assertEqual(name, reports.report_name(ReportJob.objects.get().digest))
+        self.assertIn('attachment', url.call_args.kwargs['parameters']['ResponseContentDisposition'])
+
+    def test_changed_attempt_is_a_new_report(self):
+        self.client.get(self.url)
+        self.render_queue()
+        TestAttempt.objects.filter(pk=self.attempt.pk).update(score=90)
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+    def test_missing_file_renders_again_only_after_the_grace_period(self):
+        self.client.get(self.url)
+        self.render_queue()
+        job = ReportJob.objects.get()
+        reports.report_storage().delete(reports.report_name(job.digest))
+
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.assertEqual(ReportJob.objects.get().status, 'done')
+
+        ReportJob.objects.update(finished_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.assertEqual(ReportJob.objects.get().status, 'pending')
+        self.render_queue()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_failures_retry_then_give_up(self):
+        self.client.get(self.url)
+        with mock.patch.object(reports, 'render_pdf', side_effect=ValueError('bad')):
+            self.render_queue()
+        job = ReportJob.objects.get()
+        self.assertEqual((job.status, job.tries), ('failed', settings.REPORTS['MAX_TRIES']))
+        self.assertEqual(self.client.get(self.url).status_code, 500)
+
+    def test_prune(self):
+        self.client.get(self.url)
+        self.render_queue()
+        digest = ReportJob.objects.get().digest
+        ReportJob.objects.update(finished_at=timezone.now() - timedelta(days=60))
+        self.assertEqual(reports.prune_reports(keep_days=30), 1)
+        self.assertFalse(reports.report_storage().exists(reports.report_name(digest)))
@@ -0,0 +1,104 @@
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.test import TestCase, override_settings
+
+from core import retention
+from core.models import AIChatHistory, AIConversationIndex, DailyQuizAttempt
+
+
+User = get_user_model()
+
+TODAY = date(2026, 6, 15)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        documents = {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': directory.name}}
+        config = dict(settings.RETENTION_SETTINGS, BATCH_PAUSE_SECONDS=0)
+        config['KEEP_DAYS'] = dict(config['KEEP_DAYS'], daily_quiz_attempts=30, ai_chat_history=180)
+        settings_override = override_settings(
+            STORAGES=dict(settings.STORAGES, documents=documents), RETENTION_SETTINGS=config,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('student', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+        # Every third day for the student, the last eleven within the 30 days kept
+        for offset in range(40):
+            DailyQuizAttempt.objects.create(user=self.user, quiz_date=TODAY - timedelta(days=offset * 3), score=offset)
+        DailyQuizAttempt.objects.create(user=self.other, quiz_date=TODAY - timedelta(days=100), score=1)
+
+    def run_archive(self):
+        return retention.run_retention(['daily_quiz_attempts'], batch_size=7, today=TODAY)
+
+    def test_moves_expired_rows_into_user_month_partitions(self):
+        self.assertEqual(self.run_archive(), {'daily_quiz_attempts': 30})
+        self.assertEqual(DailyQuizAttempt.objects.filter(user=self.user).count(), 11)
+        policy = retention.POLICIES['daily_quiz_attempts']
+        months = sorted(storages['documents'].listdir(retention.user_prefix(policy, self.user.id))[0])
+        self.assertEqual(months, ['2026-02', '2026-03', '2026-04', '2026-05'])
+
+    def test_conversations_are_archived_on_last_activity(self):
+        started = datetime(2025, 1, 10, tzinfo=dt_timezone.utc)
+        active, idle = (AIChatHistory.objects.create(user=self.user, messages=[]) for _ in range(2))
+        AIChatHistory.objects.update(timestamp=started)
+        AIConversationIndex.objects.filter(chat=active).update(updated_at=datetime(2026, 6, 1, tzinfo=dt_timezone.utc))
+        AIConversationIndex.objects.filter(chat=idle).update(updated_at=started)
+        self.assertEqual(retention.run_retention(['ai_chat_history'], today=TODAY), {'ai_chat_history': 1})
+        self.assertEqual(list(AIChatHistory.objects.values_list('pk', flat=True)), [active.pk])
+        rows = [row for _, row in retention.read_archive('ai_chat_history', self.user.id)]
+        self.assertEqual([row['id'] for row in rows], [idle.pk])
+
+    def test_reads_only_the_users_rows(self):
+        self.run_archive()
+        rows = [row for _, row in retention.read_archive('daily_quiz_attempts', self.user.id)]
+        self.assertEqual(len(rows), 29)
+        self.assertTrue(all(row['user_id'] == self.user.id for row in rows))
+        other = [row for _, row in retention.read_archive('daily_quiz_attempts', self.other.id)]
+        self.assertEqual(len(other), 1)
+
+    def test_date_range(self):
+        self.run_archive()
+        rows = [row for _, row in retention.read_archive(
+            'daily_quiz_attempts', self.user.id, start=date(2026, 3, 10), end=date(2026, 4, 10),
+        )]
+        self.assertTrue(rows)
+        self.assertTrue(all('2026-03-10' <= row['quiz_date'] <= '2026-04-10' for row in rows))
+
+    def test_rows_archived_twice_are_read_once(self):
+        self.run_archive()
+        policy = retention.POLICIES['daily_quiz_attempts']
+        rows = [row for _, row in retention.read_archive('daily_quiz_attempts', self.user.id)]
+        retention.write_partitions(policy, rows[:5])
+        again = [row for _, row in retention.read_archive('daily_quiz_attempts', self.user.id)]
+        self.assertEqual([row['id'] for row in again], [row['id'] for row in rows])
+
+    def test_pages_resume_from_the_cursor(self):
+        self.run_archive()
+        ids, cursor = [], None
+        while True:
+            rows, cursor = retention.archive_page('daily_quiz_attempts', self.user.id, cursor=cursor, limit=4)
+            ids += [row['id'] for row in rows]
+            if cursor is None:
+                break
+            self.assertEqual(retention.decode_cursor(retention.encode_cursor(cursor)), cursor)
+        everything = [row['id'] for _, row in retention.read_archive('daily_quiz_attempts', self.user.id)]
+        self.assertEqual(ids, everything)
+
+    def test_api_is_paginated(self):
+        self.run_archive()
+        self.client.force_login(self.user)
+        url = '/api/user/archive/daily_quiz_attempts/'
+        first = self.client.get(url, {'limit': 25}).json()
+        self.assertEqual(len(first['results']), 25)
+        second = self.client.get(url, {'limit': 25, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['results']), 4)
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(self.client.get(url, {'cursor': 'nope'}).status_code, 400)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import review
+from core.models import Formula, Keyword, ReviewCard
+
+
+User = get_user_model()
+
+NOW = datetime(2026, 6, 15, 9, 0, tzinfo=dt_timezone.utc)
+
+
+class ScheduleTests(SimpleTestCase):
+    def card(self, **state):
+        return ReviewCard(**{'due_at': NOW, 'interval_days': 0, 'ease': 2500, 'reps': 0, 'lapses': 0, **state})
+
+    def intervals(self, grades):
+        card, reviewed_at, intervals = self.card(), NOW, []
+        for grade in grades:
+            review.schedule(card, grade, reviewed_at)
+            intervals.append(card.interval_days)
+            reviewed_at = card.due_at
+        return card, intervals
+
+    def test_good_reviews_grow_by_the_ease(self):
+        card, intervals = self.intervals(['good'] * 5)
+        self.assertEqual(intervals, [1, 6, 15, 38, 95])
+        self.assertEqual((card.reps, card.ease), (5, 2500))
+        self.assertEqual(card.due_at, card.last_reviewed_at + timedelta(days=95))
+
+    def test_easy_and_hard(self):
+        card, intervals = self.intervals(['easy', 'easy', 'hard', 'hard'])
+        self.assertEqual(intervals[:2], [4, 4])
+        self.assertEqual(intervals[2:], [5, 6])  # Hard grows by 1.2, at least one day
+        self.assertEqual(card.ease, 2500 + 150 + 150 - 150 - 150)
+
+    def test_again_resets_and_lowers_the_ease(self):
+        card, _ = self.intervals(['good', 'good', 'again'])
+        self.assertEqual((card.reps, card.lapses, card.interval_days, card.ease), (0, 1, 0, 2300))
+        self.assertEqual(card.due_at - card.last_reviewed_at, timedelta(minutes=10))
+
+    def test_ease_and_interval_bounds(self):
+        card, _ = self.intervals(['again'] * 10)
+        self.assertEqual(card.ease, review.MIN_EASE)
+        card = review.schedule(self.card(reps=5, interval_days=3000), 'easy', NOW)
+        self.assertEqual(card.interval_days, review.MAX_INTERVAL_DAYS)
+
+
+@override_settings(SPACED_REPETITION={
+    'QUEUE_SIZE': 20, 'MAX_QUEUE_SIZE': 100, 'MAX_REVIEWS_PER_BATCH': 200, 'NEW_CARDS_PER_DAY': 3,
+    'RELEARN_MINUTES': 10, 'SECOND_INTERVAL_DAYS': 6, 'EASY_INTERVAL_DAYS': 4,
+})
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        self.keywords = [Keyword.objects.create(word=f'word {n}', meaning=f'meaning {n}') for n in range(5)]
+        Formula.objects.create(subject='Physics', heading='Speed', formula='v = d / t')
+
+    def test_new_cards_are_introduced_within_the_daily_allowance(self):
+        cards = self.client.get('/api/review/queue/', {'deck': 'keywords'}).json()['cards']
+        self.assertEqual([card['item']['word'] for card in cards], ['word 0', 'word 1', 'word 2'])
+        self.assertTrue(all(card['new'] for card in cards))
+        # Still due and not answered: the same cards, no new ones
+        again = self.client.get('/api/review/queue/', {'deck': 'keywords'}).json()['cards']
+        self.assertEqual([card['card'] for card in again], [card['card'] for card in cards])
+        self.assertEqual(ReviewCard.objects.filter(user=self.user).count(), 3)
+
+    def test_next_day_introduces_more(self):
+        first = review.due_cards(self.user, ['keywords'], 10, now=NOW)
+        review.submit_reviews(self.user, [(card.pk, 'good', NOW) for card in first], now=NOW)
+        later = review.due_cards(self.user, ['keywords'], 10, now=NOW + timedelta(days=1, hours=1))
+        self.assertEqual([card.item['word'] for card in later], ['word 0', 'word 1', 'word 2', 'word 3', 'word 4'])
+
+    def test_resent_batches_change_nothing(self):
+        card = review.due_cards(self.user, ['formulas'], 1, now=NOW)[0]
+        batch = [{'card': card.pk, 'grade': 'good', 'reviewed_at': '2026-06-15T09:05:00Z'}]
+        first = self.client.post('/api/review/answers/', {'reviews': batch}, content_type='application/json')
+        self.assertEqual(first.json()['cards'][0]['interval_days'], 1)
+        resent = self.client.post('/api/review/answers/', {'reviews': batch}, content_type='application/json')
+        self.assertEqual(resent.json()['cards'], [])
+        card.refresh_from_db()
+        self.assertEqual((card.reps, card.interval_days), (1, 1))
+
+    def test_batches_apply_oldest_first(self):
+        card = review.due_cards(self.user, ['formulas'], 1, now=NOW)[0]
+        review.submit_reviews(self.user, [
+            (card.pk, 'again', NOW + timedelta(minutes=2)), (card.pk, 'good', NOW + timedelta(minutes=1)),
+        ], now=NOW + timedelta(minutes=5))
+        card.refresh_from_db()
+        self.assertEqual((card.reps, card.lapses), (0, 1))
+
+    def test_other_users_cards_are_ignored(self):
+        card = review.due_cards(self.user, ['formulas'], 1, now=NOW)[0]
+        other = User.objects.create_user('other', password='pw')
+        self.assertEqual(review.submit_reviews(other, [(card.pk, 'easy', None)]), [])
+
+    def test_deleted_items_drop_their_cards(self):
+        review.due_cards(self.user, ['keywords'], 3, now=NOW)
+        self.keywords[0].delete()
+        cards = review.due_cards(self.user, ['keywords'], 3, now=NOW)
+        self.assertEqual([card.item['word'] for card in cards], ['word 1', 'word 2'])
+        self.assertEqual(ReviewCard.objects.filter(user=self.user).count(), 2)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/review/queue/', {'deck': 'nope'}).status_code, 400)
+        response = self.client.post(
+            '/api/review/answers/', {'reviews': [{'card': 1, 'grade': 'meh'}]}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
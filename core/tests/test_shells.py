@@ -0,0 +1,45 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from core import shells
+
+
+class PrerenderedShellTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        settings_override = override_settings(PRERENDERED_SHELLS={'ENABLED': True, 'DIR': self.dir})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_build_writes_variants_and_manifest(self):
+        manifest = shells.build_shells(['index'])
+        self.assertEqual(manifest['index']['file'], 'index.html')
+        html = (self.dir / 'index.html').read_bytes()
+        self.assertIn(b"fetch('/api/csrf/'", html)
+        self.assertEqual(gzip.decompress((self.dir / 'index.html.gz').read_bytes()), html)
+
+    def test_serves_built_shell_with_negotiated_encoding(self):
+        shells.build_shells(['index'])
+        response = self.client.get('/index.html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), (self.dir / 'index.html').read_bytes())
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_matching_etag_is_not_modified(self):
+        shells.build_shells(['index'])
+        etag = self.client.get('/index.html')['ETag']
+        response = self.client.get('/index.html', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_falls_back_to_rendering_without_a_build(self):
+        response = self.client.get('/index.html')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('csrftoken', response.cookies)
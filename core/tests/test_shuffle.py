@@ -0,0 +1,127 @@
+import gzip
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import localdate
+
+from core import invalidation, packs, shuffle
+from core.models import DailyQuiz, DailyQuizAttempt, MockTest, Question, TestAttempt
+
+
+User = get_user_model()
+
+
+class ShuffleTests(SimpleTestCase):
+    def test_answers_map_back_to_the_original_letters(self):
+        ids = list(range(1, 41))
+        seed = shuffle.student_seed(7, 'mock_test:1')
+        order = shuffle.Shuffle(seed, ids)
+        self.assertEqual(sorted(order.order), list(range(40)))
+        self.assertNotEqual(order.order, list(range(40)))
+        shown = {str(item_id): order.to_shown(item_id, letter) for item_id, letter in zip(ids, 'ABCD' * 10)}
+        self.assertEqual(shuffle.unshuffle_answers(shown, seed, ids), dict(zip(map(str, ids), 'ABCD' * 10)))
+        self.assertNotEqual(seed, shuffle.student_seed(8, 'mock_test:1'))
+
+    def test_order_survives_other_questions_changing(self):
+        seed = shuffle.student_seed(7, 'mock_test:1')
+        before = shuffle.Shuffle(seed, [1, 2, 3, 4])
+        after = shuffle.Shuffle(seed, [1, 2, 4])
+        relative = [item for item in (1 + i for i in before.order) if item != 3]
+        self.assertEqual(relative, [[1, 2, 4][i] for i in after.order])
+        self.assertEqual(before.option_perm[4], after.option_perm[4])
+
+
+def right_letter(options):
+    return next(letter for letter, text in options.items() if text == 'right')
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': True, 'VERSION': 1})
+class ShuffledPackTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(QUESTION_PACKS=dict(settings.QUESTION_PACKS, DIR=Path(directory.name)))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        packs._pointers.clear()
+        packs._rows.clear()
+        packs._bodies = None
+
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        self.mock_test = MockTest.objects.create(subject='Physics', date=date(2026, 6, 15))
+        for number, correct in enumerate('ABCDABCD'):
+            options = {letter: 'right' if letter == correct else f'wrong {letter}' for letter in 'ABCD'}
+            Question.objects.create(
+                mock_test=self.mock_test, question_text=f'Question {number} ' + 'x' * 200, correct_option=correct,
+                option_a=options['A'], option_b=options['B'], option_c=options['C'], option_d=options['D'],
+            )
+        self.url = f'/api/mock-tests/{self.mock_test.pk}/questions/'
+
+    def test_answers_in_shown_letters_grade_correctly(self):
+        rows = self.client.get(self.url).json()
+        self.assertNotEqual([row['question_text'][:10] for row in rows], [f'Question {n}' for n in range(8)])
+        answers = {str(row['id']): right_letter(row['options']) for row in rows}
+        response = self.client.post(
+            f'/api/mock-tests/{self.mock_test.pk}/submit/', {'answers': answers}, content_type='application/json',
+        )
+        self.assertEqual(response.json()['score'], 100)
+        stored = dict(TestAttempt.objects.get().answers.values_list('question_id', 'selected_option'))
+        self.assertEqual(stored, dict(Question.objects.values_list('id', 'correct_option')))
+
+    def test_student_body_is_rendered_once_per_encoding(self):
+        with mock.patch.object(packs, 'shuffle_question_rows', wraps=packs.shuffle_question_rows) as render:
+            first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            again = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(render.call_count, 1)
+            identity = self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity')
+            self.assertEqual(render.call_count, 2)
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(json.loads(gzip.decompress(first.content)), json.loads(identity.content))
+        self.assertNotEqual(first['ETag'], identity['ETag'])
+        not_modified = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+
+@override_settings(QUESTION_SHUFFLE={'ENABLED': True, 'VERSION': 1})
+class ShuffledDailyQuizTests(TestCase):
+    def setUp(self):
+        invalidation.apply_all()
+        self.addCleanup(invalidation.apply_all)
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        for number, correct in enumerate('ABCDABCD'):
+            options = {letter: 'right' if letter == correct else f'wrong {letter}' for letter in 'ABCD'}
+            DailyQuiz.objects.create(
+                question=f'Question {number}', correct_option=correct, quiz_date=localdate(),
+                option_a=options['A'], option_b=options['B'], option_c=options['C'], option_d=options['D'],
+            )
+
+    def test_answers_in_shown_order_grade_correctly(self):
+        shown = json.loads(self.client.get('/dailyquiz.html').context['quiz_questions_json'])
+        self.assertNotEqual([question['question'] for question in shown], [f'Question {n}' for n in range(8)])
+        answers = ['ABCD'[question['answers'].index('right')] for question in shown]
+        self.assertEqual(answers, ['ABCD'[question['correctIndex']] for question in shown])
+        answers[0] = 'ABCD'[(shown[0]['answers'].index('right') + 1) % 4]
+
+        result = self.client.post(
+            '/submit-daily-quiz/', json.dumps({'answers': answers}), content_type='application/json',
+        ).json()
+        self.assertEqual(result['score'], 7)
+        attempt = DailyQuizAttempt.objects.get(user=self.user)
+        wrong = DailyQuiz.objects.get(pk=shown[0]['id'])
+        originals = list(DailyQuiz.objects.order_by('id').values_list('id', 'correct_option'))
+        self.assertEqual(
+            [option for (quiz_id, option) in originals if quiz_id != wrong.pk],
+            [answer for (quiz_id, _), answer in zip(originals, attempt.answers) if quiz_id != wrong.pk],
+        )
+        # The page shows the stored answers back in the student's order and letters
+        self.assertEqual(self.client.get('/dailyquiz.html').context['user_answers'], answers)
@@ -0,0 +1,126 @@
+import hashlib
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import uploads
+from core.models import ChunkedUpload, PreviousPaper
+
+
+User = get_user_model()
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+CHUNK = 4096
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        documents = {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': directory.name}}
+        settings_override = override_settings(
+            STORAGES=dict(settings.STORAGES, documents=documents),
+            CHUNKED_UPLOADS=dict(settings.CHUNKED_UPLOADS, CHUNK_SIZE=CHUNK),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The field's storage was resolved at import
+        field_storage = mock.patch.object(PreviousPaper._meta.get_field('file'), 'storage', storages['documents'])
+        field_storage.start()
+        self.addCleanup(field_storage.stop)
+
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+
+    def start(self, **extra):
+        response = self.client.post('/api/uploads/', {'target': 'paper', 'filename': 'paper.PDF', 'size': len(DATA), **extra})
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, upload_id, offset, data=None):
+        data = DATA[offset:offset + CHUNK] if data is None else data
+        return self.client.patch(
+            f'/api/uploads/{upload_id}/', data, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def stored_chunks(self, upload_id):
+        return [name for name, _ in uploads._chunks(upload_id)]
+
+    def test_upload_in_chunks(self):
+        upload = self.start()
+        for offset in range(0, len(DATA), CHUNK):
+            response = self.send(upload['id'], offset)
+            self.assertEqual(response.status_code, 200)
+        row = response.json()
+        digest = hashlib.sha256(DATA).hexdigest()
+        self.assertEqual((row['status'], row['offset']), ('complete', len(DATA)))
+        self.assertEqual(row['name'], f'papers/{digest[:2]}/{digest}.pdf')
+        with storages['documents'].open(row['name']) as stored:
+            self.assertEqual(stored.read(), DATA)
+        self.assertEqual(self.stored_chunks(row['id']), [])
+
+    def test_wrong_offset_is_refused(self):
+        upload = self.start()
+        self.send(upload['id'], 0)
+        for offset in (0, 2 * CHUNK):
+            response = self.send(upload['id'], offset)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['offset'], CHUNK)
+        self.assertEqual(self.send(upload['id'], CHUNK, DATA[CHUNK:] + b'extra').status_code, 413)
+
+    def test_racing_request_for_the_same_offset(self):
+        upload = ChunkedUpload.objects.get(pk=self.start()['id'])
+        stale = ChunkedUpload.objects.get(pk=upload.pk)
+        uploads.write_chunk(upload, 0, io.BytesIO(DATA), CHUNK)
+        with self.assertRaisesMessage(uploads.UploadError, 'Another request wrote this chunk.'):
+            uploads.write_chunk(stale, 0, io.BytesIO(b'x' * CHUNK), CHUNK)
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload.pk).offset, CHUNK)
+        with storages['documents'].open(uploads.chunk_name(upload.pk, 0)) as chunk:
+            self.assertEqual(chunk.read(), DATA[:CHUNK])
+
+    def test_resume_after_a_dropped_connection(self):
+        upload = self.start(sha256=hashlib.sha256(DATA).hexdigest())
+        self.send(upload['id'], 0)
+        self.send(upload['id'], CHUNK)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload['id']}/").json()['offset'], 2 * CHUNK)
+        response = self.send(upload['id'], 2 * CHUNK)
+        self.assertEqual(response.json()['status'], 'complete')
+
+    def test_declared_hash_is_checked(self):
+        upload = self.start(sha256='0' * 64)
+        for offset in range(0, len(DATA), CHUNK):
+            response = self.send(upload['id'], offset)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertEqual(self.stored_chunks(upload['id']), [])
+
+    def test_stored_content_is_not_sent_again(self):
+        first = self.start()
+        for offset in range(0, len(DATA), CHUNK):
+            self.send(first['id'], offset)
+        again = self.start(sha256=hashlib.sha256(DATA).hexdigest())
+        self.assertEqual((again['status'], again['offset']), ('complete', len(DATA)))
+
+    def test_missing_chunks_restart_the_upload(self):
+        upload = self.start()
+        self.send(upload['id'], 0)
+        self.send(upload['id'], CHUNK)
+        storages['documents'].delete(uploads.chunk_name(upload['id'], 0))
+        response = self.send(upload['id'], 2 * CHUNK)
+        self.assertEqual((response.status_code, response.json()['status']), (409, 'failed'))
+        self.assertFalse(storages['documents'].exists(uploads.chunk_name(upload['id'], CHUNK)))
+
+    def test_stale_uploads_are_pruned(self):
+        upload = self.start()
+        self.send(upload['id'], 0)
+        ChunkedUpload.objects.filter(pk=upload['id']).update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(uploads.prune_uploads(), 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(self.stored_chunks(upload['id']), [])
@@ -0,0 +1,250 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChunkedUpload, PreviousPaper, Syllabus
+
+
+# Chunked, resumable uploads for paper and syllabus PDFs. The client creates an upload,
+# then sends the bytes in order with PATCH requests carrying their offset; after a
+# dropped connection it asks for the offset reached and carries on from there. Chunks
+# are kept in shared storage (CHUNKED_UPLOADS['STORAGE']), one object per chunk, until
+# the last one arrives; the file is then assembled and hashed in one pass, whichever
+# processes took its chunks. Finished files are
+# stored under their SHA-256 (papers/<2 hex>/<sha256>.pdf), so a file already stored is
+# not written again and only the model's metadata is saved.
+
+# target: (model, FileField name)
+TARGETS = {
+    'paper': (PreviousPaper, 'file'),
+    'syllabus': (Syllabus, 'pdf'),
+}
+
+READ_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024  # Chunks larger than this wait in a temporary file
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def target_field(target):
+    model, field_name = TARGETS[target]
+    return model._meta.get_field(field_name)
+
+
+def content_name(field, filename, digest):
+    """
+    The storage name of a file with SHA-256 `digest` for `field`.
+    """
+    directory = field.upload_to.rstrip('/')
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+
+def store(field, filename, fileobj, digest):
+    """
+    Saves `fileobj` under its content address unless that file is already stored.
+    Returns the storage name.
+    """
+    name = content_name(field, filename, digest)
+    if field.storage.exists(name):
+        return name
+    fileobj.seek(0)
+    return field.storage.save(name, File(fileobj, name=os.path.basename(name)))
+
+
+def store_uploaded_file(field, uploaded):
+    """
+    Content-addresses a file uploaded in one request (Django's UploadedFile).
+    """
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        digest.update(chunk)
+    return store(field, uploaded.name, uploaded, digest.hexdigest())
+
+
+def upload_storage():
+    # Chunks of one upload may land on different processes, which may not share a disk
+    return storages[settings.CHUNKED_UPLOADS['STORAGE']]
+
+
+def chunk_name(upload_id, offset):
+    return f"{settings.CHUNKED_UPLOADS['PREFIX']}/{upload_id}/{offset:012d}.part"
+
+
+def _chunks(upload_id):
+    """
+    (name, size) of the chunks stored for an upload, in order. Each is named after its
+    offset, so the next one starts where the last ends.
+    """
+    storage = upload_storage()
+    offset = 0
+    while True:
+        name = chunk_name(upload_id, offset)
+        if not storage.exists(name):
+            return
+        size = storage.size(name)
+        yield name, size
+        if not size:
+            return
+        offset += size
+
+
+def _read_chunks(upload_id, offset):
+    """
+    The bytes of an upload up to `offset`, a block at a time.
+    """
+    storage = upload_storage()
+    position = 0
+    for name, size in _chunks(upload_id):
+        if position >= offset:
+            break
+        with storage.open(name, 'rb') as chunk:
+            while data := chunk.read(READ_SIZE):
+                yield data
+        position += size
+    if position != offset:
+        raise UploadError("The partial upload is missing, please start again.", status=409)
+
+
+def _delete_chunks(upload_id):
+    # Listed rather than walked, so chunks after a missing one go too
+    storage = upload_storage()
+    directory = f"{settings.CHUNKED_UPLOADS['PREFIX']}/{upload_id}"
+    try:
+        _, names = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        storage.delete(f'{directory}/{name}')
+
+
+def prune_uploads(now=None):
+    """
+    Drops unfinished uploads untouched for CHUNKED_UPLOADS['EXPIRE_HOURS'].
+    """
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.CHUNKED_UPLOADS['EXPIRE_HOURS'])
+    stale = list(ChunkedUpload.objects.filter(status='uploading', updated_at__lt=cutoff).values_list('pk', flat=True))
+    for upload_id in stale:
+        _delete_chunks(upload_id)
+    ChunkedUpload.objects.filter(pk__in=stale).delete()
+    return len(stale)
+
+
+def create_upload(user, target, filename, size, sha256=''):
+    """
+    Starts an upload. When the client sends the file's SHA-256 and that content is
+    already stored, the upload is complete at once and no bytes need to be sent.
+    """
+    if target not in TARGETS:
+        raise UploadError(f"target must be one of {', '.join(TARGETS)}.")
+    if size <= 0 or size > settings.CHUNKED_UPLOADS['MAX_SIZE']:
+        raise UploadError(f"size must be between 1 and {settings.CHUNKED_UPLOADS['MAX_SIZE']} bytes.", status=413)
+    prune_uploads()
+
+    upload = ChunkedUpload(user=user, target=target, filename=os.path.basename(filename)[:255], size=size,
+                           sha256=sha256.lower())
+    if upload.sha256:
+        name = content_name(target_field(target), upload.filename, upload.sha256)
+        if target_field(target).storage.exists(name):
+            upload.name, upload.offset, upload.status = name, size, 'complete'
+    upload.save()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Appends `length` bytes read from `stream` at `offset`, which must be where the upload
+    stands. Finishes the upload when the last byte arrives. Returns the upload.
+    """
+    if upload.status != 'uploading':
+        raise UploadError("This upload is already finished.", status=409)
+    if offset != upload.offset:
+        raise UploadError(f"Expected offset {upload.offset}.", status=409)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError("The chunk runs past the declared size.")
+
+    # Received in full before anything is claimed, so a slow client holds no lock
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as chunk:
+        received = 0
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            chunk.write(data)
+            received += len(data)
+        if received != length:
+            raise UploadError("The chunk was cut short, resume from the current offset.")
+
+        with transaction.atomic():
+            # Claim the offset before writing: the row stays locked until the chunk is
+            # stored, and a request racing for the same offset finds it taken
+            moved = ChunkedUpload.objects.filter(pk=upload.pk, status='uploading', offset=offset).update(
+                offset=F('offset') + received, updated_at=timezone.now()
+            )
+            if not moved:
+                raise UploadError("Another request wrote this chunk.", status=409)
+            storage, name = upload_storage(), chunk_name(upload.pk, offset)
+            if storage.exists(name):
+                storage.delete(name)  # Left by a request that failed before committing
+            chunk.seek(0)
+            storage.save(name, File(chunk, name=posixpath.basename(name)))
+
+    upload.offset = offset + received
+    if upload.offset < upload.size:
+        return upload
+    return finish(upload)
+
+
+def _fail(upload, message, status=400):
+    upload.status = 'failed'
+    upload.save(update_fields=['status', 'updated_at'])
+    _delete_chunks(upload.pk)
+    raise UploadError(message, status=status)
+
+
+def finish(upload):
+    """
+    Assembles the chunks, hashing them on the way, and stores the file.
+    """
+    hasher = hashlib.sha256()
+    with tempfile.TemporaryFile() as assembled:
+        try:
+            for data in _read_chunks(upload.pk, upload.offset):
+                assembled.write(data)
+                hasher.update(data)
+        except UploadError as e:
+            _fail(upload, str(e), status=e.status)
+        digest = hasher.hexdigest()
+        if upload.sha256 and upload.sha256 != digest:
+            _fail(upload, "The uploaded bytes do not match the declared SHA-256.")
+        upload.name = store(target_field(upload.target), upload.filename, assembled, digest)
+    _delete_chunks(upload.pk)
+    upload.sha256, upload.status = digest, 'complete'
+    upload.save(update_fields=['sha256', 'name', 'status', 'updated_at'])
+    return upload
+
+
+def upload_row(upload):
+    return {
+        'id': upload.pk,
+        'target': upload.target,
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'name': upload.name or None,
+        'chunk_size': settings.CHUNKED_UPLOADS['CHUNK_SIZE'],
+    }
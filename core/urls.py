@@ -1,7 +1,8 @@
 
 from django.urls import path
-from core.views_ai import CrackItAIChatAPIView, DeleteAIChatHistoryAPIView
-from core.views import ai_chat_view, save_ai_chat_history
+from core.views_ai import DeleteAIChatHistoryAPIView
+from core.views_async import ai_chat_api, ai_chat_history_api
+from core.views import ai_chat_view
 
 app_name = 'core'
 
@@ -10,9 +11,9 @@ urlpatterns = [
     path('ai-chat/', ai_chat_view, name='ai-chat-html'),
 
     # AI chat API endpoint
-    path('api/ai-chat/', CrackItAIChatAPIView.as_view(), name='api-ai-chat'),
+    path('api/ai-chat/', ai_chat_api, name='api-ai-chat'),
 
     # AI chat history endpoints
-    path('api/ai-chat-history/', save_ai_chat_history, name='ai-chat-history'),
+    path('api/ai-chat-history/', ai_chat_history_api, name='ai-chat-history'),
     path('api/ai-chat-history/<int:chat_id>/', DeleteAIChatHistoryAPIView.as_view(), name='ai-chat-history-delete'),
 ]
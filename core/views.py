@@ -1,27 +1,54 @@
 
 import json
+from datetime import date, timedelta
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.utils.timezone import localdate, now
-from django.http import JsonResponse, HttpResponseNotAllowed
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, localdate, make_aware, now
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django.contrib.auth import authenticate, login, get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.middleware.csrf import get_token
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import viewsets
 from django.contrib.auth.password_validation import validate_password
 from .models import (
-    AIChatHistory, Syllabus, PreviousPaper, Keyword, InterviewQuestion,
-    MockTest, Question, TestAttempt, UserAnswer,
-    Formula, DailyQuiz, DailyQuizAttempt
+    Syllabus, PreviousPaper, Keyword, InterviewQuestion,
+    MockTest, Question, TestAttempt, ExamSession, ChunkedUpload,
+    Formula, DailyQuiz, DailyQuizAttempt, QuestionStatistics, DailyQuizStatistics
 )
+from .shells import prerendered_shell
+from .formulas import SUBJECTS as FORMULA_SUBJECTS, section_page as formula_section_page
+from .packs import pack_response
+from .shuffle import Shuffle, enabled as shuffle_enabled, student_seed
+from .uploads import UploadError, create_upload, upload_row, write_chunk
+from .invalidation import ProcessCache, stats as invalidation_stats
+from .exams import (
+    SessionClosed, active_session, autosave, close_session, grace as exam_grace, grade_attempt, payload as exam_payload,
+    start_session,
+)
+from .compression import stats as compression_stats
+from .reports import attempt_payload, metrics as report_stats, report_response, term_payload
+from .exports import EXPORTS, FORMATS as EXPORT_FORMATS, export_response
+from .item_stats import STAT_FIELDS, roll_up_daily_quiz_attempts, stats_from_values, summarize
+from .retention import (
+    MAX_PAGE_SIZE as MAX_ARCHIVE_PAGE_SIZE, PAGE_SIZE as ARCHIVE_PAGE_SIZE, POLICIES as RETENTION_POLICIES,
+    archive_page, decode_cursor as decode_archive_cursor, encode_cursor as encode_archive_cursor,
+)
+from .ratelimit import in_flight, stats as rate_limit_stats
+from .review import DECKS as REVIEW_DECKS, GRADES as REVIEW_GRADES, card_row, due_cards, submit_reviews
 from .serializers import (
     SyllabusSerializer, PreviousPaperSerializer, KeywordSerializer, InterviewQuestionSerializer,
-    MockTestSerializer, QuestionSerializer, TestAttemptSerializer, UserAnswerSerializer,
-    AttemptDetailSerializer, FormulaSerializer,
+    MockTestSerializer, TestAttemptSerializer, UserAnswerSerializer,
+    AttemptDetailSerializer, FormulaSerializer, parse_fieldset,
+    SyllabusValuesSerializer, PreviousPaperValuesSerializer, KeywordValuesSerializer,
+    InterviewQuestionValuesSerializer, MockTestValuesSerializer, FormulaValuesSerializer,
 )
 
 User = get_user_model()
@@ -29,34 +56,70 @@ User = get_user_model()
 
 # Read-Only API ViewSets
 
-class SyllabusViewSet(viewsets.ReadOnlyModelViewSet):
+class ValuesListMixin:
+    """
+    Serves `list` and `retrieve` through `values_serializer_class`, building rows from
+    `.values()` instead of running the ModelSerializer per instance. Both take
+    ?fields=/?omit=, and only the columns behind the requested fields are read, so
+    lists can leave out heavy text that the detail endpoint returns on demand.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        fields = parse_fieldset(self.request.query_params, self.values_serializer_class.get_output_fields())
+        return self.values_serializer_class(context=self.get_serializer_context(), fields=fields)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.get_values_serializer().rows(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        serializer = self.get_values_serializer()
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup]})
+            rows = serializer.rows(queryset)
+        except (TypeError, ValueError, ValidationError):
+            raise Http404  # A lookup value of the wrong type, like GenericAPIView.get_object
+        if not rows:
+            raise Http404
+        return Response(rows[0])
+
+
+class SyllabusViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Syllabus.objects.all()
     serializer_class = SyllabusSerializer
+    values_serializer_class = SyllabusValuesSerializer
 
 
-class PreviousPaperViewSet(viewsets.ReadOnlyModelViewSet):
+class PreviousPaperViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = PreviousPaper.objects.all()
     serializer_class = PreviousPaperSerializer
+    values_serializer_class = PreviousPaperValuesSerializer
 
 
-class KeywordViewSet(viewsets.ReadOnlyModelViewSet):
+class KeywordViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Keyword.objects.all()
     serializer_class = KeywordSerializer
+    values_serializer_class = KeywordValuesSerializer
 
 
-class InterviewQuestionViewSet(viewsets.ReadOnlyModelViewSet):
+class InterviewQuestionViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = InterviewQuestion.objects.all()
     serializer_class = InterviewQuestionSerializer
+    values_serializer_class = InterviewQuestionValuesSerializer
 
 
-class MockTestViewSet(viewsets.ReadOnlyModelViewSet):
+class MockTestViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = MockTest.objects.all()
     serializer_class = MockTestSerializer
+    values_serializer_class = MockTestValuesSerializer
 
 
-class FormulaViewSet(viewsets.ReadOnlyModelViewSet):
+class FormulaViewSet(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Formula.objects.all()
     serializer_class = FormulaSerializer
+    values_serializer_class = FormulaValuesSerializer
 
 
 # Mock Test API Views
@@ -65,47 +128,102 @@ class QuestionListAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, test_id):
-        mock_test = get_object_or_404(MockTest, pk=test_id)
-        questions = mock_test.questions.all()
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
+        seed = student_seed(request.user.pk, f'mock_test:{test_id}') if shuffle_enabled() else None
+        response = pack_response(request, test_id, seed)
+        if response is None:
+            raise Http404
+        return response
 
 
 class SubmitTestAPIView(APIView):
+    """
+    Grades a test: {"answers": {question id: option}}. Tests started as an exam session
+    also send {"session": id, "seq": n}; answers arriving after the session's deadline
+    are ignored in favour of the last autosaved ones, and resubmitting returns the
+    attempt already graded. Without "session", a test with an open session is refused
+    (409) until its time is up, and then graded from the session.
+    """
     permission_classes = [IsAuthenticated]
+    rate_limit_scope = 'submit_test'
 
     def post(self, request, test_id):
         user = request.user
         mock_test = get_object_or_404(MockTest, pk=test_id)
         answers = request.data.get('answers', {})
 
-        questions = mock_test.questions.all()
-        total_questions = questions.count()
-        correct_count = 0
+        session_id = request.data.get('session')
+        if session_id is None:
+            # A timed test can't be graded around its session, nor graded twice
+            session = active_session(user, mock_test)
+            if session is None:
+                attempt = grade_attempt(user, mock_test, answers)
+                return Response(TestAttemptSerializer(attempt).data, status=201)
+            if now() <= session.deadline + exam_grace():
+                return Response({'error': 'This test is running as a timed session.', 'session': session.pk}, status=409)
+            session = close_session(session.pk, 'expired')
+            return Response(TestAttemptSerializer(session.attempt).data, status=200)
+
+        session = get_object_or_404(ExamSession, pk=session_id, user=user, mock_test=mock_test)
+        created = session.status == 'active'
+        try:
+            session = close_session(session.pk, 'submitted', answers=answers, seq=int(request.data.get('seq', 0)))
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(TestAttemptSerializer(session.attempt).data, status=201 if created else 200)
 
-        attempt = TestAttempt.objects.create(user=user, mock_test=mock_test, score=0)
 
-        for question in questions:
-            selected_option = answers.get(str(question.id))
-            if selected_option:
-                UserAnswer.objects.create(attempt=attempt, question=question, selected_option=selected_option)
-                if selected_option.upper() == question.correct_option.upper():
-                    correct_count += 1
+class ExamSessionAPIView(APIView):
+    """
+    Starts a timed session on a mock test, or resumes the open one, returning its
+    deadline and the answers saved so far.
+    """
+    permission_classes = [IsAuthenticated]
 
-        score_percent = int((correct_count / total_questions) * 100) if total_questions else 0
-        attempt.score = score_percent
-        attempt.save()
+    def post(self, request, test_id):
+        mock_test = get_object_or_404(MockTest, pk=test_id)
+        current = now()
+        session, entry = start_session(request.user, mock_test, current)
+        return Response(exam_payload(session, entry, current))
+
+
+class ExamSessionAnswersAPIView(APIView):
+    """
+    Autosave: {"answers": {question id: option}, "seq": n} replaces the session's answers
+    unless a higher seq was saved already. 409 once the session is over.
+    """
+    permission_classes = [IsAuthenticated]
 
-        serializer = TestAttemptSerializer(attempt)
-        return Response(serializer.data, status=201)
+    def put(self, request, session_id):
+        try:
+            seq = int(request.data.get('seq'))
+        except (TypeError, ValueError):
+            return Response({'error': 'seq must be an integer.'}, status=400)
+        current = now()
+        try:
+            entry = autosave(request.user, session_id, request.data.get('answers'), seq, current)
+        except SessionClosed:
+            return Response({'error': 'This session is over.'}, status=409)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        if entry is None:
+            return Response({'error': 'This session is over.'}, status=409)
+        return Response({
+            'seq': entry['seq'],
+            'remaining_seconds': max(0, int((entry['deadline'] - current).total_seconds())),
+        })
 
 
 class TestAttemptListAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        attempts = TestAttempt.objects.filter(user=request.user).order_by('-taken_on')
-        serializer = TestAttemptSerializer(attempts, many=True)
+        fields = parse_fieldset(request.query_params, TestAttemptSerializer.Meta.fields)
+        attempts = TestAttempt.objects.filter(user=request.user).select_related('user', 'mock_test').order_by('-taken_on')
+        if fields is None or 'answers' in fields:
+            attempts = attempts.prefetch_related('answers')
+        if fields is not None and 'mock_test' not in fields:
+            attempts = attempts.defer('mock_test__description')
+        serializer = TestAttemptSerializer(attempts, many=True, context={'fields': fields})
         return Response(serializer.data)
 
 
@@ -118,6 +236,231 @@ class TestAttemptDetailAPIView(APIView):
         return Response(serializer.data)
 
 
+class ArchivedHistoryAPIView(APIView):
+    """
+    Returns the user's rows moved to the archive by `archive_history`, a page at a time
+    (?limit=, then ?cursor= from `next_cursor`), optionally limited with
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, policy):
+        if policy not in RETENTION_POLICIES:
+            return Response({'error': 'Unknown archive.'}, status=404)
+        try:
+            start = date.fromisoformat(request.query_params['from']) if 'from' in request.query_params else None
+            end = date.fromisoformat(request.query_params['to']) if 'to' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+        try:
+            cursor = decode_archive_cursor(request.query_params['cursor']) if 'cursor' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'Invalid cursor.'}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', ARCHIVE_PAGE_SIZE)), MAX_ARCHIVE_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be a number.'}, status=400)
+        rows, next_cursor = archive_page(policy, request.user.id, start, end, cursor, limit)
+        return Response({
+            'results': rows,
+            'next_cursor': encode_archive_cursor(next_cursor) if next_cursor else None,
+        })
+
+
+def item_stats_rows(queryset, model, fields):
+    rows = queryset.values(*fields, *[f'stats__{field}' for field in STAT_FIELDS])
+    return [
+        {**{field: row[field] for field in fields}, **summarize(stats_from_values(model, row))}
+        for row in rows
+    ]
+
+
+class MockTestItemStatsAPIView(APIView):
+    """
+    Item analysis (attempts, difficulty, discrimination, option spread) for every
+    question of a mock test, read from the incrementally maintained counters.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, test_id):
+        questions = Question.objects.filter(mock_test_id=test_id).order_by('id')
+        return Response(item_stats_rows(questions, QuestionStatistics, ('id', 'question_text', 'correct_option')))
+
+
+class DailyQuizItemStatsAPIView(APIView):
+    """
+    Item analysis for one day's daily quiz (?date=YYYY-MM-DD, default today), after
+    counting in the attempts submitted since the last roll-up.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            quiz_date = date.fromisoformat(request.query_params['date']) if 'date' in request.query_params else localdate()
+        except ValueError:
+            return Response({'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+        roll_up_daily_quiz_attempts()
+        quizzes = DailyQuiz.objects.filter(quiz_date=quiz_date).order_by('id')
+        return Response(item_stats_rows(quizzes, DailyQuizStatistics, ('id', 'question', 'correct_option')))
+
+
+class ExportAPIView(APIView):
+    """
+    Streams a staff export (attempts, answers or daily-quiz) as CSV or XLSX, filtered by
+    ?mock_test=, ?class_level= and ?from=/?to= (YYYY-MM-DD) where the export supports them.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name, file_format):
+        export = EXPORTS.get(name)
+        if export is None or file_format not in EXPORT_FORMATS:
+            return Response({'error': 'Unknown export.'}, status=404)
+        try:
+            return export_response(request._request, export, file_format, request.query_params)
+        except ValueError:
+            return Response({'error': 'Invalid filter value.'}, status=400)
+
+
+class AttemptReportAPIView(APIView):
+    """
+    PDF report card for one of the user's test attempts; 202 until the worker has rendered it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, attempt_id):
+        payload = attempt_payload(request.user, attempt_id)
+        if payload is None:
+            return Response({'error': 'Attempt not found.'}, status=404)
+        return report_response(request, request.user, 'attempt', payload, f"attempt-{attempt_id}.pdf")
+
+
+class TermReportAPIView(APIView):
+    """
+    PDF summary of the user's mock tests and daily quizzes for ?from=&to= (YYYY-MM-DD).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            end = date.fromisoformat(request.query_params['to']) if 'to' in request.query_params else localdate()
+            start = (
+                date.fromisoformat(request.query_params['from']) if 'from' in request.query_params
+                else end - timedelta(days=settings.REPORTS['DEFAULT_TERM_DAYS'])
+            )
+        except ValueError:
+            return Response({'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+        payload = term_payload(request.user, start, end)
+        return report_response(request, request.user, 'term', payload, f"term-{start}-{end}.pdf")
+
+
+# Spaced Repetition API Views
+
+class ReviewQueueAPIView(APIView):
+    """
+    The user's next keyword/formula cards to review (?deck=keywords|formulas, default
+    both; ?limit=), most overdue first, topped up with new cards.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        config = settings.SPACED_REPETITION
+        decks = [deck for deck in request.query_params.get('deck', '').split(',') if deck] or list(REVIEW_DECKS)
+        if any(deck not in REVIEW_DECKS for deck in decks):
+            return Response({'error': 'Unknown deck.'}, status=400)
+        try:
+            limit = min(int(request.query_params.get('limit', config['QUEUE_SIZE'])), config['MAX_QUEUE_SIZE'])
+        except ValueError:
+            return Response({'error': 'limit must be a number.'}, status=400)
+        cards = due_cards(request.user, decks, max(limit, 1))
+        return Response({'cards': [card_row(card) for card in cards]})
+
+
+class ReviewSubmitAPIView(APIView):
+    """
+    Records a batch of reviews: {"reviews": [{"card": id, "grade": "again|hard|good|easy",
+    "reviewed_at": ISO 8601}]}. With reviewed_at set, a batch resent after a failed
+    request changes nothing.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        reviews = request.data.get('reviews')
+        if not isinstance(reviews, list) or not reviews:
+            return Response({'error': 'reviews must be a non-empty list.'}, status=400)
+        if len(reviews) > settings.SPACED_REPETITION['MAX_REVIEWS_PER_BATCH']:
+            return Response({'error': 'Too many reviews in one batch.'}, status=400)
+
+        parsed = []
+        for review in reviews:
+            try:
+                card_id = int(review['card'])
+                grade = review['grade']
+                reviewed_at = parse_datetime(review['reviewed_at']) if review.get('reviewed_at') else None
+            except (KeyError, TypeError, ValueError):
+                return Response({'error': 'Each review needs a card, a grade and an optional reviewed_at.'}, status=400)
+            if grade not in REVIEW_GRADES:
+                return Response({'error': f"grade must be one of {', '.join(REVIEW_GRADES)}."}, status=400)
+            if reviewed_at is not None and is_naive(reviewed_at):
+                reviewed_at = make_aware(reviewed_at)
+            parsed.append((card_id, grade, reviewed_at))
+
+        cards = submit_reviews(request.user, parsed)
+        return Response({'cards': [card_row(card) for card in cards]})
+
+
+# Chunked uploads of paper and syllabus PDFs, used by the admin
+
+class ChunkedUploadAPIView(APIView):
+    """
+    Starts an upload: {"target": "paper"|"syllabus", "filename", "size", "sha256"?}.
+    The response's `offset` is where the first chunk goes; an upload of content already
+    stored comes back complete.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'error': 'size must be an integer.'}, status=400)
+        sha256 = request.data.get('sha256') or ''
+        if sha256 and (len(sha256) != 64 or any(c not in '0123456789abcdefABCDEF' for c in sha256)):
+            return Response({'error': 'sha256 must be 64 hex digits.'}, status=400)
+        try:
+            upload = create_upload(request.user, request.data.get('target'), str(request.data.get('filename') or ''),
+                                   size, sha256)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(upload_row(upload), status=201)
+
+
+class ChunkedUploadDetailAPIView(APIView):
+    """
+    GET returns the offset reached, to resume from. PATCH appends one chunk: the raw
+    bytes as the body and their position in an Upload-Offset header.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+        return Response(upload_row(upload))
+
+    def patch(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required.'}, status=400)
+        if length > settings.CHUNKED_UPLOADS['CHUNK_SIZE']:
+            return Response({'error': 'Chunk too large.'}, status=413)
+        try:
+            upload = write_chunk(upload, offset, request.stream, length)
+        except UploadError as e:
+            return Response({'error': str(e), **upload_row(upload)}, status=e.status)
+        return Response(upload_row(upload))
+
+
 # Daily Quiz API Views
 
 class DailyQuizAttemptListAPIView(APIView):
@@ -172,14 +515,35 @@ class DailyQuizAttemptDetailAPIView(APIView):
 
 # Daily Quiz Frontend Views
 
+# A day's quiz, with its answer key, as read by everyone taking it at once. Emptied on
+# every process through the invalidation bus when the quiz is edited in the admin.
+daily_quiz_cache = ProcessCache('daily-quiz')
+
+
+def daily_quiz_questions(day):
+    return daily_quiz_cache.get(
+        day.isoformat(), lambda: tuple(DailyQuiz.objects.filter(quiz_date=day).order_by('id'))
+    )
+
+
+def daily_quiz_shuffle(user, today, quiz_ids):
+    """
+    The student's order of today's quiz, or None when shuffling is off. Attempts store
+    answers in the original order and letters.
+    """
+    if not shuffle_enabled():
+        return None
+    return Shuffle(student_seed(user.pk, f'daily_quiz:{today.isoformat()}'), quiz_ids)
+
+
 @login_required
 def daily_quiz_view(request):
     user = request.user
     today = localdate()
 
-    quiz_questions = DailyQuiz.objects.filter(quiz_date=today).order_by('id')
+    quiz_list = daily_quiz_questions(today)
 
-    if not quiz_questions.exists():
+    if not quiz_list:
         context = {
             'no_quiz_today': True,
             'quiz_questions_json': json.dumps([]),
@@ -194,29 +558,46 @@ def daily_quiz_view(request):
     attempt = DailyQuizAttempt.objects.filter(user=user, quiz_date=today).first()
     quiz_submitted = attempt is not None
 
+    quiz_ids = [q.id for q in quiz_list]
+    shuffle = daily_quiz_shuffle(user, today, quiz_ids)
+    order = shuffle.order if shuffle else range(len(quiz_list))
+
     quiz_questions_data = []
-    for q in quiz_questions:
+    for q in (quiz_list[index] for index in order):
         correct_options = ['A', 'B', 'C', 'D']
+        answers = [q.option_a, q.option_b, q.option_c, q.option_d]
+        correct_option = (q.correct_option or '').upper()
+        if shuffle:
+            answers = shuffle.shown_options(q.id, answers)
+            correct_option = shuffle.to_shown(q.id, correct_option)
         try:
-            correct_index = correct_options.index((q.correct_option or '').upper())
-        except (ValueError, AttributeError):
+            correct_index = correct_options.index(correct_option)
+        except ValueError:
             correct_index = 0
 
         quiz_questions_data.append({
             "id": q.id,
             "question": q.question,
-            "answers": [q.option_a, q.option_b, q.option_c, q.option_d],
+            "answers": answers,
             "correctIndex": correct_index,
         })
 
+    user_answers = attempt.answers if attempt else None
+    if shuffle and user_answers:
+        user_answers = [
+            shuffle.to_shown(quiz_ids[index], user_answers[index])
+            if index < len(user_answers) and isinstance(user_answers[index], str) else None
+            for index in order
+        ]
+
     context = {
         'no_quiz_today': False,
         'quiz_questions_json': json.dumps(quiz_questions_data),
         'quiz_submitted': quiz_submitted,
         'score': attempt.score if attempt else None,
         'percent': attempt.percent if attempt else None,
-        'total_questions': quiz_questions.count(),
-        'user_answers': attempt.answers if attempt else None,
+        'total_questions': len(quiz_list),
+        'user_answers': user_answers,
         'today': today.strftime('%Y-%m-%d'),
         'attempt_id': attempt.id if attempt else None,
         'attempted_on': attempt.quiz_date.strftime('%Y-%m-%d %H:%M:%S') if attempt else None,
@@ -224,35 +605,71 @@ def daily_quiz_view(request):
     return render(request, 'dailyquiz.html', context)
 
 
+def daily_quiz_result(attempt, correct_answers):
+    return {
+        'success': True,
+        'score': attempt.score,
+        'percent': attempt.percent,
+        'total_questions': len(correct_answers),
+        'correct_answers': correct_answers,
+        'attempt_id': attempt.id,
+    }
+
+
+def daily_quiz_resubmission(attempt, idempotency_key, correct_answers):
+    if idempotency_key and attempt.idempotency_key == idempotency_key:
+        return JsonResponse(daily_quiz_result(attempt, correct_answers))
+    return JsonResponse({'error': 'Quiz already attempted today.'}, status=400)
+
+
 @login_required
 def submit_daily_quiz(request):
+    """
+    Grades and stores today's attempt with one insert; item statistics are counted
+    later by roll_up_daily_quiz_attempts, so submissions never wait on each other. A
+    second submission is answered from the stored attempt (the (user, quiz_date) unique
+    constraint settles races): if it carries the same Idempotency-Key it is a retry and
+    gets the original result.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST allowed'}, status=405)
 
     user = request.user
     today = localdate()
 
-    quiz_questions = DailyQuiz.objects.filter(quiz_date=today).order_by('id')
-    if not quiz_questions.exists():
-        return JsonResponse({'error': 'No quiz available for today.'}, status=400)
-
-    if DailyQuizAttempt.objects.filter(user=user, quiz_date=today).exists():
-        return JsonResponse({'error': 'Quiz already attempted today.'}, status=400)
-
     try:
         data = json.loads(request.body.decode('utf-8'))
         answers = data.get('answers', [])
     except Exception as e:
         return JsonResponse({'error': 'Invalid JSON data.', 'details': str(e)}, status=400)
 
-    score = 0
-    total_questions = quiz_questions.count()
-    correct_answers = []
+    idempotency_key = str(request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '')[:64]
 
-    for idx, question in enumerate(quiz_questions):
-        correct_opt = (question.correct_option or '').upper()
-        correct_answers.append(correct_opt)
+    quizzes = [(q.id, q.correct_option) for q in daily_quiz_questions(today)]
+    correct_answers = [(option or '').upper() for _, option in quizzes]
+    if not correct_answers:
+        return JsonResponse({'error': 'No quiz available for today.'}, status=400)
+
+    # Answers arrive in the order and letters the student was shown
+    shuffle = daily_quiz_shuffle(user, today, [quiz_id for quiz_id, _ in quizzes])
+    if shuffle:
+        original = [None] * len(quizzes)
+        for position, index in enumerate(shuffle.order):
+            if position < len(answers) and isinstance(answers[position], str) and answers[position]:
+                original[index] = shuffle.to_original(quizzes[index][0], answers[position])
+        answers = original
+        shown_correct = [shuffle.to_shown(quizzes[index][0], correct_answers[index]) for index in shuffle.order]
+    else:
+        shown_correct = correct_answers
+
+    # Resubmissions are answered from the stored attempt without grading or writing
+    attempt = DailyQuizAttempt.objects.filter(user=user, quiz_date=today).first()
+    if attempt is not None:
+        return daily_quiz_resubmission(attempt, idempotency_key, shown_correct)
 
+    total_questions = len(correct_answers)
+    score = 0
+    for idx, correct_opt in enumerate(correct_answers):
         user_answer = answers[idx].upper() if idx < len(answers) and answers[idx] else None
         if user_answer == correct_opt:
             score += 1
@@ -260,32 +677,31 @@ def submit_daily_quiz(request):
     percent = int((score / total_questions) * 100) if total_questions else 0
 
     try:
-        attempt = DailyQuizAttempt.objects.create(
-            user=user,
-            quiz_date=today,
-            score=score,
-            percent=percent,
-            answers=answers,
-        )
+        with transaction.atomic():
+            attempt = DailyQuizAttempt.objects.create(
+                user=user,
+                quiz_date=today,
+                score=score,
+                percent=percent,
+                answers=answers,
+                idempotency_key=idempotency_key,
+            )
+    except IntegrityError:
+        attempt = DailyQuizAttempt.objects.get(user=user, quiz_date=today)
+        return daily_quiz_resubmission(attempt, idempotency_key, shown_correct)
     except Exception as exc:
         import traceback
         print(f"Error saving DailyQuizAttempt: {traceback.format_exc()}")
         return JsonResponse({'error': 'Failed to save attempt.', 'details': str(exc)}, status=500)
 
-    return JsonResponse({
-        'success': True,
-        'score': score,
-        'percent': percent,
-        'total_questions': total_questions,
-        'correct_answers': correct_answers,
-        'attempt_id': attempt.id,
-    })
+    return JsonResponse(daily_quiz_result(attempt, shown_correct))
 
 
 # Authentication API Views
 
 class RegisterAPIView(APIView):
     permission_classes = [AllowAny]
+    rate_limit_scope = 'register'
 
     def post(self, request):
         username = request.data.get('username')
@@ -306,7 +722,8 @@ class RegisterAPIView(APIView):
             return Response({'password': e.messages}, status=400)
 
         user = User(username=username, email=email)
-        user.set_password(password)
+        with in_flight('password_hash'):
+            user.set_password(password)
         user.save()
 
         return Response({'detail': 'User registered successfully'}, status=201)
@@ -314,11 +731,13 @@ class RegisterAPIView(APIView):
 
 class LoginAPIView(APIView):
     permission_classes = [AllowAny]
+    rate_limit_scope = 'login'
 
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
-        user = authenticate(request, username=username, password=password)
+        with in_flight('password_hash'):
+            user = authenticate(request, username=username, password=password)
         if user is not None:
             login(request, user)
             return Response({'detail': 'Login successful'}, status=200)
@@ -327,6 +746,7 @@ class LoginAPIView(APIView):
 
 # Frontend Render Views
 
+@prerendered_shell('index')
 @ensure_csrf_cookie
 def home_view(request):
     return render(request, 'index.html')
@@ -339,6 +759,7 @@ def login_view(request):
 def register_view(request):
     return render(request, 'register.html')
 
+@prerendered_shell('syllabus')
 @ensure_csrf_cookie
 def syllabus_view(request):
     return render(request, 'syllabus.html')
@@ -347,86 +768,84 @@ def syllabus_view(request):
 def mock_tests_view(request):
     return render(request, 'mocktest.html')
 
+@prerendered_shell('previouspaper')
 @ensure_csrf_cookie
 def previous_papers_view(request):
     return render(request, 'previouspaper.html')
 
+@prerendered_shell('results')
 @ensure_csrf_cookie
 def results_view(request):
     return render(request, 'results.html')
 
+@prerendered_shell('keywords')
 @ensure_csrf_cookie
 def keywords_view(request):
     return render(request, 'keywords.html')
 
+@prerendered_shell('interview')
 @ensure_csrf_cookie
 def interview_questions(request):
     return render(request, 'interview.html')
 
 @ensure_csrf_cookie
 def formula_view(request):
-    formulas = Formula.objects.all()
-    return render(request, 'formula.html', {'formulas': formulas})
+    subject = request.GET.get('subject')
+    if subject not in FORMULA_SUBJECTS:
+        subject = FORMULA_SUBJECTS[0]
+    section, _ = formula_section_page(subject)
+    return render(request, 'formula.html', {'subjects': FORMULA_SUBJECTS, 'subject': subject, 'section': section})
+
+def formula_section(request, subject):
+    """
+    One page of a subject's formulas as an HTML fragment, for the formula page's tabs.
+    """
+    if subject not in FORMULA_SUBJECTS:
+        raise Http404
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        raise Http404
+    html, version = formula_section_page(subject, after)
+    etag = f'"{version}-{after}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(html)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+@ensure_csrf_cookie
+def csrf_token_view(request):
+    return JsonResponse({'csrfToken': get_token(request)})
 
 @login_required
 def ai_chat_view(request):
     return render(request, 'aichat.html')
 
-# AI Chat History API Views
 
-@api_view(['GET', 'POST'])
-@permission_classes([IsAuthenticated])
-def save_ai_chat_history(request):
-    user = request.user
-    if request.method == 'POST':
-        user_message = request.data.get('user')
-        ai_response = request.data.get('ai')
-        if user_message is not None and ai_response is not None:
-            history = AIChatHistory.objects.create(
-                user=user,
-                messages=[
-                    {"role": "user", "content": user_message},
-                    {"role": "ai", "content": ai_response},
-                ]
-            )
-            return Response({'status': 'ok'})
-        return Response({'status': 'fail', "detail": "Missing user or ai message."}, status=400)
-    elif request.method == 'GET':
-        chats = AIChatHistory.objects.filter(user=user).order_by('-timestamp')[:20]
-        return Response([
-            {
-                'id': chat.pk,
-                'conversation_id': chat.conversation_id,
-                'messages': chat.messages
-            }
-            for chat in chats
-        ])
-
-
-class DeleteAIChatHistoryAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+# Operational metrics
 
-    def delete(self, request, chat_id):
-        try:
-            chat = AIChatHistory.objects.get(id=chat_id, user=request.user)
-            chat.delete()
-            return Response({"success": True}, status=204)
-        except AIChatHistory.DoesNotExist:
-            return Response({"error": "Chat not found"}, status=404)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def compression_metrics(request):
+    return Response(compression_stats.snapshot())
 
 
-class CrackItAIChatAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def report_metrics(request):
+    return Response(report_stats())
 
-    def post(self, request):
-        user_message = request.data.get("message")
-        if not user_message:
-            return Response({"error": "No message provided"}, status=400)
-        try:
-            # TODO: implement AI inference here
-            answer = "AI response placeholder - implement inference here."
-            return Response({"answer": answer})
-        except Exception as e:
-            import traceback
-            print("AI chat view error:", traceback.format_exc())
-            return Response({"error": str(e)}, status=500)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def rate_limit_metrics(request):
+    return Response(rate_limit_stats.snapshot())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def invalidation_metrics(request):
+    return Response(invalidation_stats.snapshot())
@@ -4,10 +4,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import AIChatHistory
-from .groq_inference import query_groq_api
-import uuid
-import pprint
-import traceback
 
 def clean_message_content(content):
     if isinstance(content, str):
@@ -38,56 +34,6 @@ def clean_message_history(messages):
         })
     return cleaned
 
-class CrackItAIChatAPIView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request):
-        user_message = request.data.get("message")
-        if not user_message:
-            return Response({"error": "No message provided"}, status=status.HTTP_400_BAD_REQUEST)
-
-        assistant_name = request.session.get('assistant_name', 'Crack_it AI Assistant')
-        new_name = request.data.get("set_name")
-        if new_name:
-            assistant_name = new_name
-            request.session['assistant_name'] = assistant_name
-
-        conversation_id = request.data.get('conversation_id')
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
-
-        history, created = AIChatHistory.objects.get_or_create(
-            user=request.user,
-            conversation_id=conversation_id,
-            defaults={'messages': []}
-        )
-
-        cleaned_user_message = clean_message_content(user_message)
-        if not history.messages or history.messages[-1].get("content") != cleaned_user_message:
-            history.messages.append({"role": "user", "content": cleaned_user_message})
-
-        cleaned_messages = clean_message_history(history.messages)
-
-        # Debug: print cleaned messages right before sending to Groq
-        print("DEBUG: Cleaned messages being sent to Groq API:")
-        pprint.pprint(cleaned_messages)
-
-        try:
-            answer = query_groq_api(cleaned_messages)
-            cleaned_answer = clean_message_content(answer)
-            history.messages.append({"role": "assistant", "content": cleaned_answer})
-            history.save()
-
-            return Response({
-                "answer": cleaned_answer,
-                "assistant_name": assistant_name,
-                "conversation_id": conversation_id,
-            })
-
-        except Exception as e:
-            traceback.print_exc()  # Print full traceback for debugging
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
 class DeleteAIChatHistoryAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
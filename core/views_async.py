@@ -0,0 +1,277 @@
+import base64
+import json
+import mimetypes
+import os
+import stat
+import traceback
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+from .groq_inference import aquery_groq_api
+from .models import AIChatHistory, AIConversationIndex
+from .ratelimit import ServerBusy, busy_response, check as rate_limit_check, in_flight, rate_limited_response
+from .views_ai import clean_message_content, clean_message_history
+
+
+# Async-native versions of the I/O-bound endpoints. Under ASGI they await the LLM,
+# the database and the disk instead of pinning a worker thread per request.
+
+MEDIA_CHUNK_SIZE = 64 * 1024
+COMPRESSED_TYPES = {'gzip': 'application/gzip', 'bzip2': 'application/x-bzip', 'xz': 'application/x-xz'}
+
+CONVERSATION_PAGE_SIZE = 20
+MAX_CONVERSATION_PAGE_SIZE = 100
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
+NOT_AUTHENTICATED = {'detail': 'Authentication credentials were not provided.'}
+
+
+@sync_to_async
+def _authenticated_user(request):
+    # Resolves the lazy request.user (session + user lookup) off the event loop
+    return request.user if request.user.is_authenticated else None
+
+
+@sync_to_async
+def _session_get(request, key, default=None):
+    return request.session.get(key, default)
+
+
+@sync_to_async
+def _session_set(request, key, value):
+    request.session[key] = value
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+async def ai_chat_api(request):
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+    wait = await sync_to_async(rate_limit_check)('ai_chat', request)
+    if wait:
+        return rate_limited_response(wait)
+
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+
+    user_message = data.get("message")
+    if not user_message:
+        return JsonResponse({"error": "No message provided"}, status=400)
+
+    assistant_name = await _session_get(request, 'assistant_name', 'Crack_it AI Assistant')
+    new_name = data.get("set_name")
+    if new_name:
+        assistant_name = new_name
+        await _session_set(request, 'assistant_name', assistant_name)
+
+    conversation_id = data.get('conversation_id') or str(uuid.uuid4())
+
+    history, created = await AIChatHistory.objects.aget_or_create(
+        user=user,
+        conversation_id=conversation_id,
+        defaults={'messages': []}
+    )
+
+    cleaned_user_message = clean_message_content(user_message)
+    if not history.messages or history.messages[-1].get("content") != cleaned_user_message:
+        history.messages.append({"role": "user", "content": cleaned_user_message})
+
+    try:
+        with in_flight('llm'):
+            answer = await aquery_groq_api(clean_message_history(history.messages))
+        cleaned_answer = clean_message_content(answer)
+        history.messages.append({"role": "assistant", "content": cleaned_answer})
+        await history.asave()
+
+        return JsonResponse({
+            "answer": cleaned_answer,
+            "assistant_name": assistant_name,
+            "conversation_id": conversation_id,
+        })
+
+    except ServerBusy as exc:
+        return busy_response(exc)
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+async def ai_chat_history_api(request):
+    if request.method not in ('GET', 'POST'):
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    if request.method == 'POST':
+        data = _request_data(request) or {}
+        user_message = data.get('user')
+        ai_response = data.get('ai')
+        if user_message is not None and ai_response is not None:
+            await AIChatHistory.objects.acreate(
+                user=user,
+                messages=[
+                    {"role": "user", "content": user_message},
+                    {"role": "ai", "content": ai_response},
+                ]
+            )
+            return JsonResponse({'status': 'ok'})
+        return JsonResponse({'status': 'fail', "detail": "Missing user or ai message."}, status=400)
+
+    chats = AIChatHistory.objects.filter(user=user).order_by('-timestamp')[:20]
+    return JsonResponse([
+        {
+            'id': chat.pk,
+            'conversation_id': chat.conversation_id,
+            'messages': chat.messages
+        }
+        async for chat in chats
+    ], safe=False)
+
+
+def _page_size(request, default, maximum):
+    try:
+        return max(1, min(int(request.GET.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
+
+def _encode_cursor(entry):
+    raw = f"{entry.updated_at.isoformat()}|{entry.chat_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    updated_at, chat_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    parsed = parse_datetime(updated_at)
+    if parsed is None:
+        raise ValueError("Bad cursor timestamp")
+    return parsed, int(chat_id)
+
+
+async def ai_conversation_list_api(request):
+    """
+    Sidebar listing from AIConversationIndex, newest first, keyset-paginated with an
+    opaque ?cursor= so every page is one bounded index range scan.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    limit = _page_size(request, CONVERSATION_PAGE_SIZE, MAX_CONVERSATION_PAGE_SIZE)
+    entries = AIConversationIndex.objects.filter(user=user).order_by('-updated_at', '-chat_id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            updated_at, chat_id = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+        entries = entries.filter(Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, chat_id__lt=chat_id))
+
+    page = [entry async for entry in entries[:limit + 1]]
+    has_more = len(page) > limit
+    page = page[:limit]
+    return JsonResponse({
+        'results': [
+            {
+                'id': entry.chat_id,
+                'conversation_id': entry.conversation_id,
+                'title': entry.title,
+                'last_message_preview': entry.last_message_preview,
+                'message_count': entry.message_count,
+                'updated_at': entry.updated_at.isoformat(),
+            }
+            for entry in page
+        ],
+        'next_cursor': _encode_cursor(page[-1]) if has_more else None,
+    })
+
+
+async def ai_conversation_messages_api(request, chat_id):
+    """
+    One page of a conversation's messages, newest last. ?before=<index> walks backwards
+    through long conversations; the response's `next_before` is null at the start.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    try:
+        chat = await AIChatHistory.objects.only('id', 'conversation_id', 'messages').aget(pk=chat_id, user=user)
+    except AIChatHistory.DoesNotExist:
+        return JsonResponse({"error": "Chat not found"}, status=404)
+
+    messages = chat.messages or []
+    total = len(messages)
+    limit = _page_size(request, MESSAGE_PAGE_SIZE, MAX_MESSAGE_PAGE_SIZE)
+    try:
+        before = min(int(request.GET.get('before', total)), total)
+    except ValueError:
+        return JsonResponse({'error': 'before must be an integer.'}, status=400)
+    start = max(before - limit, 0)
+
+    return JsonResponse({
+        'id': chat.pk,
+        'conversation_id': chat.conversation_id,
+        'total': total,
+        'start': start,
+        'messages': messages[start:before],
+        'next_before': start if start > 0 else None,
+    })
+
+
+async def _file_chunks(path):
+    # Disk reads run in the thread pool so the event loop keeps serving other connections
+    fh = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    read = sync_to_async(fh.read, thread_sensitive=False)
+    try:
+        while chunk := await read(MEDIA_CHUNK_SIZE):
+            yield chunk
+    finally:
+        fh.close()
+
+
+async def serve_media(request, path):
+    """
+    Streams a file from MEDIA_ROOT without blocking the event loop on disk reads. Routed
+    only with DEBUG on; deployments serve media from the web server or object storage.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = await sync_to_async(os.stat, thread_sensitive=False)(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404("File not found")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("File not found")
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    # A .gz/.bz2/.xz file is sent as the archive it is, not decoded by the browser
+    content_type = COMPRESSED_TYPES.get(encoding, content_type) or 'application/octet-stream'
+    response = StreamingHttpResponse(_file_chunks(full_path), content_type=content_type)
+    response['Content-Length'] = str(file_stat.st_size)
+    response['Last-Modified'] = http_date(file_stat.st_mtime)
+    return response
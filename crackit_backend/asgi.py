@@ -0,0 +1,17 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crackit_backend.settings')
+
+django_application = get_asgi_application()
+
+from core.live import live_quiz_app  # noqa: E402  (needs the app registry loaded above)
+
+
+async def application(scope, receive, send):
+    # WebSockets only serve live classroom sessions; everything else is Django
+    if scope['type'] == 'websocket':
+        await live_quiz_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.InvalidationMiddleware',  # Applies cache invalidations from other processes
+    'core.middleware.CompressionMiddleware',  # Brotli/gzip, cached for catalog endpoints
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',  # CSRF protection
@@ -44,8 +46,14 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # Templates directory
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Inline CSS/JS is swapped for the `build_assets` bundles when they exist
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'core.assets.InlineAssetLoader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -57,6 +65,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'crackit_backend.wsgi.application'
+ASGI_APPLICATION = 'crackit_backend.asgi.application'
 
 # Database configuration - MySQL
 DATABASES = {
@@ -97,10 +106,74 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # For production
 
+# Pre-rendered page shells, built with `python manage.py build_shells`
+PRERENDERED_SHELLS = {
+    'ENABLED': os.getenv('PRERENDERED_SHELLS', 'True').lower() == 'true',
+    'DIR': STATIC_ROOT / 'shells',
+}
+
+# Hashed CSS/JS bundles extracted from the templates by `python manage.py build_assets`
+ASSET_PIPELINE = {
+    'DIR': STATIC_ROOT / 'bundles',
+    'URL': '/assets/',
+}
+
+# Answer-free question packs of each mock test, built on first request and after edits
+QUESTION_PACKS = {
+    'DIR': STATIC_ROOT / 'packs',
+    'CACHE_BYTES': 32 * 1024 * 1024,   # Per-process LRU of pack bodies, all encodings and student orders
+}
+
+# Per-student question and option order (core/shuffle.py). Changing VERSION reshuffles
+# everyone, so only change it when no test is in progress.
+QUESTION_SHUFFLE = {
+    'ENABLED': os.getenv('QUESTION_SHUFFLE', 'True').lower() == 'true',
+    'VERSION': 1,
+}
+
+# Formula page sections (core/formulas.py), cached per subject and content version
+FORMULA_PAGES = {
+    'CACHE': 'default',
+    'PAGE_SIZE': 50,                    # Formulas per section page, before "Load more"
+    'CACHE_SECONDS': 7 * 24 * 60 * 60,  # Fragments are versioned, this only bounds the cache
+}
+
 # Media files (User uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Paper and syllabus PDFs (PreviousPaper.file, Syllabus.pdf) go to STORAGES['documents'].
+# With OBJECT_STORAGE_BUCKET set that is S3-compatible object storage, and clients download
+# from presigned URLs instead of through the app; `move_documents` copies existing files
+# over. For a local stand-in run MinIO and point OBJECT_STORAGE_ENDPOINT_URL at it.
+OBJECT_STORAGE = {
+    'BUCKET': os.getenv('OBJECT_STORAGE_BUCKET', ''),
+    'ENDPOINT_URL': os.getenv('OBJECT_STORAGE_ENDPOINT_URL') or None,   # None for AWS S3
+    'REGION': os.getenv('OBJECT_STORAGE_REGION') or None,
+    'ACCESS_KEY': os.getenv('OBJECT_STORAGE_ACCESS_KEY') or None,       # None: boto3's usual lookup
+    'SECRET_KEY': os.getenv('OBJECT_STORAGE_SECRET_KEY') or None,
+    'ADDRESSING_STYLE': os.getenv('OBJECT_STORAGE_ADDRESSING_STYLE') or None,   # 'path' for MinIO
+    'URL_EXPIRE_SECONDS': 15 * 60,
+}
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'documents': (
+        {'BACKEND': 'core.object_storage.ObjectStorage'} if OBJECT_STORAGE['BUCKET']
+        else {'BACKEND': 'django.core.files.storage.FileSystemStorage'}
+    ),
+}
+
+# Chunked, resumable admin uploads of paper/syllabus PDFs (core/uploads.py)
+CHUNKED_UPLOADS = {
+    'STORAGE': 'documents',                 # Shared by all processes; chunks at <PREFIX>/<upload id>/<offset>.part
+    'PREFIX': 'uploads',
+    'CHUNK_SIZE': 8 * 1024 * 1024,          # Largest chunk accepted per request
+    'MAX_SIZE': 1024 * 1024 * 1024,         # Per file
+    'EXPIRE_HOURS': 24,                     # Unfinished uploads are dropped after this
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -116,11 +189,18 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.FastJSONRenderer',
+    ],
+    # No-op unless the view sets `rate_limit_scope` (see RATE_LIMIT)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.ratelimit.BucketThrottle',
     ],
 }
 
+# The browsable API is a development aid only
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
 # CSRF trusted origins for local testing and production
 CSRF_TRUSTED_ORIGINS = [
     'http://127.0.0.1:8000',
@@ -203,6 +283,42 @@ CACHES = {
     }
 }
 
+# Shared rate-limit buckets want a cache with an atomic incr() (core/ratelimit.py). Without
+# RATE_LIMIT_REDIS_URL they are counted in the RateLimitCounter table instead.
+if os.getenv('RATE_LIMIT_REDIS_URL'):
+    CACHES['ratelimit'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('RATE_LIMIT_REDIS_URL'),
+    }
+
+# Exam session autosaves live only in this cache until run_exam_sessions writes them back,
+# so it is never shared and never culled: a culled key is a student's lost answers.
+# EXAM_SESSIONS_REDIS_URL is preferred; the database fallback needs
+# `python manage.py createcachetable`.
+if os.getenv('EXAM_SESSIONS_REDIS_URL'):
+    CACHES['exam_sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('EXAM_SESSIONS_REDIS_URL'),
+    }
+else:
+    CACHES['exam_sessions'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'exam_session_cache',
+        # A few keys per open session; far above any number of students online at once
+        'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+    }
+
+# Response compression (see core.middleware.CompressionMiddleware)
+COMPRESSION = {
+    'MIN_SIZE': 1024,  # Bytes; smaller bodies are sent as-is
+    # Catalog payloads only change on admin edits, so they are compressed once at high levels.
+    # Not /api/syllabus/: its bodies carry presigned URLs, different on every request.
+    'CACHED_PATHS': ['/api/keywords/', '/api/interview-questions/', '/api/formulas/'],
+    'CACHE_MAX_BYTES': 32 * 1024 * 1024,
+    'STATIC_LEVELS': {'br': 11, 'gzip': 9},
+    'DYNAMIC_LEVELS': {'br': 4, 'gzip': 6},
+}
+
 # Email configuration (for password reset, notifications)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
 # For production, use SMTP:
@@ -216,10 +332,103 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For developm
 # Daily Quiz Settings
 DAILY_QUIZ_SETTINGS = {
     'MAX_QUESTIONS_PER_DAY': 10,  # Maximum questions per daily quiz
-    'AUTO_CLEANUP_DAYS': 30,      # Auto-delete old quiz attempts after 30 days
+    'AUTO_CLEANUP_DAYS': 30,      # Archive old quiz attempts after 30 days (archive_history)
     'TIMEZONE': 'Asia/Kolkata',   # Timezone for quiz scheduling
 }
 
+# History retention, applied by `python manage.py archive_history`
+RETENTION_SETTINGS = {
+    'STORAGE': 'documents',        # Shared by all nodes; see core/retention.py for the layout
+    'PREFIX': 'archive',           # Name prefix of the archive files in that storage
+    'BATCH_SIZE': 1000,            # Rows archived and deleted per transaction
+    'BATCH_PAUSE_SECONDS': 0.05,   # Breathing room for live traffic between batches
+    'KEEP_DAYS': {
+        'ai_chat_history': 180,
+        'user_answers': 365,
+        'daily_quiz_attempts': DAILY_QUIZ_SETTINGS['AUTO_CLEANUP_DAYS'],
+    },
+}
+
+REPORTS = {
+    'STORAGE': 'documents',            # Shared with the workers; PDFs at <PREFIX>/<digest[:2]>/<digest>.pdf
+    'PREFIX': 'reports',
+    'POLL_SECONDS': 1.0,               # render_reports worker idle poll interval
+    'RETRY_AFTER_SECONDS': 2,          # Sent with 202 while a report is rendering
+    'MAX_TRIES': 3,
+    'STALE_SECONDS': 300,              # Running jobs older than this are requeued
+    'MISSING_GRACE_SECONDS': 60,       # A done job whose file is missing this long renders again
+    'KEEP_DAYS': 30,                   # render_reports --prune
+    'DEFAULT_TERM_DAYS': 182,          # Term report range when ?from= is not given
+}
+
+RATE_LIMIT = {
+    'CACHE': 'ratelimit' if 'ratelimit' in CACHES else 'default',   # Buckets shared by all processes
+    # Trusted proxies adding X-Forwarded-For in front of the app (see gunicorn.conf.py).
+    # Left at 0 behind a load balancer, every client shares the balancer's address.
+    'NUM_PROXIES': int(os.getenv('RATE_LIMIT_NUM_PROXIES', '0')),
+    # scope: {bucket: (burst, period)}: `burst` requests, refilled evenly over `period` seconds.
+    # 'endpoint' buckets are per process; the others are per user, client IP or username.
+    'BUCKETS': {
+        'login': {'username': (5, 60), 'ip': (100, 60), 'endpoint': (20, 1)},  # Schools share an IP
+        'register': {'ip': (10, 600), 'endpoint': (10, 1)},
+        'ai_chat': {'user': (10, 60), 'ip': (30, 60), 'endpoint': (10, 1)},
+        'submit_test': {'user': (10, 60), 'endpoint': (50, 1)},
+    },
+    'IN_FLIGHT': {                   # Concurrent operations per process
+        'llm': 8,
+        'password_hash': 4,
+    },
+    'BUSY_RETRY_AFTER_SECONDS': 2,
+}
+
+SPACED_REPETITION = {
+    'QUEUE_SIZE': 20,                # Cards returned by the review queue by default
+    'MAX_QUEUE_SIZE': 100,
+    'MAX_REVIEWS_PER_BATCH': 200,
+    'NEW_CARDS_PER_DAY': 20,         # Per user and deck
+    'RELEARN_MINUTES': 10,           # A forgotten card comes back this soon
+    'SECOND_INTERVAL_DAYS': 6,
+    'EASY_INTERVAL_DAYS': 4,         # First interval of a card answered 'easy'
+}
+
+QUESTION_DEDUP = {
+    'THRESHOLD': 0.7,                # Estimated similarity at which an imported question is reported
+    'MAX_MATCHES': 3,                # Matches listed per row in the import report
+}
+
+ADMIN_SCALE = {
+    'EXACT_COUNT_LIMIT': 100000,     # Changelists count exactly up to here, then show an estimate
+    'INLINE_ROWS_LIMIT': 200,        # Larger attempts link to their answers instead of inlining them
+}
+
+EXAM_SESSIONS = {
+    'CACHE': 'exam_sessions',        # Autosaves only touch this cache (see CACHES above)
+    'DURATION_SECONDS': 30 * 60,
+    'GRACE_SECONDS': 30,             # Autosaves and submissions accepted this long past the deadline
+    'KEEP_SECONDS': 3600,            # Cached answers outlive the deadline by this much
+    'FLUSH_SECONDS': 5,              # run_exam_sessions writes changed answers back this often
+    'BATCH_SIZE': 500,
+}
+
+LIVE_QUIZ = {
+    'MAX_STUDENTS': 500,             # Per live session
+    'SEND_QUEUE_SIZE': 64,           # Outgoing messages buffered per socket before it is dropped
+    'POLL_SECONDS': 0.25,            # Each process syncs its live sessions with the database this often
+    'IDLE_POLL_SECONDS': 1,          # Backed off to, doubling, while a process's sessions see no change
+}
+
+# Invalidation bus for per-process caches (core/invalidation.py)
+INVALIDATION = {
+    'TRANSPORT': os.getenv('INVALIDATION_TRANSPORT', 'db'),  # 'db' needs nothing else; 'redis' needs redis-py
+    'REDIS_URL': os.getenv('INVALIDATION_REDIS_URL', 'redis://localhost:6379/0'),
+    'STREAM': 'crackit:invalidation',
+    'POLL_SECONDS': 1.0,       # Longest a process serves a copy edited elsewhere
+    'SETTLE_SECONDS': 5,       # 'db': window reread for events committed out of id order
+    'KEEP_SECONDS': 3600,      # Events are pruned after this; a process idle longer drops everything
+    'MAX_EVENTS': 1000,        # Per poll; a longer backlog drops everything instead
+    'MAX_AGE_SECONDS': 300,    # ProcessCache entries are rebuilt after this, missed events or not
+}
+
 # Custom settings for your application
 CRACKIT_SETTINGS = {
     'APP_NAME': 'Crack_it',
@@ -250,7 +459,7 @@ if not DEBUG:
     })
     
     # Static files for production
-    STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
     
     # Allowed hosts for production (update with your domain)
     ALLOWED_HOSTS = [
@@ -2,9 +2,9 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 from django.conf import settings
-from django.conf.urls.static import static
 
 from core import views
+from core.assets import serve_bundle
 from core.views import (
     home_view,
     login_view,
@@ -31,8 +31,10 @@ from core.views import (
     LoginAPIView,
 )
 
-from core.views_ai import CrackItAIChatAPIView, DeleteAIChatHistoryAPIView
-from core.views import save_ai_chat_history
+from core.views_ai import DeleteAIChatHistoryAPIView
+from core.views_async import (
+    ai_chat_api, ai_chat_history_api, ai_conversation_list_api, ai_conversation_messages_api, serve_media,
+)
 
 from rest_framework import routers
 
@@ -50,14 +52,33 @@ urlpatterns = [
 
     path('api/', include(router.urls)),
 
+    path('assets/<path:path>', serve_bundle, name='asset-bundle'),
+
     path('api/auth/register/', RegisterAPIView.as_view(), name='api-register'),
     path('api/auth/login/', LoginAPIView.as_view(), name='api-login'),
+    path('api/csrf/', views.csrf_token_view, name='csrf-token'),
+    path('api/metrics/compression/', views.compression_metrics, name='compression-metrics'),
+    path('api/metrics/reports/', views.report_metrics, name='report-metrics'),
+    path('api/metrics/rate-limits/', views.rate_limit_metrics, name='rate-limit-metrics'),
+    path('api/metrics/invalidation/', views.invalidation_metrics, name='invalidation-metrics'),
 
     path('api/mock-tests/<int:test_id>/questions/', QuestionListAPIView.as_view(), name='mocktest-questions'),
     path('api/mock-tests/<int:test_id>/submit/', SubmitTestAPIView.as_view(), name='mocktest-submit'),
+    path('api/mock-tests/<int:test_id>/session/', views.ExamSessionAPIView.as_view(), name='mocktest-session'),
+    path('api/exam-sessions/<int:session_id>/answers/', views.ExamSessionAnswersAPIView.as_view(), name='exam-session-answers'),
 
     path('api/user/test-attempts/', TestAttemptListAPIView.as_view(), name='user-test-attempts'),
     path('api/user/test-attempts/<int:attempt_id>/details/', TestAttemptDetailAPIView.as_view(), name='test-attempt-detail'),
+    path('api/user/archive/<str:policy>/', views.ArchivedHistoryAPIView.as_view(), name='user-archive'),
+    path('api/item-stats/mock-tests/<int:test_id>/', views.MockTestItemStatsAPIView.as_view(), name='mocktest-item-stats'),
+    path('api/item-stats/daily-quiz/', views.DailyQuizItemStatsAPIView.as_view(), name='dailyquiz-item-stats'),
+    path('api/exports/<str:name>.<str:file_format>', views.ExportAPIView.as_view(), name='export'),
+    path('api/reports/attempts/<int:attempt_id>.pdf', views.AttemptReportAPIView.as_view(), name='attempt-report'),
+    path('api/reports/term.pdf', views.TermReportAPIView.as_view(), name='term-report'),
+    path('api/review/queue/', views.ReviewQueueAPIView.as_view(), name='review-queue'),
+    path('api/review/answers/', views.ReviewSubmitAPIView.as_view(), name='review-answers'),
+    path('api/uploads/', views.ChunkedUploadAPIView.as_view(), name='chunked-uploads'),
+    path('api/uploads/<uuid:upload_id>/', views.ChunkedUploadDetailAPIView.as_view(), name='chunked-upload'),
 
     # Frontend pages rendering
     path('', TemplateView.as_view(template_name='auth.html'), name='landing'),
@@ -72,15 +93,18 @@ urlpatterns = [
     path('dailyquiz.html', views.daily_quiz_view, name='dailyquiz'),
     path('interview.html', interview_questions, name='interview'),
     path('formula.html', formula_view, name='formula'),
+    path('formula/sections/<str:subject>/', views.formula_section, name='formula-section'),
     path('aichat.html', ai_chat_view, name='aichat'),
     path('submit-daily-quiz/', views.submit_daily_quiz, name='submit_daily_quiz'),
 
 
-    path('api/ai-chat/', CrackItAIChatAPIView.as_view(), name='api-ai-chat'),
+    path('api/ai-chat/', ai_chat_api, name='api-ai-chat'),
 
-    path('api/ai-chat-history/', save_ai_chat_history, name='ai-chat-history'),
+    path('api/ai-chat-history/', ai_chat_history_api, name='ai-chat-history'),
     path('api/ai-chat-history/<int:chat_id>/', DeleteAIChatHistoryAPIView.as_view(), name='delete-ai-chat'),
+    path('api/ai-chat/conversations/', ai_conversation_list_api, name='ai-conversations'),
+    path('api/ai-chat/conversations/<int:chat_id>/messages/', ai_conversation_messages_api, name='ai-conversation-messages'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns.append(path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name='media'))
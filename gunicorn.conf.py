@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+
+# Shared by both deployments (see Procfile). The default is the ASGI app on Uvicorn
+# workers; set GUNICORN_WORKER_CLASS=sync and point gunicorn at crackit_backend.wsgi
+# for the classic one-request-per-worker setup.
+#
+# Behind a load balancer or reverse proxy, set RATE_LIMIT_NUM_PROXIES to the number of
+# proxies that append to X-Forwarded-For (1 for a single load balancer). Otherwise every
+# client has the proxy's address and they all share one set of per-IP rate limits.
+# RATE_LIMIT_REDIS_URL moves the shared rate-limit buckets from the database to Redis.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Long enough for a slow LLM reply, short enough to recycle a stuck worker
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
@@ -0,0 +1,148 @@
+// Chunked, resumable uploads for the admin's paper and syllabus PDF fields (core/uploads.py).
+// Picking a file sends it in chunks to /api/uploads/; after a dropped connection or a
+// reload, picking the same file again resumes from the offset the server reached. The
+// finished upload's id goes in the hidden <field>_upload input and the file input is
+// cleared, so saving the form doesn't send the file a second time.
+(function() {
+  'use strict';
+
+  const RETRIES = 5;
+
+  function getCookie(name) {
+    let cookieValue = null;
+    if(document.cookie && document.cookie !== '') {
+      const cookies = document.cookie.split(';');
+      for(let cookie of cookies) {
+        cookie = cookie.trim();
+        if(cookie.startsWith(name + '=')) {
+          cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+          break;
+        }
+      }
+    }
+    if(!cookieValue) {
+      const input = document.querySelector('input[name=csrfmiddlewaretoken]');
+      cookieValue = input ? input.value : null;
+    }
+    return cookieValue;
+  }
+
+  async function request(url, options) {
+    const response = await fetch(url, Object.assign({ credentials: 'same-origin' }, options));
+    const data = await response.json().catch(() => ({}));
+    return { response, data };
+  }
+
+  function resumeKey(target, file) {
+    return `chunked-upload:${target}:${file.name}:${file.size}:${file.lastModified}`;
+  }
+
+  async function startOrResume(box, file) {
+    const key = resumeKey(box.dataset.target, file);
+    const saved = localStorage.getItem(key);
+    if(saved) {
+      const { response, data } = await request(`${box.dataset.url}${saved}/`);
+      if(response.ok && data.status !== 'failed') {
+        return data;
+      }
+      localStorage.removeItem(key);
+    }
+    const { response, data } = await request(box.dataset.url, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCookie('csrftoken') },
+      body: JSON.stringify({ target: box.dataset.target, filename: file.name, size: file.size }),
+    });
+    if(!response.ok) {
+      throw new Error(data.error || `Upload failed (${response.status})`);
+    }
+    localStorage.setItem(key, data.id);
+    return data;
+  }
+
+  async function upload(box, file, status) {
+    let upload = await startOrResume(box, file);
+    let failures = 0;
+    while(upload.status === 'uploading') {
+      status.textContent = `Uploading ${Math.floor(upload.offset * 100 / upload.size)}%`;
+      const chunk = file.slice(upload.offset, upload.offset + upload.chunk_size);
+      let result;
+      try {
+        result = await request(`${box.dataset.url}${upload.id}/`, {
+          method: 'PATCH',
+          headers: {
+            'Content-Type': 'application/offset+octet-stream',
+            'Upload-Offset': String(upload.offset),
+            'X-CSRFToken': getCookie('csrftoken'),
+          },
+          body: chunk,
+        });
+      } catch(err) {
+        result = null;
+      }
+      if(result && result.response.ok) {
+        upload = result.data;
+        failures = 0;
+        continue;
+      }
+      if(result && ![409, 500, 502, 503, 504].includes(result.response.status)) {
+        throw new Error(result.data.error || `Upload failed (${result.response.status})`);
+      }
+      // Network error or an offset mismatch: ask where the upload stands and go on from there
+      if(++failures > RETRIES) {
+        throw new Error('Upload interrupted, pick the file again to resume.');
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+      const current = await request(`${box.dataset.url}${upload.id}/`);
+      if(current.response.ok) {
+        upload = current.data;
+      }
+    }
+    localStorage.removeItem(resumeKey(box.dataset.target, file));
+    if(upload.status !== 'complete') {
+      throw new Error('Upload failed, please try again.');
+    }
+    return upload;
+  }
+
+  function setup(box) {
+    const fileInput = box.querySelector('input[type=file]');
+    const hidden = box.querySelector('input[type=hidden]');
+    const status = box.querySelector('.chunked-upload-status');
+    const form = box.closest('form');
+    let busy = false;
+
+    fileInput.addEventListener('change', async () => {
+      const file = fileInput.files[0];
+      if(!file) {
+        return;
+      }
+      busy = true;
+      hidden.value = '';
+      try {
+        const done = await upload(box, file, status);
+        hidden.value = done.id;
+        fileInput.value = '';
+        fileInput.required = false;
+        status.textContent = `Uploaded ${done.filename}`;
+      } catch(err) {
+        // Leave the file in the input: saving the form uploads it the ordinary way
+        status.textContent = err.message;
+      } finally {
+        busy = false;
+      }
+    });
+
+    if(form) {
+      form.addEventListener('submit', event => {
+        if(busy) {
+          event.preventDefault();
+          status.textContent += ' (wait for the upload to finish before saving)';
+        }
+      });
+    }
+  }
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.chunked-upload').forEach(setup);
+  });
+})();